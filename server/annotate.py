@@ -0,0 +1,211 @@
+"""
+Renderer annotasi bounding box untuk annotatedImage
+
+- Sumber font di-resolve sekali (path yang dikonfigurasi, atau font bawaan Pillow)
+- Font per ukuran di-cache per thread (objek FreeType tidak aman dipakai
+  bersamaan dari beberapa thread)
+- Glyph (mask + posisi + advance) dan ukuran label di-cache per ukuran font:
+  label disusun dengan paste mask glyph, bukan rasterisasi FreeType per label
+- Lebar garis dan ukuran font mengikuti resolusi gambar output
+- Menggambar langsung (in-place) di gambar output, tanpa copy
+"""
+import functools
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, features
+
+# Warna per kelas (sama dengan draw_bounding_boxes)
+CLASS_COLORS: Dict[str, Tuple[int, int, int]] = {
+    'D0': (0, 255, 0),      # Green
+    'D1': (255, 255, 0),    # Yellow
+    'D2': (255, 165, 0),    # Orange
+    'D3': (255, 0, 0),      # Red
+    'D4': (255, 0, 255),    # Magenta
+    'D5': (128, 0, 128),    # Purple
+    'D6': (0, 0, 255),      # Blue
+}
+DEFAULT_COLOR = (255, 255, 255)
+TEXT_COLOR = (0, 0, 0)
+
+# Ukuran relatif terhadap sisi terpanjang gambar: font 40 px dan garis 3 px di 1280 px
+FONT_SCALE = 40 / 1280
+LINE_SCALE = 3 / 1280
+MIN_FONT_SIZE = 10
+
+# Jumlah entry cache glyph (ukuran font, karakter) dan layout label (ukuran font, teks)
+GLYPH_CACHE = 1024
+TEXT_SIZE_CACHE = 4096
+
+
+class Glyph(NamedTuple):
+    """Mask satu karakter dan posisinya relatif terhadap baseline"""
+    mask: Optional[Image.Image]  # None untuk karakter tanpa pixel (spasi)
+    offset_x: int
+    offset_y: int  # negatif = di atas baseline
+    advance: float
+
+
+class LabelLayout(NamedTuple):
+    """Ukuran label dan jarak tepi atas teks ke baseline"""
+    width: int
+    height: int
+    baseline: int
+
+
+class AnnotationRenderer:
+    """
+    Gambar bounding box + label kelas/confidence
+
+    Args:
+        font_path: File font TrueType/OpenType; kosong (atau tidak bisa dibuka)
+            = font bawaan Pillow
+        font_scale: Ukuran font relatif terhadap sisi terpanjang gambar
+        line_scale: Lebar garis relatif terhadap sisi terpanjang gambar
+        colors: Warna per kelas
+    """
+
+    def __init__(
+        self,
+        font_path: str = "",
+        font_scale: float = FONT_SCALE,
+        line_scale: float = LINE_SCALE,
+        colors: Optional[Dict[str, Tuple[int, int, int]]] = None,
+    ):
+        self.font_scale = font_scale
+        self.line_scale = line_scale
+        self.colors = colors or CLASS_COLORS
+        self.font_source = self._resolve_font(font_path)
+        self._local = threading.local()
+        self._glyph = functools.lru_cache(maxsize=GLYPH_CACHE)(self._render_glyph)
+        self._layout = functools.lru_cache(maxsize=TEXT_SIZE_CACHE)(self._measure)
+
+    @staticmethod
+    def _resolve_font(font_path: str) -> str:
+        """
+        Tentukan sumber font sekali saat renderer dibuat
+
+        Returns:
+            Path font, "bundled" (font scalable bawaan Pillow) atau "bitmap"
+            (Pillow tanpa FreeType: font kecil ukuran tetap)
+        """
+        if font_path:
+            try:
+                ImageFont.truetype(font_path, MIN_FONT_SIZE)
+                return str(Path(font_path))
+            except OSError as e:
+                print(f"Warning: Failed to load annotation font {font_path}: {e}, using bundled font")
+        return "bundled" if features.check("freetype2") else "bitmap"
+
+    def font(self, size: int):
+        """Font ukuran size untuk thread ini (di-load sekali per thread per ukuran)"""
+        fonts = getattr(self._local, "fonts", None)
+        if fonts is None:
+            fonts = self._local.fonts = {}
+        font = fonts.get(size)
+        if font is None:
+            if self.font_source == "bitmap":
+                font = ImageFont.load_default()
+            elif self.font_source == "bundled":
+                font = ImageFont.load_default(size)
+            else:
+                font = ImageFont.truetype(self.font_source, size)
+            fonts[size] = font
+        return font
+
+    def _render_glyph(self, size: int, char: str) -> Glyph:
+        font = self.font(size)
+        if self.font_source == "bitmap":
+            # Font bitmap tidak mendukung anchor: baseline dianggap di bawah bbox
+            anchor = None
+            left, top, right, bottom = font.getbbox(char)
+            advance = right
+            baseline = bottom
+        else:
+            anchor = "ls"
+            left, top, right, bottom = font.getbbox(char, anchor=anchor)
+            advance = font.getlength(char)
+            baseline = 0
+        if right <= left or bottom <= top:
+            return Glyph(None, 0, 0, advance)
+        mask = Image.new("L", (right - left, bottom - top), 0)
+        ImageDraw.Draw(mask).text((-left, -top), char, fill=255, font=font, anchor=anchor)
+        return Glyph(mask, left, top - baseline, advance)
+
+    def _measure(self, size: int, label: str) -> LabelLayout:
+        glyphs = [self._glyph(size, char) for char in label]
+        visible = [glyph for glyph in glyphs if glyph.mask is not None]
+        if not visible:
+            return LabelLayout(round(sum(glyph.advance for glyph in glyphs)), size, size)
+        top = min(glyph.offset_y for glyph in visible)
+        bottom = max(glyph.offset_y + glyph.mask.height for glyph in visible)
+        return LabelLayout(round(sum(glyph.advance for glyph in glyphs)), bottom - top, -top)
+
+    def text_size(self, size: int, label: str) -> Tuple[int, int]:
+        """Lebar dan tinggi label (pixel) untuk ukuran font size, di-cache"""
+        layout = self._layout(size, label)
+        return layout.width, layout.height
+
+    def draw_text(self, image: Image.Image, position: Tuple[float, float], label: str, size: int,
+                  color: Tuple[int, int, int] = TEXT_COLOR):
+        """Tulis label dengan tepi kiri-atas di position memakai glyph yang di-cache"""
+        x, y = position
+        baseline = y + self._layout(size, label).baseline
+        for char in label:
+            glyph = self._glyph(size, char)
+            if glyph.mask is not None:
+                image.paste(color, (round(x) + glyph.offset_x, round(baseline) + glyph.offset_y), glyph.mask)
+            x += glyph.advance
+
+    def sizes_for(self, image_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Ukuran font dan lebar garis untuk gambar berukuran image_size"""
+        longest = max(image_size)
+        font_size = max(MIN_FONT_SIZE, round(longest * self.font_scale))
+        line_width = max(1, round(longest * self.line_scale))
+        return font_size, line_width
+
+    def draw(self, image: Image.Image, detections: List[Dict], scale: float = 1.0) -> Image.Image:
+        """
+        Gambar box dan label langsung di image (in-place)
+
+        Args:
+            image: Gambar output (misal hasil decode atau thumbnail)
+            detections: List dict dengan 'bbox', 'class', 'confidence'
+            scale: Faktor koordinat bbox -> pixel image (misal ukuran thumbnail / ukuran decode)
+
+        Returns:
+            image yang sama
+        """
+        if not detections:
+            return image
+
+        draw = ImageDraw.Draw(image)
+        font_size, line_width = self.sizes_for(image.size)
+        padding = max(2, font_size // 7)
+
+        for det in detections:
+            x1, y1, x2, y2 = (coord * scale for coord in det['bbox'])
+            color = self.colors.get(det['class'], DEFAULT_COLOR)
+            draw.rectangle((x1, y1, x2, y2), outline=color, width=line_width)
+
+            label = f"{det['class']} {det['confidence']:.1f}%"
+            text_width, text_height = self.text_size(font_size, label)
+            label_height = text_height + 2 * padding
+            # Label di atas box; jika terpotong tepi atas gambar, di dalam box
+            label_width = text_width + 2 * padding
+            left = max(0, min(x1, image.width - label_width))
+            top = y1 - label_height if y1 >= label_height else max(0, y1)
+            draw.rectangle((left, top, left + label_width, top + label_height), fill=color)
+            self.draw_text(image, (left + padding, top + padding), label, font_size)
+
+        return image
+
+    def stats(self) -> Dict:
+        glyphs = self._glyph.cache_info()
+        layouts = self._layout.cache_info()
+        return {
+            "font": self.font_source,
+            "glyph_cache": {"hits": glyphs.hits, "misses": glyphs.misses, "size": glyphs.currsize},
+            "label_cache": {"hits": layouts.hits, "misses": layouts.misses, "size": layouts.currsize},
+        }
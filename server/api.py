@@ -0,0 +1,48 @@
+"""
+Helper bersama endpoint HTTP (server.py dan router *_api.py)
+
+Hanya bergantung pada config, tidak pada state server (model, executor,
+antrian job), jadi bisa di-import router tanpa circular import.
+"""
+import hmac
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+from config import ADMIN_TOKEN, RENDER_DEFAULT, RENDER_MODES, VIEW_NAMES
+
+
+def require_admin(x_admin_token: Optional[str]):
+    """Validasi header X-Admin-Token untuk endpoint admin"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Endpoint admin nonaktif (DENTALOGIC_ADMIN_TOKEN)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Token admin tidak valid")
+
+
+def validate_option(name: str, value: str, allowed: Tuple[str, ...]) -> str:
+    """Validasi query parameter dengan pilihan terbatas"""
+    if value not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{name} harus salah satu dari {', '.join(allowed)}"
+        )
+    return value
+
+
+def resolve_render(render: Optional[str], x_render: Optional[str]) -> str:
+    """Mode render dari query ?render=, header X-Render, atau default server"""
+    value = render or x_render or RENDER_DEFAULT
+    return validate_option("render", value.lower(), RENDER_MODES)
+
+
+def get_view_name(filename: str, index: int) -> str:
+    """Tentukan nama view (Frontal_View, Left_Lateral_View, ...) dari nama file"""
+    if filename:
+        stem = Path(filename).stem
+        for view in VIEW_NAMES:
+            if stem.lower().endswith(view.lower()):
+                return view
+        return stem
+    return f"view_{index + 1}"
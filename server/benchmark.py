@@ -0,0 +1,829 @@
+"""
+Benchmark untuk komponen server Dentalogic8
+
+Usage:
+    # Preprocessing: preprocess_image() vs LetterboxPreprocessor
+    python benchmark.py preprocess [--sizes 4000x3000 1920x1440] [--repeat 20] [--json hasil.json]
+
+    # Microbenchmark fungsi hot path (preprocess_image, non_max_suppression,
+    # draw_bounding_boxes, render_annotated_image, to_native_type, build_prediction_result,
+    # serialisasi response json/columnar/msgpack)
+    python benchmark.py micro [--repeat 50] [--json hasil.json]
+
+    # NMS: cek ekuivalensi nms.py vs non_max_suppression() lalu benchmark 1k/10k box
+    python benchmark.py nms [--counts 1000 10000] [--repeat 20] [--json hasil.json]
+
+    # Load test: server lokal dengan model stub (atau --url server yang sudah jalan)
+    python benchmark.py load [--concurrency 1 4 16] [--sizes 1920x1440 640x480] [--requests 200] [--json hasil.json]
+
+    # Autotune: sweep worker launcher, thread intra-op, batch size dan thread decode
+    # dengan sample JPEG repo, tulis config rekomendasi (server/tuned.json)
+    python benchmark.py autotune [--backend stub|ultralytics|onnx] [--max-p99-ms 500] [--requests 100] [--json hasil.json]
+
+Hasil --json berisi {"meta": {...}, "rows": [...]} supaya bisa di-diff antar rilis.
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+import nms
+import responses
+import server
+from config import RENDER_MODES
+from reference import (
+    check_nms_equivalence, draw_bounding_boxes, legacy_class_nms, non_max_suppression,
+    preprocess_image, random_boxes,
+)
+from tuning import DEFAULT_TUNED_CONFIG, thread_env, tuned_config_path, write_tuned_config
+from onnx_backend import OnnxBoxes, OnnxResults
+from preprocessing import LetterboxPreprocessor, RESAMPLE_MODES
+
+# Sample JPEG di root repo (Frontal_View, Left_Lateral_View, Right_Lateral_View)
+SAMPLE_IMAGES = sorted((Path(__file__).parent.parent).glob("*_View.jpg"))
+
+DEFAULT_SIZES = ["4000x3000", "1920x1440", "640x480"]
+DEFAULT_LOAD_SIZES = ["4000x3000", "1920x1440", "640x480"]
+DEFAULT_CONCURRENCY = [1, 4, 16]
+
+# Waktu tunggu server lokal sampai /ready
+SERVER_START_TIMEOUT = 60
+
+# Autotune: kandidat batch default, dan selisih throughput (relatif) yang dianggap
+# seri; di antara kandidat yang seri dipilih p99 terendah
+DEFAULT_AUTOTUNE_BATCH = [1, 4, 8]
+AUTOTUNE_RPS_TOLERANCE = 0.05
+
+
+def parse_size(value: str) -> Tuple[int, int]:
+    """Parse "WxH" menjadi tuple (width, height)"""
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def load_sample_image(size: Tuple[int, int], index: int = 0) -> Image.Image:
+    """Sample JPEG dari repo, di-resize ke ukuran tertentu dan di-decode penuh"""
+    if not SAMPLE_IMAGES:
+        raise FileNotFoundError("Sample JPEG (*_View.jpg) tidak ditemukan di root repo")
+    image = Image.open(SAMPLE_IMAGES[index % len(SAMPLE_IMAGES)]).convert("RGB")
+    if image.size != size:
+        image = image.resize(size, Image.Resampling.BICUBIC)
+    image.load()
+    return image
+
+
+def encode_sample_jpeg(size: Tuple[int, int], index: int = 0, quality: int = 90) -> bytes:
+    """Sample JPEG di-resize lalu di-encode ulang (payload upload untuk load test)"""
+    buffer = io.BytesIO()
+    load_sample_image(size, index).save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+
+def time_call(fn: Callable[[], object], repeat: int, warmup: int = 2) -> Dict[str, float]:
+    """Jalankan fn berulang kali, kembalikan statistik latency (ms)"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "min_ms": round(samples[0], 3),
+    }
+
+
+def bench_preprocess(sizes: List[str], repeat: int) -> List[Dict]:
+    """Bandingkan preprocess_image() (LANCZOS stretch) dengan LetterboxPreprocessor"""
+    rows = []
+    for size_text in sizes:
+        size = parse_size(size_text)
+        image = load_sample_image(size)
+
+        rows.append({
+            "benchmark": "preprocess",
+            "size": size_text,
+            "variant": "preprocess_image (lanczos)",
+            **time_call(lambda: preprocess_image(image), repeat),
+        })
+
+        for resample in RESAMPLE_MODES:
+            preprocessor = LetterboxPreprocessor(server.MODEL_INPUT_SIZE, max_batch=1, resample=resample)
+            rows.append({
+                "benchmark": "preprocess",
+                "size": size_text,
+                "variant": f"letterbox ({resample})",
+                **time_call(lambda: preprocessor([image]), repeat),
+            })
+    return rows
+
+
+def numpy_result_dict(count: int) -> Dict:
+    """Result /predict dengan nilai NumPy (input terburuk untuk to_native_type)"""
+    boxes, scores, classes = random_boxes(count)
+    detections = [
+        {"bbox": box, "class": server.CARIES_CLASSES[int(cls)], "confidence": score * np.float32(100)}
+        for box, score, cls in zip(boxes, scores, classes)
+    ]
+    return {
+        "class": "D2",
+        "confidence": np.float32(80.0),
+        "allProbabilities": [{"class": cls, "probability": np.float64(0.0)} for cls in server.CARIES_CLASSES],
+        "inferenceTime": np.float64(12.5),
+        "detections": detections,
+        "boundingBoxes": [box for box in boxes],
+    }
+
+
+def bench_micro(repeat: int) -> List[Dict]:
+    """Microbenchmark fungsi hot path server"""
+    rows = []
+
+    for size_text in ("1920x1440", "640x480"):
+        image = load_sample_image(parse_size(size_text))
+        rows.append({
+            "benchmark": "micro",
+            "function": "preprocess_image",
+            "case": size_text,
+            **time_call(lambda: preprocess_image(image), repeat),
+        })
+
+    for count in (100, 1000):
+        boxes, scores, _ = random_boxes(count)
+        rows.append({
+            "benchmark": "micro",
+            "function": "non_max_suppression",
+            "case": f"{count} boxes",
+            **time_call(lambda: non_max_suppression(boxes, scores, server.IOU_THRESHOLD), repeat),
+        })
+
+    image = load_sample_image((1280, 960))
+    for count in (5, 50):
+        boxes, scores, classes = random_boxes(count)
+        detections = [
+            {"bbox": box.tolist(), "class": server.CARIES_CLASSES[int(cls)], "confidence": float(score) * 100}
+            for box, score, cls in zip(boxes, scores, classes)
+        ]
+        rows.append({
+            "benchmark": "micro",
+            "function": "draw_bounding_boxes",
+            "case": f"1280x960, {count} boxes",
+            **time_call(lambda: draw_bounding_boxes(image, detections), repeat),
+        })
+        # Dengan copy supaya sebanding dengan draw_bounding_boxes (yang menggambar di copy)
+        rows.append({
+            "benchmark": "micro",
+            "function": "AnnotationRenderer.draw",
+            "case": f"1280x960, {count} boxes",
+            **time_call(lambda: server.annotation_renderer.draw(image.copy(), detections), repeat),
+        })
+        # Annotate + encode JPEG seperti di pipeline (full menggambar langsung di image)
+        for render in ("full", "thumb"):
+            timings = {}
+            rows.append({
+                "benchmark": "micro",
+                "function": f"render_annotated_image ({render})",
+                "case": f"1280x960, {count} boxes",
+                **time_call(lambda: server.render_annotated_image(image.copy(), detections, timings, render), repeat),
+            })
+
+    for count in (10, 500):
+        result = numpy_result_dict(count)
+        rows.append({
+            "benchmark": "micro",
+            "function": "to_native_type",
+            "case": f"{count} detections",
+            **time_call(lambda: server.to_native_type(result), repeat),
+        })
+
+    names = {i: name for i, name in enumerate(server.CARIES_CLASSES)}
+    for count in (10, 500):
+        boxes, scores, classes = random_boxes(count)
+        yolo_result = OnnxResults(OnnxBoxes(boxes, scores, classes), names, (960, 1280))
+        rows.append({
+            "benchmark": "micro",
+            "function": "build_prediction_result",
+            "case": f"{count} boxes",
+            **time_call(lambda: server.build_prediction_result(yolo_result, 10.0), repeat),
+        })
+
+    # Serialisasi response /predict (termasuk konversi kolumnar), dengan annotasi thumb inline
+    thumb = encode_sample_jpeg((server.THUMB_MAX_SIZE, server.THUMB_MAX_SIZE * 3 // 4))
+    formats = [fmt for fmt in responses.RESPONSE_FORMATS if responses.is_available(fmt)]
+    for count in (10, 500):
+        boxes, scores, classes = random_boxes(count)
+        result = server.build_prediction_result(OnnxResults(OnnxBoxes(boxes, scores, classes), names, (960, 1280)), 10.0)
+        for response_format in formats:
+            image = thumb if response_format == "msgpack" else base64.b64encode(thumb).decode()
+
+            def serialize():
+                content = {**result, "annotatedImage": image}
+                if response_format != "json":
+                    responses.to_columnar(content)
+                return responses.render_response(content, response_format)
+
+            rows.append({
+                "benchmark": "micro",
+                "function": f"render_response ({response_format})",
+                "case": f"{count} detections, {len(serialize().body) // 1024} KB",
+                **time_call(serialize, repeat),
+            })
+
+    return rows
+
+
+def bench_nms(counts: List[int], repeat: int) -> List[Dict]:
+    """Benchmark non_max_suppression() vs nms.py (hard, class-aware, top-k, Soft-NMS, batch)"""
+    rows = []
+    iou = server.IOU_THRESHOLD
+    conf = server.CONFIDENCE_THRESHOLD
+    for count in counts:
+        boxes, scores, classes = random_boxes(count)
+        cases = [
+            ("non_max_suppression", lambda: non_max_suppression(boxes, scores, iou)),
+            ("non_max_suppression class-offset", lambda: legacy_class_nms(boxes, scores, classes, iou)),
+            ("nms hard", lambda: nms.nms(boxes, scores, iou)),
+            ("nms class-aware", lambda: nms.nms(boxes, scores, iou, classes=classes)),
+            ("nms server config", lambda: nms.nms(
+                boxes, scores, iou, classes=classes, score_threshold=conf,
+                top_k=server.NMS_TOP_K, max_det=server.NMS_MAX_DET,
+            )),
+            ("nms top_k=1000", lambda: nms.nms(
+                boxes, scores, iou, classes=classes, score_threshold=conf,
+                top_k=1000, max_det=server.NMS_MAX_DET,
+            )),
+            ("nms soft gaussian", lambda: nms.nms(
+                boxes, scores, iou, classes=classes, score_threshold=conf,
+                top_k=server.NMS_TOP_K, max_det=server.NMS_MAX_DET, method="gaussian",
+            )),
+        ]
+        for function, fn in cases:
+            rows.append({
+                "benchmark": "nms",
+                "function": function,
+                "case": f"{count} boxes",
+                **time_call(fn, repeat),
+            })
+
+        batch = [random_boxes(count, seed=seed) for seed in range(8)]
+        batch_boxes = np.stack([b for b, _, _ in batch])
+        batch_scores = np.stack([s for _, s, _ in batch])
+        batch_classes = np.stack([c for _, _, c in batch])
+        rows.append({
+            "benchmark": "nms",
+            "function": "batched_nms server config",
+            "case": f"8 x {count} boxes",
+            **time_call(lambda: nms.batched_nms(
+                batch_boxes, batch_scores, iou, classes=batch_classes, score_threshold=conf,
+                top_k=server.NMS_TOP_K, max_det=server.NMS_MAX_DET,
+            ), repeat),
+        })
+    return rows
+
+
+class ProcessSampler:
+    """
+    CPU time dan peak RSS process server dari /proc (Linux)
+
+    Peak RSS di-reset per skenario lewat /proc/<pid>/clear_refs jika diizinkan.
+    Process anak (executor "process") tidak ikut dihitung.
+    """
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self.available = pid is not None and Path(f"/proc/{pid}/stat").exists()
+        self._ticks = os.sysconf("SC_CLK_TCK") if self.available else 1
+
+    def cpu_seconds(self) -> Optional[float]:
+        if not self.available:
+            return None
+        fields = Path(f"/proc/{self.pid}/stat").read_text().rsplit(")", 1)[1].split()
+        # utime dan stime adalah field ke-14 dan ke-15 (index 11 dan 12 setelah nama)
+        return (int(fields[11]) + int(fields[12])) / self._ticks
+
+    def peak_rss_mb(self) -> Optional[float]:
+        if not self.available:
+            return None
+        for line in Path(f"/proc/{self.pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+        return None
+
+    def reset_peak(self):
+        if not self.available:
+            return
+        try:
+            Path(f"/proc/{self.pid}/clear_refs").write_text("5")
+        except OSError:
+            pass
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_server(port: int, extra_env: Dict[str, str]) -> subprocess.Popen:
+    """Jalankan uvicorn server:app dengan backend stub (cache hasil dimatikan)"""
+    env = dict(os.environ)
+    env.update({
+        "DENTALOGIC_MODEL_BACKEND": "stub",
+        "DENTALOGIC_CACHE_ENABLED": "0",
+    })
+    env.update(extra_env)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=Path(__file__).parent,
+        env=env,
+    )
+
+
+def wait_until_ready(session, url: str, timeout: float = SERVER_START_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if session.get(f"{url}/ready", timeout=2).status_code == 200:
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Server {url} tidak ready dalam {timeout} detik")
+
+
+def stage_totals(session, url: str) -> Dict[str, Tuple[int, float]]:
+    """(count, sum ms) per stage dari /health server"""
+    try:
+        stages = session.get(f"{url}/health", timeout=5).json()["inference"]["stages"]
+    except Exception:
+        return {}
+    return {stage: (hist["count"], hist["sum"]) for stage, hist in stages.items()}
+
+
+def run_load_scenario(
+    url: str,
+    endpoint: str,
+    payloads: List[bytes],
+    concurrency: int,
+    total_requests: int,
+    query: str = "",
+) -> Tuple[List[float], int, float]:
+    """
+    Kirim total_requests upload dengan concurrency thread client (payloads dipakai bergiliran)
+
+    Returns:
+        Tuple (latency ms request sukses, jumlah error, durasi wall dalam detik)
+    """
+    import requests
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = [total_requests]
+    lock = threading.Lock()
+    field = "files" if endpoint.endswith("/batch") else "file"
+
+    def worker():
+        nonlocal errors
+        session = requests.Session()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+                payload = payloads[remaining[0] % len(payloads)]
+            start = time.perf_counter()
+            try:
+                response = session.post(
+                    f"{url}{endpoint}{query}",
+                    files={field: ("sample_Frontal_View.jpg", payload, "image/jpeg")},
+                    timeout=120,
+                )
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    return latencies, errors, time.perf_counter() - start
+
+
+def bench_load(args) -> List[Dict]:
+    """Load test /predict pada beberapa ukuran gambar dan level concurrency"""
+    import requests
+
+    session = requests.Session()
+    process = None
+    url = args.url
+    pid = args.server_pid
+    if url is None:
+        port = free_port()
+        extra_env = dict(item.split("=", 1) for item in args.server_env)
+        extra_env.setdefault("DENTALOGIC_STUB_LATENCY_MS", str(args.stub_latency_ms))
+        extra_env.setdefault("DENTALOGIC_STUB_BOXES", str(args.stub_boxes))
+        extra_env.setdefault("DENTALOGIC_STUB_MODE", args.stub_mode)
+        process = start_stub_server(port, extra_env)
+        url = f"http://127.0.0.1:{port}"
+        pid = process.pid
+
+    rows = []
+    try:
+        wait_until_ready(session, url)
+        sampler = ProcessSampler(pid)
+        query = f"?render={args.render}"
+
+        for size_text in args.sizes:
+            payload = encode_sample_jpeg(parse_size(size_text))
+            # Warm-up ringan per ukuran (alokasi buffer decode/encode)
+            run_load_scenario(url, args.endpoint, [payload], 1, 2, query)
+
+            for concurrency in args.concurrency:
+                sampler.reset_peak()
+                stages_before = stage_totals(session, url)
+                cpu_before = sampler.cpu_seconds()
+
+                latencies, errors, wall = run_load_scenario(
+                    url, args.endpoint, [payload], concurrency, args.requests, query
+                )
+
+                cpu_after = sampler.cpu_seconds()
+                stages_after = stage_totals(session, url)
+                latencies.sort()
+
+                row = {
+                    "benchmark": "load",
+                    "endpoint": args.endpoint,
+                    "size": size_text,
+                    "payload_kb": round(len(payload) / 1024, 1),
+                    "concurrency": concurrency,
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+                    "cpu_percent": round((cpu_after - cpu_before) / wall * 100, 1) if cpu_before is not None else None,
+                    "peak_rss_mb": sampler.peak_rss_mb(),
+                }
+                if latencies:
+                    row.update({
+                        "mean_ms": round(statistics.fmean(latencies), 2),
+                        "p50_ms": round(percentile(latencies, 0.50), 2),
+                        "p95_ms": round(percentile(latencies, 0.95), 2),
+                        "p99_ms": round(percentile(latencies, 0.99), 2),
+                    })
+                # Rata-rata per stage di server selama skenario ini
+                for stage, (count, total) in sorted(stages_after.items()):
+                    before_count, before_total = stages_before.get(stage, (0, 0.0))
+                    if count > before_count:
+                        row[f"stage_{stage}_ms"] = round((total - before_total) / (count - before_count), 2)
+                rows.append(row)
+                print_rows([row])
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return rows
+
+
+def powers_of_two(limit: int) -> List[int]:
+    """1, 2, 4, ... sampai limit (limit ikut jika bukan pangkat dua)"""
+    values = []
+    value = 1
+    while value <= limit:
+        values.append(value)
+        value *= 2
+    if limit >= 1 and values[-1] != limit:
+        values.append(limit)
+    return values
+
+
+def start_launcher_server(port: int, workers: int, extra_env: Dict[str, str]) -> subprocess.Popen:
+    """Jalankan launcher.py dengan workers worker (cache hasil dan job queue dimatikan)"""
+    env = dict(os.environ)
+    env.update({
+        "DENTALOGIC_CACHE_ENABLED": "0",
+        "DENTALOGIC_JOBS_ENABLED": "0",
+        # Trial autotune tidak boleh memakai config autotune sebelumnya
+        "DENTALOGIC_TUNED_CONFIG": "",
+    })
+    env.update(extra_env)
+    return subprocess.Popen(
+        [sys.executable, "launcher.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=Path(__file__).parent,
+        env=env,
+        start_new_session=True,
+    )
+
+
+def stop_server(process: subprocess.Popen):
+    """SIGTERM ke launcher (diteruskan ke worker), SIGKILL ke seluruh process group jika macet"""
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, 9)
+        process.wait()
+
+
+def run_autotune_trial(args, payloads: List[bytes], workers: int, threads: int, batch: int, decode_threads: int) -> Dict:
+    """Satu konfigurasi: start launcher, warm-up, lalu load test dengan concurrency tetap"""
+    import requests
+
+    extra_env = dict(item.split("=", 1) for item in args.server_env)
+    extra_env.update(thread_env(threads))
+    extra_env.update({
+        "DENTALOGIC_MODEL_BACKEND": args.backend,
+        "DENTALOGIC_INFERENCE_WORKERS": str(decode_threads),
+        "DENTALOGIC_BATCH_MAX_SIZE": str(batch),
+    })
+    if args.backend == "stub":
+        extra_env.setdefault("DENTALOGIC_STUB_LATENCY_MS", str(args.stub_latency_ms))
+        extra_env.setdefault("DENTALOGIC_STUB_MODE", "cpu")
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    process = start_launcher_server(port, workers, extra_env)
+    row = {
+        "benchmark": "autotune",
+        "workers": workers,
+        "threads": threads,
+        "batch": batch,
+        "decode_threads": decode_threads,
+    }
+    try:
+        wait_until_ready(requests.Session(), url)
+        query = f"?render={args.render}"
+        # Warm-up: semua worker sudah menerima koneksi dan buffer decode/encode teralokasi
+        run_load_scenario(url, args.endpoint, payloads, args.concurrency, max(args.concurrency, 4 * workers), query)
+        latencies, errors, wall = run_load_scenario(url, args.endpoint, payloads, args.concurrency, args.requests, query)
+    except Exception as e:
+        print(f"[autotune] workers={workers} threads={threads} batch={batch} decode_threads={decode_threads} gagal: {e}")
+        return {**row, "requests": 0, "errors": args.requests, "rps": 0.0}
+    finally:
+        stop_server(process)
+
+    latencies.sort()
+    row.update({
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+    })
+    if latencies:
+        row.update({
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+        })
+    print_rows([row])
+    return row
+
+
+def pick_best(rows: List[Dict], max_p99_ms: Optional[float]) -> Optional[Dict]:
+    """
+    Konfigurasi terbaik: throughput tertinggi (p99 <= max_p99_ms jika diberikan)
+
+    Kandidat dengan throughput dalam AUTOTUNE_RPS_TOLERANCE dari yang tertinggi
+    dianggap seri; di antaranya dipilih p99 terendah.
+    """
+    valid = [row for row in rows if row["errors"] == 0 and "p99_ms" in row]
+    if max_p99_ms is not None:
+        valid = [row for row in valid if row["p99_ms"] <= max_p99_ms] or valid
+    if not valid:
+        return None
+    best_rps = max(row["rps"] for row in valid)
+    tied = [row for row in valid if row["rps"] >= best_rps * (1 - AUTOTUNE_RPS_TOLERANCE)]
+    return min(tied, key=lambda row: row["p99_ms"])
+
+
+def bench_autotune(args) -> List[Dict]:
+    """
+    Sweep worker launcher, thread intra-op, batch size dan thread decode di mesin ini
+
+    Sweep bertahap (grid penuh terlalu lama karena setiap trial me-restart server):
+    1. Pasangan (worker, thread) dengan worker x thread <= jumlah CPU
+    2. Batch size dengan pasangan terbaik
+    3. Thread decode (worker inference executor) dengan batch terbaik
+    Rekomendasi ditulis ke args.output (dibaca server.py dan launcher.py saat start).
+    """
+    if not SAMPLE_IMAGES:
+        raise FileNotFoundError("Sample JPEG (*_View.jpg) tidak ditemukan di root repo")
+    payloads = [path.read_bytes() for path in SAMPLE_IMAGES]
+    cpus = os.cpu_count() or 1
+    rows: List[Dict] = []
+
+    def best_of(stage_rows: List[Dict]) -> Dict:
+        best = pick_best(stage_rows, args.max_p99_ms)
+        if best is None:
+            raise RuntimeError("Semua trial autotune gagal, cek log server di atas")
+        return best
+
+    # 1. Worker x thread (tanpa oversubscription), batch dan decode default server
+    batch = server.BATCH_MAX_SIZE
+    pairs = [
+        (workers, threads)
+        for workers in (args.workers or powers_of_two(cpus))
+        for threads in (args.threads or powers_of_two(max(1, cpus // workers)))
+        if workers * threads <= cpus or args.workers or args.threads
+    ]
+    stage = [run_autotune_trial(args, payloads, workers, threads, batch, threads) for workers, threads in pairs]
+    rows.extend(stage)
+    best = best_of(stage)
+    workers, threads = best["workers"], best["threads"]
+
+    # 2. Batch size
+    stage = [best] + [
+        run_autotune_trial(args, payloads, workers, threads, candidate, threads)
+        for candidate in args.batch if candidate != batch
+    ]
+    rows.extend(stage[1:])
+    best = best_of(stage)
+    batch = best["batch"]
+
+    # 3. Thread decode; dengan micro-batching executor memakai max(decode, batch) thread
+    candidates = args.decode_threads or sorted({threads, 2 * threads, 4 * threads, 2 * batch})
+    effective = {max(threads, batch) if batch > 1 else threads}
+    stage = [best]
+    for candidate in candidates:
+        size = max(candidate, batch) if batch > 1 else candidate
+        if size in effective:
+            continue
+        effective.add(size)
+        stage.append(run_autotune_trial(args, payloads, workers, threads, batch, candidate))
+    rows.extend(stage[1:])
+    best = best_of(stage)
+
+    env = {"DENTALOGIC_WORKERS": str(best["workers"])}
+    env.update(thread_env(best["threads"]))
+    env.update({
+        "DENTALOGIC_INFERENCE_WORKERS": str(best["decode_threads"]),
+        "DENTALOGIC_BATCH_MAX_SIZE": str(best["batch"]),
+    })
+    meta = {
+        **run_metadata(),
+        "backend": args.backend,
+        "endpoint": args.endpoint,
+        "render": args.render,
+        "concurrency": args.concurrency,
+        "max_p99_ms": args.max_p99_ms,
+        "best": best,
+    }
+    write_tuned_config(args.output, env, meta, rows)
+    print(f"\nRekomendasi: {', '.join(f'{key}={value}' for key, value in env.items())}")
+    print(f"Config disimpan di {args.output} (dibaca server.py dan launcher.py saat start)")
+    return rows
+
+
+def run_metadata() -> Dict:
+    """Info lingkungan untuk membandingkan hasil antar rilis"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "argv": sys.argv[1:],
+    }
+
+
+def print_rows(rows: List[Dict]):
+    """Cetak hasil benchmark sebagai tabel sederhana"""
+    for row in rows:
+        labels = "  ".join(
+            f"{key}={value}" for key, value in row.items()
+            if key not in ("benchmark",) and not key.endswith("_ms")
+        )
+        timings = "  ".join(f"{key}={value:.2f}" for key, value in row.items() if key.endswith("_ms"))
+        print(f"[{row['benchmark']}] {labels}  {timings}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark server Dentalogic8")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    preprocess_parser = subparsers.add_parser("preprocess", help="Benchmark preprocessing gambar")
+    preprocess_parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="Ukuran gambar WxH")
+    preprocess_parser.add_argument("--repeat", type=int, default=20)
+    preprocess_parser.add_argument("--json", type=Path, help="Simpan hasil sebagai JSON")
+
+    micro_parser = subparsers.add_parser("micro", help="Microbenchmark fungsi hot path")
+    micro_parser.add_argument("--repeat", type=int, default=50)
+    micro_parser.add_argument("--json", type=Path, help="Simpan hasil sebagai JSON")
+
+    nms_parser = subparsers.add_parser("nms", help="Cek ekuivalensi dan benchmark NMS")
+    nms_parser.add_argument("--counts", nargs="+", type=int, default=[1000, 10000], help="Jumlah box kandidat")
+    nms_parser.add_argument("--repeat", type=int, default=20)
+    nms_parser.add_argument("--json", type=Path, help="Simpan hasil sebagai JSON")
+
+    load_parser = subparsers.add_parser("load", help="Load test server (default: server lokal dengan model stub)")
+    load_parser.add_argument("--url", help="URL server yang sudah jalan (default: start server stub lokal)")
+    load_parser.add_argument("--server-pid", type=int, help="PID server untuk CPU/RSS jika memakai --url")
+    load_parser.add_argument("--endpoint", default="/predict", choices=["/predict", "/predict/batch"])
+    load_parser.add_argument("--render", default="full", choices=RENDER_MODES)
+    load_parser.add_argument("--sizes", nargs="+", default=DEFAULT_LOAD_SIZES, help="Ukuran gambar WxH")
+    load_parser.add_argument("--concurrency", nargs="+", type=int, default=DEFAULT_CONCURRENCY)
+    load_parser.add_argument("--requests", type=int, default=100, help="Jumlah request per skenario")
+    load_parser.add_argument("--stub-latency-ms", type=float, default=20.0)
+    load_parser.add_argument("--stub-boxes", type=int, default=10)
+    load_parser.add_argument("--stub-mode", default="cpu", choices=["cpu", "sleep"])
+    load_parser.add_argument(
+        "--server-env", nargs="*", default=[], metavar="KEY=VALUE",
+        help="Environment tambahan untuk server stub (misal DENTALOGIC_BATCH_MAX_SIZE=1)",
+    )
+    load_parser.add_argument("--json", type=Path, help="Simpan hasil sebagai JSON")
+
+    autotune_parser = subparsers.add_parser(
+        "autotune", help="Sweep worker, thread, batch dan thread decode lalu tulis config rekomendasi"
+    )
+    autotune_parser.add_argument(
+        "--backend", default="stub", choices=server.MODEL_BACKENDS,
+        help="Backend model (ultralytics = model/best.pt, onnx = DENTALOGIC_ONNX_MODEL_PATH)",
+    )
+    autotune_parser.add_argument("--workers", nargs="+", type=int, help="Kandidat worker launcher (default 1, 2, 4, ... <= CPU)")
+    autotune_parser.add_argument("--threads", nargs="+", type=int, help="Kandidat thread intra-op per worker (default 1, 2, 4, ... <= CPU / worker)")
+    autotune_parser.add_argument("--batch", nargs="+", type=int, default=DEFAULT_AUTOTUNE_BATCH, help="Kandidat DENTALOGIC_BATCH_MAX_SIZE")
+    autotune_parser.add_argument("--decode-threads", nargs="+", type=int, help="Kandidat thread decode per worker (default 1x, 2x, 4x thread dan 2x batch)")
+    autotune_parser.add_argument("--endpoint", default="/predict", choices=["/predict", "/predict/batch"])
+    autotune_parser.add_argument("--render", default="full", choices=RENDER_MODES)
+    autotune_parser.add_argument("--concurrency", type=int, default=max(4, 2 * (os.cpu_count() or 1)), help="Client bersamaan (sama untuk semua trial)")
+    autotune_parser.add_argument("--requests", type=int, default=100, help="Jumlah request per trial")
+    autotune_parser.add_argument("--max-p99-ms", type=float, help="Batas p99; konfigurasi di atas batas hanya dipilih jika semua di atas batas")
+    autotune_parser.add_argument("--stub-latency-ms", type=float, default=20.0)
+    autotune_parser.add_argument(
+        "--server-env", nargs="*", default=[], metavar="KEY=VALUE",
+        help="Environment tambahan untuk server (misal DENTALOGIC_ONNX_MODEL_PATH=...)",
+    )
+    autotune_parser.add_argument(
+        "--output", type=Path, default=tuned_config_path() or DEFAULT_TUNED_CONFIG,
+        help="File config rekomendasi (default DENTALOGIC_TUNED_CONFIG atau server/tuned.json)",
+    )
+    autotune_parser.add_argument("--json", type=Path, help="Simpan hasil sebagai JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "preprocess":
+        rows = bench_preprocess(args.sizes, args.repeat)
+    elif args.command == "micro":
+        rows = bench_micro(args.repeat)
+    elif args.command == "nms":
+        failures = check_nms_equivalence(args.counts)
+        if failures:
+            for failure in failures:
+                print(f"❌ NMS tidak ekuivalen: {failure}")
+            return 1
+        print("✅ nms.py ekuivalen dengan non_max_suppression()")
+        rows = bench_nms(args.counts, args.repeat)
+    elif args.command == "load":
+        rows = bench_load(args)
+    elif args.command == "autotune":
+        rows = bench_autotune(args)
+    else:
+        parser.error(f"Unknown command {args.command}")
+        return 2
+
+    if args.command not in ("load", "autotune"):
+        print_rows(rows)
+    if args.json:
+        args.json.write_text(json.dumps({"meta": run_metadata(), "rows": rows}, indent=2))
+        print(f"\nHasil disimpan di {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
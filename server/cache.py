@@ -0,0 +1,275 @@
+"""
+Cache untuk server
+
+- LRUCache: cache in-memory LRU dengan TTL dan batas memori
+- ResultCache: cache hasil prediksi (content-addressed) dengan tier memori
+  dan tier disk opsional, plus counter hit/miss
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Cache LRU thread-safe
+
+    Entry dibuang jika (a) melewati TTL, (b) jumlah entry melebihi max_entries,
+    atau (c) total ukuran (dihitung dengan sizeof) melebihi max_bytes.
+    Entry yang lebih besar dari max_bytes tidak disimpan.
+
+    Args:
+        max_entries: Jumlah entry maksimum (0 = tanpa batas)
+        ttl_seconds: Umur maksimum entry dalam detik (0 = tanpa TTL)
+        max_bytes: Total ukuran maksimum (0 = tanpa batas)
+        sizeof: Fungsi untuk menghitung ukuran value (default len())
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        ttl_seconds: float = 0,
+        max_bytes: int = 0,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        # key -> (value, size, expires_at)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._evictions += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Ambil value (None jika tidak ada atau sudah kedaluwarsa)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, _, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> bool:
+        """Simpan value; False jika value terlalu besar untuk cache"""
+        size = self.sizeof(value)
+        if self.max_bytes and size > self.max_bytes:
+            return False
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            self._evict()
+        return True
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Hapus dan kembalikan value"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._drop(key)
+            return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Ringkasan isi cache"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self._evictions,
+            }
+
+
+def content_key(data: bytes, *params) -> str:
+    """Key cache dari hash isi bytes + parameter yang mempengaruhi hasil"""
+    digest = hashlib.sha256(data)
+    for param in params:
+        digest.update(b"\x00")
+        digest.update(str(param).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Tier disk sederhana: satu file pickle per key
+
+    Hanya untuk data yang ditulis oleh server sendiri (direktori lokal, bukan input user).
+    File yang lebih tua dari TTL diabaikan; jika total ukuran melebihi max_bytes,
+    file terlama dihapus.
+    """
+
+    # Sweep ukuran direktori setiap N kali put
+    SWEEP_INTERVAL = 32
+
+    def __init__(self, directory: Path, ttl_seconds: float = 0, max_bytes: int = 0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            if self.ttl_seconds and time.time() - path.stat().st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                return None
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: Failed to read cache file {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, value: Any):
+        # Tulis ke file sementara lalu rename supaya pembaca tidak melihat file setengah jadi
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            self._puts += 1
+            sweep = self._puts % self.SWEEP_INTERVAL == 0
+        if sweep:
+            self.sweep()
+
+    def sweep(self):
+        """Hapus file kedaluwarsa dan file terlama jika melebihi max_bytes"""
+        now = time.time()
+        files = []
+        for path in self.directory.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if self.ttl_seconds and now - stat.st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        if self.max_bytes:
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def stats(self) -> Dict:
+        files = list(self.directory.glob("*.pkl"))
+        return {
+            "directory": str(self.directory),
+            "entries": len(files),
+            "bytes": sum(path.stat().st_size for path in files if path.exists()),
+            "max_bytes": self.max_bytes,
+        }
+
+
+class ResultCache:
+    """
+    Cache hasil prediksi dengan tier memori (LRUCache) dan tier disk opsional
+
+    Hit di tier disk dipromosikan ke tier memori.
+    """
+
+    def __init__(self, memory: LRUCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self._hits_memory = 0
+        self._hits_disk = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self._hits_memory += 1
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+                with self._lock:
+                    self._hits_disk += 1
+                return value
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key: str, value: Any):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value)
+            except Exception as e:
+                print(f"Warning: Failed to write cache file: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self._hits_memory + self._hits_disk
+            lookups = hits + self._misses
+            counters = {
+                "hits": hits,
+                "hits_memory": self._hits_memory,
+                "hits_disk": self._hits_disk,
+                "misses": self._misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            }
+        return {
+            **counters,
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
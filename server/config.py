@@ -0,0 +1,224 @@
+"""
+Konfigurasi server dari environment variable (DENTALOGIC_*)
+
+Dibaca sekali saat import. Config autotune (tuned.json, lihat tuning.py)
+diterapkan lebih dulu, jadi environment variable yang diset user tetap
+diutamakan dan nilai hasil autotune dipakai sebagai default.
+
+Tidak boleh meng-import numpy/torch: server.py meng-import modul ini sebelum
+numpy supaya jumlah thread BLAS/OpenMP dari config autotune ikut terkunci.
+Script tooling (quantize.py) memakai modul ini tanpa meng-import server.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from registry import parse_model_specs
+from tuning import apply_tuned_config
+
+# Path dan env config autotune yang diterapkan (None = tidak ada / tidak cocok)
+tuned_config = apply_tuned_config()
+
+# Konfigurasi
+MODEL_PATH = Path(__file__).parent.parent / "model" / "best.pt"
+MODEL_INPUT_SIZE = 640
+# DENTALOGIC_MODEL_DIR: satu-satunya direktori yang boleh dipakai ?path= di /models/{name}/reload
+MODEL_DIR = Path(os.getenv("DENTALOGIC_MODEL_DIR", str(MODEL_PATH.parent)))
+
+# Backend inference
+# - DENTALOGIC_MODEL_BACKEND: "ultralytics" (best.pt, butuh torch), "onnx" (best.onnx, onnxruntime)
+#   atau "stub" (model palsu untuk benchmark, lihat stub_model.py)
+# - DENTALOGIC_ONNX_MODEL_PATH: path model ONNX hasil export (python onnx_backend.py export)
+# - DENTALOGIC_ORT_INTRA_OP_THREADS / DENTALOGIC_ORT_INTER_OP_THREADS: thread ONNX Runtime (0 = default)
+MODEL_BACKENDS = ("ultralytics", "onnx", "stub")
+MODEL_BACKEND = os.getenv("DENTALOGIC_MODEL_BACKEND", "ultralytics")
+ONNX_MODEL_PATH = Path(os.getenv("DENTALOGIC_ONNX_MODEL_PATH", str(MODEL_PATH.with_suffix(".onnx"))))
+ORT_INTRA_OP_THREADS = int(os.getenv("DENTALOGIC_ORT_INTRA_OP_THREADS", "0"))
+ORT_INTER_OP_THREADS = int(os.getenv("DENTALOGIC_ORT_INTER_OP_THREADS", "0"))
+# Presisi model (backend onnx): "fp32" (best.onnx), "fp16" (best.fp16.onnx) atau
+# "int8" (best.int8.onnx, quantized); varian dibuat dengan `python quantize.py export`
+MODEL_PRECISIONS = ("fp32", "fp16", "int8")
+MODEL_PRECISION = os.getenv("DENTALOGIC_MODEL_PRECISION", "fp32")
+# Mode resample letterbox untuk backend ONNX: nearest, bilinear, bicubic, lanczos
+PREPROCESS_RESAMPLE = os.getenv("DENTALOGIC_PREPROCESS_RESAMPLE", "bilinear")
+# Registry model (hot-swap versi tanpa downtime, beberapa model resident sekaligus)
+# - DENTALOGIC_MODELS: model bernama tambahan "nama=path,nama2=path2" (file sesuai backend);
+#   model utama di atas terdaftar dengan nama "default"
+# - DENTALOGIC_MODEL_DEFAULT: nama model untuk request tanpa ?model=
+# - DENTALOGIC_MODEL_WATCH_INTERVAL: detik antar cek perubahan file model; model yang file-nya
+#   berubah di-load ulang + swap otomatis di setiap worker (0 = nonaktif)
+# - DENTALOGIC_ADMIN_TOKEN: token header X-Admin-Token untuk endpoint admin (kosong = nonaktif)
+DEFAULT_MODEL_NAME = "default"
+MODEL_SPECS = parse_model_specs(os.getenv("DENTALOGIC_MODELS", ""))
+MODEL_DEFAULT = os.getenv("DENTALOGIC_MODEL_DEFAULT", DEFAULT_MODEL_NAME)
+MODEL_WATCH_INTERVAL = float(os.getenv("DENTALOGIC_MODEL_WATCH_INTERVAL", "0"))
+ADMIN_TOKEN = os.getenv("DENTALOGIC_ADMIN_TOKEN", "")
+CARIES_CLASSES = ['D0', 'D1', 'D2', 'D3', 'D4', 'D5', 'D6']
+CONFIDENCE_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.5
+# NMS backend ONNX (lihat nms.py); default top-k dan max-det sama dengan Ultralytics
+# (max_nms=30000, max_det=300) supaya hasil backend onnx dan ultralytics sebanding
+# - DENTALOGIC_NMS_METHOD: "hard" (NMS biasa), "linear" atau "gaussian" (Soft-NMS)
+# - DENTALOGIC_NMS_TOP_K: kandidat maksimum per gambar yang ikut suppression (0 = semua)
+# - DENTALOGIC_NMS_MAX_DET: deteksi maksimum per gambar (0 = tanpa batas)
+# - DENTALOGIC_NMS_SIGMA: sigma Soft-NMS gaussian
+NMS_METHOD = os.getenv("DENTALOGIC_NMS_METHOD", "hard")
+NMS_TOP_K = int(os.getenv("DENTALOGIC_NMS_TOP_K", "30000"))
+NMS_MAX_DET = int(os.getenv("DENTALOGIC_NMS_MAX_DET", "300"))
+NMS_SIGMA = float(os.getenv("DENTALOGIC_NMS_SIGMA", "0.5"))
+
+# Decode gambar upload: sisi terpanjang maksimum setelah decode (0 = resolusi penuh).
+# JPEG besar di-decode dengan draft mode mendekati ukuran ini.
+DECODE_MAX_SIZE = int(os.getenv("DENTALOGIC_DECODE_MAX_SIZE", "1280"))
+# Sistem koordinat box di response: "original" (foto asli, default) atau "image"
+# (annotatedImage, hasil downscale ke DECODE_MAX_SIZE)
+COORDINATE_MODES = ("image", "original")
+COORDINATE_DEFAULT = "original"
+
+# Tiled inference (opt-in per request: ?tiled=true) untuk lesi kecil di foto resolusi tinggi
+# - DENTALOGIC_TILING_DEFAULT: "1" = mode tiled jika client tidak memilih
+# - DENTALOGIC_TILE_DECODE_MAX_SIZE: sisi terpanjang decode untuk mode tiled (0 = resolusi penuh)
+# - DENTALOGIC_TILE_SIZE: sisi tile dalam pixel gambar decode (default ukuran input model)
+# - DENTALOGIC_TILE_OVERLAP: fraksi overlap antar tile bersebelahan
+# - DENTALOGIC_TILE_MAX: jumlah tile maksimum per gambar (gambar diperkecil jika grid melebihi)
+# - DENTALOGIC_TILE_FULL_IMAGE: "1" = tambah satu pass gambar utuh (lesi besar yang terpotong tile)
+# - DENTALOGIC_TILE_MERGE_IOU: IoU threshold NMS per kelas penggabung deteksi antar tile
+TILING_DEFAULT = os.getenv("DENTALOGIC_TILING_DEFAULT", "0") == "1"
+TILE_DECODE_MAX_SIZE = int(os.getenv("DENTALOGIC_TILE_DECODE_MAX_SIZE", "1920"))
+TILE_SIZE = int(os.getenv("DENTALOGIC_TILE_SIZE", str(MODEL_INPUT_SIZE)))
+TILE_OVERLAP = float(os.getenv("DENTALOGIC_TILE_OVERLAP", "0.2"))
+TILE_MAX = int(os.getenv("DENTALOGIC_TILE_MAX", "16"))
+TILE_FULL_IMAGE = os.getenv("DENTALOGIC_TILE_FULL_IMAGE", "1") == "1"
+TILE_MERGE_IOU = float(os.getenv("DENTALOGIC_TILE_MERGE_IOU", str(IOU_THRESHOLD)))
+
+# Render annotatedImage: "none" (tanpa gambar), "thumb" (thumbnail), "full" (gambar hasil decode)
+# - DENTALOGIC_RENDER_DEFAULT: mode default jika client tidak memilih (query ?render= / header X-Render)
+# - DENTALOGIC_THUMB_MAX_SIZE / DENTALOGIC_THUMB_JPEG_QUALITY: ukuran dan kualitas thumbnail
+# - DENTALOGIC_FULL_JPEG_QUALITY: kualitas JPEG untuk render "full"
+RENDER_MODES = ("none", "thumb", "full")
+RENDER_DEFAULT = os.getenv("DENTALOGIC_RENDER_DEFAULT", "full")
+THUMB_MAX_SIZE = int(os.getenv("DENTALOGIC_THUMB_MAX_SIZE", "512"))
+THUMB_JPEG_QUALITY = int(os.getenv("DENTALOGIC_THUMB_JPEG_QUALITY", "80"))
+FULL_JPEG_QUALITY = int(os.getenv("DENTALOGIC_FULL_JPEG_QUALITY", "95"))
+# File font label annotasi (TrueType/OpenType); kosong = font bawaan Pillow
+ANNOTATION_FONT = os.getenv("DENTALOGIC_ANNOTATION_FONT", "")
+# Pengiriman annotatedImage: "inline" (base64 data URI di JSON) atau "link"
+# (JPEG biner diambil lewat GET /images/{id}, disimpan sementara di memori)
+DELIVERY_MODES = ("inline", "link")
+IMAGE_STORE_TTL = float(os.getenv("DENTALOGIC_IMAGE_STORE_TTL", "300"))
+IMAGE_STORE_MAX_MB = int(os.getenv("DENTALOGIC_IMAGE_STORE_MAX_MB", "64"))
+
+# Cache hasil prediksi (key: hash isi upload + model + threshold + opsi render)
+# - DENTALOGIC_CACHE_ENABLED: "1" aktif, "0" nonaktif
+# - DENTALOGIC_CACHE_MAX_ENTRIES / DENTALOGIC_CACHE_MAX_MB / DENTALOGIC_CACHE_TTL: batas tier memori
+# - DENTALOGIC_CACHE_DIR: direktori tier disk (kosong = tanpa tier disk)
+# - DENTALOGIC_CACHE_DISK_MAX_MB: batas ukuran tier disk
+RESULT_CACHE_ENABLED = os.getenv("DENTALOGIC_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("DENTALOGIC_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_MAX_MB = int(os.getenv("DENTALOGIC_CACHE_MAX_MB", "128"))
+RESULT_CACHE_TTL = float(os.getenv("DENTALOGIC_CACHE_TTL", "3600"))
+RESULT_CACHE_DIR = os.getenv("DENTALOGIC_CACHE_DIR", "")
+RESULT_CACHE_DISK_MAX_MB = int(os.getenv("DENTALOGIC_CACHE_DISK_MAX_MB", "1024"))
+
+# View standar satu set foto intraoral pasien
+VIEW_NAMES = ['Frontal_View', 'Left_Lateral_View', 'Right_Lateral_View']
+# Jumlah file maksimum untuk /predict/batch
+BATCH_MAX_FILES = int(os.getenv("DENTALOGIC_BATCH_MAX_FILES", "8"))
+
+# Batas upload
+# - DENTALOGIC_UPLOAD_MAX_MB: ukuran maksimum satu file gambar
+UPLOAD_MAX_MB = float(os.getenv("DENTALOGIC_UPLOAD_MAX_MB", "20"))
+UPLOAD_MAX_BYTES = int(UPLOAD_MAX_MB * 1024 * 1024)
+# Overhead multipart (boundary, header part, field lain) per request
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# Job asynchronous (/jobs) untuk studi besar (full-mouth series, backfill)
+# - DENTALOGIC_JOBS_ENABLED: "1" = endpoint /jobs dan worker job aktif (default mati karena
+#   /jobs tidak memakai autentikasi dan menyimpan upload ke disk)
+# - DENTALOGIC_JOBS_DIR: direktori antrian persisten (SQLite + file gambar)
+# - DENTALOGIC_JOB_WORKERS: item job yang diproses bersamaan per process server
+# - DENTALOGIC_JOB_MAX_FILES: jumlah gambar maksimum per job
+# - DENTALOGIC_JOB_MAX_PENDING: item belum selesai maksimum di antrian (lebih = 503)
+# - DENTALOGIC_JOB_RETENTION: umur (detik) hasil job selesai sebelum dihapus
+# - DENTALOGIC_JOB_MAX_JOBS: jumlah job selesai maksimum yang disimpan
+# - DENTALOGIC_JOB_LEASE: detik sebelum item "running" milik worker yang mati diambil ulang
+# - DENTALOGIC_WEBHOOK_ALLOWED_HOSTS: host webhook yang diizinkan, dipisah koma (".domain" =
+#   termasuk subdomain); kosong = semua host publik (alamat privat/loopback/link-local ditolak)
+JOBS_ENABLED = os.getenv("DENTALOGIC_JOBS_ENABLED", "0") == "1"
+JOBS_DIR = Path(os.getenv("DENTALOGIC_JOBS_DIR", str(Path(tempfile.gettempdir()) / "dentalogic8-jobs")))
+JOB_WORKERS = int(os.getenv("DENTALOGIC_JOB_WORKERS", "1"))
+JOB_MAX_FILES = int(os.getenv("DENTALOGIC_JOB_MAX_FILES", "64"))
+JOB_MAX_PENDING = int(os.getenv("DENTALOGIC_JOB_MAX_PENDING", "1000"))
+JOB_RETENTION = float(os.getenv("DENTALOGIC_JOB_RETENTION", "86400"))
+JOB_MAX_JOBS = int(os.getenv("DENTALOGIC_JOB_MAX_JOBS", "1000"))
+JOB_LEASE = float(os.getenv("DENTALOGIC_JOB_LEASE", "300"))
+WEBHOOK_ALLOWED_HOSTS = [host.strip() for host in os.getenv("DENTALOGIC_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()]
+# Interval cek antrian saat kosong / executor sibuk, dan interval event progress (SSE)
+JOB_POLL_INTERVAL = 0.5
+# Detik antar sweep retensi job (job kedaluwarsa juga langsung 404 sebelum di-sweep)
+JOB_SWEEP_INTERVAL = 60
+JOB_WEBHOOK_TIMEOUT = 10
+
+# Deteksi live dari frame kamera (WebSocket /ws/live)
+# - DENTALOGIC_LIVE_MAX_FPS: frame yang di-infer per detik per koneksi (client bisa minta lebih rendah)
+# - DENTALOGIC_LIVE_MAX_CONNECTIONS: koneksi live bersamaan per process (0 = /ws/live nonaktif)
+# - DENTALOGIC_LIVE_MAX_FRAME_KB: ukuran maksimum satu frame terkompresi
+# - DENTALOGIC_LIVE_DECODE_MAX_SIZE: sisi terpanjang frame setelah decode
+LIVE_MAX_FPS = float(os.getenv("DENTALOGIC_LIVE_MAX_FPS", "5"))
+LIVE_MAX_CONNECTIONS = int(os.getenv("DENTALOGIC_LIVE_MAX_CONNECTIONS", "8"))
+LIVE_MAX_FRAME_KB = int(os.getenv("DENTALOGIC_LIVE_MAX_FRAME_KB", "512"))
+LIVE_DECODE_MAX_SIZE = int(os.getenv("DENTALOGIC_LIVE_DECODE_MAX_SIZE", str(MODEL_INPUT_SIZE)))
+
+# Konfigurasi inference executor (bisa di-override lewat environment variable)
+# - DENTALOGIC_INFERENCE_EXECUTOR: "thread" atau "process"
+# - DENTALOGIC_INFERENCE_WORKERS: jumlah worker inference
+# - DENTALOGIC_MODEL_INSTANCES: instance model per versi untuk executor "thread" tanpa
+#   micro-batching (dibatasi jumlah worker); worker bergantian memakai instance
+# - DENTALOGIC_INFERENCE_MAX_QUEUE: jumlah request yang boleh antri sebelum ditolak (503)
+# - DENTALOGIC_INFERENCE_RETRY_AFTER: nilai header Retry-After (detik) saat queue penuh
+INFERENCE_EXECUTOR = os.getenv("DENTALOGIC_INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("DENTALOGIC_INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+MODEL_INSTANCES = int(os.getenv("DENTALOGIC_MODEL_INSTANCES", "1"))
+INFERENCE_MAX_QUEUE = int(os.getenv("DENTALOGIC_INFERENCE_MAX_QUEUE", "16"))
+INFERENCE_RETRY_AFTER = int(os.getenv("DENTALOGIC_INFERENCE_RETRY_AFTER", "2"))
+
+# Konfigurasi micro-batching (hanya untuk executor "thread")
+# - DENTALOGIC_BATCH_MAX_SIZE: ukuran batch maksimum (1 = micro-batching nonaktif)
+# - DENTALOGIC_BATCH_MAX_WAIT_MS: waktu tunggu maksimum untuk mengisi batch
+BATCH_MAX_SIZE = int(os.getenv("DENTALOGIC_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("DENTALOGIC_BATCH_MAX_WAIT_MS", "10"))
+
+# Warm-up model saat startup (sebelum worker menerima request)
+# - DENTALOGIC_WARMUP_BATCHES: jumlah predict dummy 640x640 (0 = tanpa warm-up)
+# - DENTALOGIC_WARMUP_BATCH_SIZE: jumlah gambar per predict dummy
+# - DENTALOGIC_TORCH_THREADS: thread intra-op torch per worker (0 = default torch)
+WARMUP_BATCHES = int(os.getenv("DENTALOGIC_WARMUP_BATCHES", "2"))
+WARMUP_BATCH_SIZE = int(os.getenv("DENTALOGIC_WARMUP_BATCH_SIZE", "1"))
+TORCH_THREADS = int(os.getenv("DENTALOGIC_TORCH_THREADS", "0"))
+
+# DENTALOGIC_BACKGROUND_LOAD: "1" = load + warm-up model di thread background (server
+# langsung menerima request, /ready 503 sampai model siap); "0" = di dalam startup
+BACKGROUND_LOAD = os.getenv("DENTALOGIC_BACKGROUND_LOAD", "1") == "1"
+
+# Profiling on-demand pipeline prediksi (lihat profiling.py); tanpa request yang
+# di-profile tidak ada profiler yang dipasang
+# - DENTALOGIC_PROFILE_ENABLED: "1" = header X-Profile diterima di /predict dan /predict/batch
+#   (butuh X-Admin-Token, lihat DENTALOGIC_ADMIN_TOKEN)
+# - DENTALOGIC_PROFILE_SAMPLE_RATE: profile otomatis 1 dari N request prediksi ke
+#   DENTALOGIC_PROFILE_DIR (0 = sampling nonaktif)
+# - DENTALOGIC_PROFILE_ENGINE: "cprofile" (stdlib) atau "pyinstrument" (pip install pyinstrument)
+# - DENTALOGIC_PROFILE_DIR: direktori output profile
+# - DENTALOGIC_PROFILE_MAX_FILES / DENTALOGIC_PROFILE_MAX_MB: batas isi direktori (file terlama dihapus)
+PROFILE_ENABLED = os.getenv("DENTALOGIC_PROFILE_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = int(os.getenv("DENTALOGIC_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_ENGINE = os.getenv("DENTALOGIC_PROFILE_ENGINE", "cprofile")
+PROFILE_DIR = Path(os.getenv("DENTALOGIC_PROFILE_DIR", str(Path(tempfile.gettempdir()) / "dentalogic8-profiles")))
+PROFILE_MAX_FILES = int(os.getenv("DENTALOGIC_PROFILE_MAX_FILES", "200"))
+PROFILE_MAX_MB = int(os.getenv("DENTALOGIC_PROFILE_MAX_MB", "256"))
+
+
+def variant_path(model_path: Path, precision: str) -> Path:
+    """Path varian presisi model (best.onnx -> best.int8.onnx); fp32 = model aslinya"""
+    if precision == "fp32":
+        return model_path
+    return model_path.with_name(f"{model_path.stem}.{precision}{model_path.suffix}")
@@ -0,0 +1,332 @@
+"""
+Inference executor: menjalankan pipeline prediksi di luar asyncio event loop
+
+- Pool thread atau process yang "memiliki" model (di-load lewat initializer)
+- Admission queue terbatas: request ditolak (QueueFullError) saat pool penuh
+- Metrics queue-wait dan run-time per request
+- MicroBatcher: gabungkan request yang datang bersamaan menjadi satu forward pass
+"""
+import asyncio
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics import Histogram, StageMetrics
+
+EXECUTOR_MODES = ("thread", "process")
+
+
+class QueueFullError(RuntimeError):
+    """Dilempar saat admission queue inference sudah penuh"""
+
+    def __init__(self, pending: int, capacity: int):
+        super().__init__(f"Inference queue full ({pending}/{capacity})")
+        self.pending = pending
+        self.capacity = capacity
+
+
+def _timed_call(fn: Callable, submitted_at: float, *args) -> Tuple[object, float, float, float]:
+    """
+    Wrapper yang dijalankan di worker untuk mengukur waktu tunggu dan eksekusi
+
+    Menggunakan time.time() supaya timestamp bisa dibandingkan lintas process.
+    """
+    started_at = time.time()
+    result = fn(*args)
+    finished_at = time.time()
+    return result, submitted_at, started_at, finished_at
+
+
+def _noop():
+    return None
+
+
+def _wait_barrier(barrier: threading.Barrier, timeout: float):
+    barrier.wait(timeout)
+
+
+class InferenceExecutor:
+    """
+    Pool inference dengan admission control
+
+    Args:
+        mode: "thread" atau "process"
+        workers: Jumlah worker di pool
+        max_queue: Jumlah request yang boleh menunggu di luar worker yang sedang jalan
+        initializer: Fungsi yang dipanggil sekali per worker (misal untuk load model)
+        metrics: StageMetrics untuk mencatat queue_wait dan run
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        workers: int = 1,
+        max_queue: int = 16,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+        metrics: Optional[StageMetrics] = None,
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {EXECUTOR_MODES}")
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must be >= 0")
+
+        self.mode = mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self.capacity = workers + max_queue
+        self.metrics = metrics or StageMetrics()
+
+        self._initializer = initializer
+        self._initargs = initargs
+        self._pool: Optional[Executor] = None
+        self._pending = 0
+        self._rejected = 0
+        self._completed = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Buat pool worker (idempotent)"""
+        if self._pool is not None:
+            return
+        if self.mode == "process":
+            # spawn: jangan fork process yang sudah punya event loop dan thread
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self._initializer,
+                initargs=self._initargs,
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="inference",
+                initializer=self._initializer,
+                initargs=self._initargs,
+            )
+
+    def prestart(self, timeout: float = 300):
+        """
+        Paksa semua worker dibuat sekarang (initializer, misal load + warm-up model,
+        berjalan saat startup, bukan di request pertama)
+        """
+        self.start()
+        if self.mode == "process":
+            # Pool "spawn" membuat semua process saat submit pertama
+            futures = [self._pool.submit(_noop) for _ in range(self.workers)]
+        else:
+            # ThreadPoolExecutor membuat thread on demand: tahan setiap task di barrier
+            # supaya tidak ada thread yang dipakai ulang sebelum semua thread dibuat
+            barrier = threading.Barrier(self.workers)
+            futures = [self._pool.submit(_wait_barrier, barrier, timeout) for _ in range(self.workers)]
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def shutdown(self, wait: bool = True):
+        """Matikan pool worker"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """
+        Submit pekerjaan ke pool
+
+        Raises:
+            QueueFullError: Jika jumlah request yang berjalan + menunggu sudah mencapai kapasitas
+        """
+        if self._pool is None:
+            self.start()
+
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise QueueFullError(self._pending, self.capacity)
+            self._pending += 1
+
+        try:
+            future = self._pool.submit(_timed_call, fn, time.time(), *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args):
+        """
+        Jalankan fn(*args) di pool dan tunggu hasilnya tanpa memblokir event loop
+
+        Waktu tunggu di queue dan waktu eksekusi dicatat ke metrics
+        sebagai stage "queue_wait" dan "run".
+        """
+        future = self.submit(fn, *args)
+        result, submitted_at, started_at, finished_at = await asyncio.wrap_future(future)
+        self.metrics.observe("queue_wait", max(0.0, started_at - submitted_at) * 1000)
+        self.metrics.observe("run", (finished_at - started_at) * 1000)
+        return result
+
+    def stats(self) -> Dict:
+        """Status pool untuk endpoint /health"""
+        with self._lock:
+            pending = self._pending
+            rejected = self._rejected
+            completed = self._completed
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": pending,
+            "completed": completed,
+            "rejected": rejected,
+        }
+
+
+# Bucket histogram ukuran batch
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching untuk inference
+
+    Request dikumpulkan sampai max_batch_size tercapai atau max_wait_ms habis
+    (dihitung sejak request pertama di batch), lalu dijalankan sebagai satu
+    panggilan run_batch. Hasil per item dikembalikan ke masing-masing pemanggil.
+
+    Args:
+        run_batch: Fungsi yang menerima list item dan mengembalikan list hasil
+            dengan panjang dan urutan yang sama
+        max_batch_size: Ukuran batch maksimum
+        max_wait_ms: Waktu tunggu maksimum untuk mengisi batch
+        metrics: StageMetrics untuk mencatat batch_wait dan batch_run
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        metrics: Optional[StageMetrics] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.metrics = metrics or StageMetrics()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+
+        self._queue: "queue.Queue[Tuple[Any, Future, float]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._batches = 0
+
+    def start(self):
+        """Start thread batcher (idempotent)"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Hentikan thread batcher, item yang masih antri dibatalkan"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        while True:
+            try:
+                _, future, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.cancel()
+
+    def submit_async(self, item: Any) -> Future:
+        """Masukkan item ke batch berikutnya, kembalikan Future hasilnya"""
+        if self._thread is None:
+            self.start()
+        future: Future = Future()
+        self._queue.put((item, future, time.time()))
+        return future
+
+    def submit(self, item: Any) -> Any:
+        """Masukkan item ke batch berikutnya dan tunggu hasilnya (blocking)"""
+        return self.submit_async(item).result()
+
+    def _collect(self) -> List[Tuple[Any, Future, float]]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    # Waktu habis: tetap ambil item yang sudah menunggu
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while self._running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            # Lewati item yang sudah dibatalkan pemanggilnya
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started_at = time.time()
+            for _, _, submitted_at in batch:
+                self.metrics.observe("batch_wait", (started_at - submitted_at) * 1000)
+            self.batch_sizes.observe(len(batch))
+            self._batches += 1
+
+            try:
+                results = self.run_batch([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"run_batch returned {len(results)} results for {len(batch)} items"
+                    )
+            except BaseException as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                self.metrics.observe("batch_run", (time.time() - started_at) * 1000)
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Status batcher untuk endpoint /health"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self._batches,
+            "queued": self._queue.qsize(),
+            "batch_size": self.batch_sizes.snapshot(),
+        }
@@ -0,0 +1,520 @@
+"""
+Job store untuk prediksi asynchronous (/jobs)
+
+Job = sekumpulan gambar (misal full-mouth series) yang diproses di background.
+State job disimpan di SQLite dan file gambar di direktori lokal, sehingga:
+- antrian tetap ada setelah server restart
+- semua worker uvicorn (launcher multi-worker) berbagi antrian yang sama;
+  claim item atomik lewat transaksi SQLite
+- item yang di-claim worker yang mati diambil ulang setelah lease habis
+
+Layout direktori:
+    <directory>/jobs.db
+    <directory>/<job_id>/<index>.img   upload asli (dihapus setelah item selesai)
+    <directory>/<job_id>/<index>.jpg   JPEG annotasi hasil (jika render != none)
+"""
+import ipaddress
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+ITEM_STATUSES = ("queued", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    render TEXT NOT NULL,
+    webhook_url TEXT,
+    webhook_status TEXT,
+    total INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS items (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    filename TEXT,
+    view TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    result TEXT,
+    error TEXT,
+    has_image INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (status, claimed_at);
+"""
+
+
+class WebhookRejected(ValueError):
+    """URL webhook tidak boleh dipakai (skema, host di luar allowlist, atau alamat internal)"""
+
+
+def host_allowed(host: str, allowed_hosts: Sequence[str]) -> bool:
+    """Host ada di allowlist; entry ".example.com" juga mengizinkan subdomain"""
+    host = host.lower().rstrip(".")
+    for entry in allowed_hosts:
+        entry = entry.lower().rstrip(".")
+        if host == entry.lstrip(".") or (entry.startswith(".") and host.endswith(entry)):
+            return True
+    return False
+
+
+def check_webhook_url(url: str, allowed_hosts: Sequence[str] = ()) -> str:
+    """
+    Validasi URL webhook sebelum server mengirim request ke sana (cegah SSRF)
+
+    Dengan allowed_hosts hanya host di allowlist yang diterima. Tanpa allowlist,
+    host harus resolve ke alamat publik saja: loopback, jaringan privat,
+    link-local (termasuk metadata cloud 169.254.169.254) dan alamat reserved ditolak.
+    Dipanggil saat job dibuat dan lagi sebelum webhook dikirim.
+
+    Returns:
+        url
+
+    Raises:
+        WebhookRejected: Jika URL tidak boleh dipakai
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        raise WebhookRejected("webhook_url tidak valid")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise WebhookRejected("webhook_url harus URL http atau https")
+    if allowed_hosts:
+        if not host_allowed(parts.hostname, allowed_hosts):
+            raise WebhookRejected(f"Host webhook {parts.hostname} tidak ada di DENTALOGIC_WEBHOOK_ALLOWED_HOSTS")
+        return url
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise WebhookRejected(f"Host webhook {parts.hostname} tidak bisa di-resolve")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%", 1)[0]).is_global:
+            raise WebhookRejected(f"Host webhook {parts.hostname} mengarah ke alamat internal ({address})")
+    return url
+
+
+class JobItem(NamedTuple):
+    """Item yang di-claim worker untuk diproses"""
+    job_id: str
+    index: int
+    render: str
+    image_path: Path
+    claimed_at: float  # token claim: hanya pemegang claim terakhir yang boleh menyimpan hasil
+
+
+class JobStore:
+    """
+    Antrian job persisten (SQLite + file)
+
+    Args:
+        directory: Direktori data job
+        retention_seconds: Job selesai tidak bisa dibaca lagi setelah umur ini dan dihapus
+            oleh sweep() berikutnya (0 = tidak dihapus)
+        max_jobs: Jumlah job selesai maksimum yang disimpan, terlama dihapus dulu (0 = tanpa batas)
+        lease_seconds: Item "running" yang lebih lama dari ini dianggap ditinggal worker
+            dan boleh di-claim ulang
+        max_attempts: Item gagal permanen setelah di-claim sebanyak ini
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        retention_seconds: float = 86400,
+        max_jobs: int = 1000,
+        lease_seconds: float = 300,
+        max_attempts: int = 3,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.directory / "jobs.db"
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max_jobs
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Satu koneksi per operasi: aman dipakai dari banyak thread dan process
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE: lock tulis diambil di awal, claim antar process tidak bentrok
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _job_dir(self, job_id: str) -> Path:
+        # ID job berasal dari URL: hanya hex uuid supaya tidak bisa keluar dari directory
+        if len(job_id) != 32 or not all(c in "0123456789abcdef" for c in job_id):
+            raise ValueError(f"Invalid job id '{job_id}'")
+        return self.directory / job_id
+
+    def _image_path(self, job_id: str, index: int, suffix: str = ".img") -> Path:
+        return self._job_dir(job_id) / f"{index}{suffix}"
+
+    @staticmethod
+    def _write_file(path: Path, data: bytes):
+        # Tulis ke file sementara lalu rename supaya pembaca tidak melihat file setengah jadi
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def reserve(self) -> str:
+        """
+        Buat ID dan direktori job baru untuk diisi write_image() lalu submit()
+
+        Direktori yang tidak pernah di-submit (upload gagal, server mati) dihapus
+        oleh discard() atau sweep() berikutnya.
+        """
+        job_id = uuid.uuid4().hex
+        self._job_dir(job_id).mkdir()
+        return job_id
+
+    def write_image(self, job_id: str, index: int, image_data: bytes):
+        """Simpan upload asli satu item job yang sedang di-reserve"""
+        self._write_file(self._image_path(job_id, index), image_data)
+
+    def submit(self, job_id: str, names: List[Tuple[str, str]], render: str, webhook_url: Optional[str] = None):
+        """
+        Masukkan job yang gambarnya sudah ditulis ke antrian dengan status "queued"
+
+        Args:
+            names: List (filename, view) per item, urut index write_image()
+            render: Mode render annotasi untuk semua item
+            webhook_url: URL yang di-POST ringkasan job saat selesai (opsional)
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, render, webhook_url, total, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, render, webhook_url, len(names), now, now),
+            )
+            conn.executemany(
+                "INSERT INTO items (job_id, idx, filename, view, status) VALUES (?, ?, ?, ?, 'queued')",
+                [(job_id, index, filename, view) for index, (filename, view) in enumerate(names)],
+            )
+
+    def discard(self, job_id: str):
+        """Hapus job yang di-reserve tetapi tidak jadi di-submit"""
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def create(self, images: List[Tuple[str, str, bytes]], render: str, webhook_url: Optional[str] = None) -> str:
+        """
+        Simpan job baru dengan status "queued" (reserve + write_image + submit)
+
+        Args:
+            images: List (filename, view, bytes gambar)
+            render: Mode render annotasi untuk semua item
+            webhook_url: URL yang di-POST ringkasan job saat selesai (opsional)
+
+        Returns:
+            ID job
+        """
+        job_id = self.reserve()
+        try:
+            for index, (_, _, image_data) in enumerate(images):
+                self.write_image(job_id, index, image_data)
+            self.submit(job_id, [(filename, view) for filename, view, _ in images], render, webhook_url)
+        except Exception:
+            self.discard(job_id)
+            raise
+        return job_id
+
+    def claim(self) -> Optional[JobItem]:
+        """
+        Ambil item berikutnya (job terlama dulu) dan tandai "running"
+
+        Item "running" dengan lease habis (worker mati/restart) ikut diambil ulang;
+        item yang sudah di-claim max_attempts kali ditandai gagal.
+
+        Returns:
+            JobItem, atau None jika antrian kosong
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT items.job_id, items.idx, items.attempts, jobs.render FROM items "
+                    "JOIN jobs ON jobs.id = items.job_id "
+                    "WHERE items.status = 'queued' OR (items.status = 'running' AND items.claimed_at < ?) "
+                    "ORDER BY jobs.created_at, items.idx LIMIT 1",
+                    (now - self.lease_seconds,),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["attempts"] >= self.max_attempts:
+                    self._finish_item(conn, row["job_id"], row["idx"], "failed", None, "Gagal diproses setelah beberapa percobaan")
+                    continue
+                conn.execute(
+                    "UPDATE items SET status = 'running', attempts = attempts + 1, claimed_at = ? "
+                    "WHERE job_id = ? AND idx = ?",
+                    (now, row["job_id"], row["idx"]),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+                    (now, row["job_id"]),
+                )
+                return JobItem(
+                    row["job_id"], row["idx"], row["render"], self._image_path(row["job_id"], row["idx"]), now
+                )
+
+    def release(self, item: JobItem):
+        """Kembalikan item ke antrian tanpa menghitung percobaan (misal executor penuh)"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE items SET status = 'queued', attempts = MAX(attempts - 1, 0), claimed_at = NULL "
+                "WHERE job_id = ? AND idx = ? AND status = 'running' AND claimed_at = ?",
+                (item.job_id, item.index, item.claimed_at),
+            )
+
+    def _finish_item(
+        self, conn: sqlite3.Connection, job_id: str, index: int, status: str,
+        result: Optional[Dict], error: Optional[str], has_image: bool = False,
+        claimed_at: Optional[float] = None,
+    ) -> Optional[bool]:
+        """
+        Update item dan status job di dalam transaksi
+
+        Args:
+            claimed_at: Token claim pemanggil; item hanya di-update jika masih
+                "running" dengan claim ini (None = tanpa cek, dipakai claim())
+
+        Returns:
+            True jika job baru saja selesai, None jika claim sudah diambil ulang worker lain
+        """
+        now = time.time()
+        query = "UPDATE items SET status = ?, result = ?, error = ?, has_image = ? WHERE job_id = ? AND idx = ?"
+        params = [status, json.dumps(result) if result is not None else None, error, int(has_image), job_id, index]
+        if claimed_at is not None:
+            query += " AND status = 'running' AND claimed_at = ?"
+            params.append(claimed_at)
+        if conn.execute(query, params).rowcount == 0:
+            return None
+        remaining, done = conn.execute(
+            "SELECT SUM(status IN ('queued', 'running')), SUM(status = 'done') FROM items WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if remaining:
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (now, job_id))
+            return False
+        # Job dianggap gagal hanya jika tidak ada satu pun item yang berhasil
+        job_status = "completed" if done else "failed"
+        cursor = conn.execute(
+            "UPDATE jobs SET status = ?, updated_at = ?, finished_at = ? WHERE id = ? AND finished_at IS NULL",
+            (job_status, now, now, job_id),
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, item: JobItem, result: Dict, image_bytes: Optional[bytes] = None) -> bool:
+        """
+        Simpan hasil item (dan JPEG annotasi), hapus upload aslinya
+
+        Hasil dibuang jika lease item sudah habis dan item di-claim ulang worker
+        lain (hasil dan jumlah percobaan milik claim itu tidak ditimpa).
+
+        Returns:
+            True jika ini item terakhir job (job baru saja selesai)
+        """
+        if image_bytes is not None:
+            if not self._holds_claim(item):
+                return False
+            try:
+                self._write_file(self._image_path(item.job_id, item.index, ".jpg"), image_bytes)
+            except FileNotFoundError:
+                # Job dihapus (DELETE /jobs/{id}) saat item diproses
+                return False
+        with self._transaction() as conn:
+            finished = self._finish_item(
+                conn, item.job_id, item.index, "done", result, None, image_bytes is not None, item.claimed_at
+            )
+        if finished is None:
+            return False
+        item.image_path.unlink(missing_ok=True)
+        return finished
+
+    def fail(self, item: JobItem, error: str) -> bool:
+        """Tandai item gagal (kecuali claim sudah diambil ulang worker lain); True jika job baru saja selesai"""
+        with self._transaction() as conn:
+            finished = self._finish_item(conn, item.job_id, item.index, "failed", None, error, claimed_at=item.claimed_at)
+        if finished is None:
+            return False
+        item.image_path.unlink(missing_ok=True)
+        return finished
+
+    def _holds_claim(self, item: JobItem) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM items WHERE job_id = ? AND idx = ? AND status = 'running' AND claimed_at = ?",
+                (item.job_id, item.index, item.claimed_at),
+            ).fetchone()
+        return row is not None
+
+    def _expired(self, finished_at: Optional[float]) -> bool:
+        # Job yang melewati retensi dianggap tidak ada walaupun sweep() belum berjalan
+        return bool(finished_at and self.retention_seconds and finished_at + self.retention_seconds < time.time())
+
+    def _exists(self, conn: sqlite3.Connection, job_id: str) -> bool:
+        row = conn.execute("SELECT finished_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is not None and not self._expired(row[0])
+
+    def webhook_url(self, job_id: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT webhook_url, finished_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row and not self._expired(row[1]) else None
+
+    def set_webhook_status(self, job_id: str, status: str):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET webhook_status = ? WHERE id = ?", (status, job_id))
+
+    def get(self, job_id: str, include_results: bool = True) -> Optional[Dict]:
+        """
+        Status job beserta progress dan (opsional) hasil per item
+
+        Returns:
+            Dict job, atau None jika job tidak ada / sudah dihapus retensi
+        """
+        with self._connect() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None or self._expired(job["finished_at"]):
+                return None
+            rows = conn.execute("SELECT * FROM items WHERE job_id = ? ORDER BY idx", (job_id,)).fetchall()
+
+        counts = {status: 0 for status in ITEM_STATUSES}
+        items = []
+        for row in rows:
+            counts[row["status"]] += 1
+            item = {
+                "index": row["idx"],
+                "filename": row["filename"],
+                "view": row["view"],
+                "status": row["status"],
+            }
+            if row["error"]:
+                item["error"] = row["error"]
+            if include_results and row["result"] is not None:
+                item["result"] = json.loads(row["result"])
+            if row["has_image"]:
+                item["hasImage"] = True
+            items.append(item)
+
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "render": job["render"],
+            "total": job["total"],
+            "completed": counts["done"],
+            "failed": counts["failed"],
+            "pending": counts["queued"] + counts["running"],
+            "createdAt": job["created_at"],
+            "updatedAt": job["updated_at"],
+            "finishedAt": job["finished_at"],
+            "expiresAt": job["finished_at"] + self.retention_seconds
+            if job["finished_at"] and self.retention_seconds else None,
+            "webhookStatus": job["webhook_status"],
+            "items": items,
+        }
+
+    def get_image(self, job_id: str, index: int) -> Optional[bytes]:
+        """JPEG annotasi item (None jika tidak ada atau job sudah melewati retensi)"""
+        try:
+            path = self._image_path(job_id, index, ".jpg")
+            with self._connect() as conn:
+                if not self._exists(conn, job_id):
+                    return None
+            return path.read_bytes()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def delete(self, job_id: str) -> bool:
+        """Hapus job beserta file-nya; False jika job tidak ada"""
+        job_dir = self._job_dir(job_id)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM items WHERE job_id = ?", (job_id,))
+            deleted = conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount > 0
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return deleted
+
+    def pending_items(self) -> int:
+        """Jumlah item yang belum selesai (queued + running) di semua job"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM items WHERE status IN ('queued', 'running')").fetchone()[0]
+
+    def sweep(self) -> int:
+        """
+        Hapus job selesai yang melewati retensi, lalu job selesai terlama jika melebihi max_jobs,
+        dan direktori job yang di-reserve tetapi tidak di-submit dalam lease_seconds
+
+        Returns:
+            Jumlah job yang dihapus
+        """
+        expired = []
+        with self._connect() as conn:
+            if self.retention_seconds:
+                expired += [row[0] for row in conn.execute(
+                    "SELECT id FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                    (time.time() - self.retention_seconds,),
+                )]
+            if self.max_jobs:
+                expired += [row[0] for row in conn.execute(
+                    "SELECT id FROM jobs WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT -1 OFFSET ?",
+                    (self.max_jobs,),
+                )]
+            known = {row[0] for row in conn.execute("SELECT id FROM jobs")}
+        for job_id in set(expired):
+            self.delete(job_id)
+
+        # Direktori reserve() yang tidak pernah di-submit
+        cutoff = time.time() - self.lease_seconds
+        for path in self.directory.iterdir():
+            if path.is_dir() and path.name not in known and path.stat().st_mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        return len(set(expired))
+
+    def stats(self) -> Dict:
+        """Status antrian untuk endpoint /health"""
+        with self._connect() as conn:
+            jobs = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            items = dict(conn.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+        return {
+            "directory": str(self.directory),
+            "jobs": {status: jobs.get(status, 0) for status in JOB_STATUSES},
+            "items": {status: items.get(status, 0) for status in ITEM_STATUSES},
+            "retention_seconds": self.retention_seconds,
+            "max_jobs": self.max_jobs,
+        }
@@ -0,0 +1,210 @@
+"""
+Endpoint job asynchronous (/jobs), lihat jobs.py
+
+Worker yang memproses item job ada di server.py (butuh inference executor).
+"""
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import APIRouter, File, Form, Header, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from api import get_view_name, require_admin, resolve_render, validate_option
+from config import (
+    COORDINATE_DEFAULT, COORDINATE_MODES, INFERENCE_RETRY_AFTER, JOB_MAX_FILES, JOB_MAX_PENDING,
+    JOB_POLL_INTERVAL, WEBHOOK_ALLOWED_HOSTS,
+)
+from jobs import JobStore, WebhookRejected, check_webhook_url
+from metrics import Counter
+
+
+def create_router(
+    get_store: Callable[[], JobStore],
+    read_image: Callable[[UploadFile], Awaitable[bytes]],
+    finalize_result: Callable[[Dict, str, str], Dict],
+    errors: Counter,
+) -> APIRouter:
+    """
+    Router submit, status dan hasil job
+
+    Args:
+        get_store: Antrian job (raise HTTPException 503 jika /jobs nonaktif)
+        read_image: Baca dan validasi satu upload gambar (HTTPException 400/413)
+        finalize_result: Terapkan coords dan delivery ke hasil kanonik satu item
+        errors: Counter error per tipe (/metrics)
+    """
+    router = APIRouter()
+
+    async def load_job(job_id: str, include_results: bool = True) -> Dict:
+        """Ambil job dari store (404 jika tidak ada atau sudah melewati retensi)"""
+        try:
+            job = await asyncio.to_thread(get_store().get, job_id, include_results)
+        except ValueError:
+            job = None
+        if job is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Job tidak ditemukan atau sudah kedaluwarsa"
+            )
+        return job
+
+    def finalize_job(job: Dict, coords: str) -> Dict:
+        """Terapkan coords ke hasil item dan tambahkan URL gambar annotasi (in-place)"""
+        for item in job["items"]:
+            result = item.get("result")
+            if result is not None:
+                finalize_result(result, coords, "link")
+            if item.pop("hasImage", False):
+                item["annotatedImageUrl"] = f"/jobs/{job['id']}/items/{item['index']}/image"
+        return job
+
+    @router.post("/jobs", status_code=202)
+    async def create_job(
+        files: List[UploadFile] = File(...),
+        render: Optional[str] = None,
+        webhook_url: Optional[str] = Form(None),
+        x_render: Optional[str] = Header(None)
+    ):
+        """
+        Submit prediksi asynchronous untuk banyak gambar (misal full-mouth series)
+
+        Gambar disimpan ke antrian persisten dan diproses worker job di background;
+        response langsung berisi ID job. Progress lewat GET /jobs/{id} (polling)
+        atau GET /jobs/{id}/events (Server-Sent Events).
+
+        Args:
+            files: Gambar (field "files", multipart), maksimal DENTALOGIC_JOB_MAX_FILES
+            render: "none", "thumb" atau "full" (bisa juga lewat header X-Render)
+            webhook_url: URL http(s) yang di-POST ringkasan job saat selesai (form field, opsional);
+                host harus publik atau ada di DENTALOGIC_WEBHOOK_ALLOWED_HOSTS
+
+        Returns:
+            202 dengan {"id", "status", "total", "statusUrl", "eventsUrl"}
+        """
+        store = get_store()
+        render_mode = resolve_render(render, x_render)
+        if len(files) == 0:
+            raise HTTPException(status_code=400, detail="Minimal satu gambar harus di-upload")
+        if len(files) > JOB_MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maksimal {JOB_MAX_FILES} gambar per job"
+            )
+        if webhook_url:
+            try:
+                await asyncio.to_thread(check_webhook_url, webhook_url, WEBHOOK_ALLOWED_HOSTS)
+            except WebhookRejected as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        pending = await asyncio.to_thread(store.pending_items)
+        if pending + len(files) > JOB_MAX_PENDING:
+            errors.inc(type="JobQueueFull")
+            raise HTTPException(
+                status_code=503,
+                detail="Antrian job penuh, silakan coba lagi nanti",
+                headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+            )
+
+        # Tulis tiap file langsung ke store agar hanya satu upload yang ada di memori
+        job_id = await asyncio.to_thread(store.reserve)
+        names = []
+        try:
+            for index, file in enumerate(files):
+                image_data = await read_image(file)
+                await asyncio.to_thread(store.write_image, job_id, index, image_data)
+                del image_data
+                names.append((file.filename, get_view_name(file.filename, index)))
+            await asyncio.to_thread(store.submit, job_id, names, render_mode, webhook_url)
+        except BaseException:
+            await asyncio.to_thread(store.discard, job_id)
+            raise
+        return JSONResponse(
+            status_code=202,
+            content={
+                "id": job_id,
+                "status": "queued",
+                "total": len(names),
+                "statusUrl": f"/jobs/{job_id}",
+                "eventsUrl": f"/jobs/{job_id}/events",
+            },
+            headers={"Location": f"/jobs/{job_id}"}
+        )
+
+    @router.get("/jobs/{job_id}")
+    async def get_job(job_id: str, coords: str = COORDINATE_DEFAULT, results: bool = True):
+        """
+        Status dan progress job, beserta hasil per item yang sudah selesai
+
+        Args:
+            coords: Sistem koordinat bbox hasil: "original" (default) atau "image"
+            results: false = hanya status/progress tanpa hasil prediksi
+        """
+        validate_option("coords", coords, COORDINATE_MODES)
+        job = await load_job(job_id, results)
+        return JSONResponse(content=finalize_job(job, coords))
+
+    @router.get("/jobs/{job_id}/events")
+    async def job_events(job_id: str, coords: str = COORDINATE_DEFAULT):
+        """
+        Stream progress job (Server-Sent Events)
+
+        Event "progress" (status tanpa hasil) dikirim setiap kali job berubah;
+        event "done" berisi job lengkap dengan hasil, lalu stream ditutup.
+        """
+        validate_option("coords", coords, COORDINATE_MODES)
+        await load_job(job_id, False)
+        store = get_store()
+
+        async def stream():
+            last_update = None
+            while True:
+                job = await asyncio.to_thread(store.get, job_id, False)
+                if job is None:
+                    yield f"event: error\ndata: {json.dumps({'detail': 'Job tidak ditemukan atau sudah kedaluwarsa'})}\n\n"
+                    return
+                if job["finishedAt"] is not None:
+                    job = finalize_job(await asyncio.to_thread(store.get, job_id, True), coords)
+                    yield f"event: done\ndata: {json.dumps(job)}\n\n"
+                    return
+                if job["updatedAt"] != last_update:
+                    last_update = job["updatedAt"]
+                    yield f"event: progress\ndata: {json.dumps(finalize_job(job, coords))}\n\n"
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @router.get("/jobs/{job_id}/items/{index}/image")
+    async def get_job_image(job_id: str, index: int):
+        """JPEG annotasi satu item job (render thumb/full)"""
+        try:
+            jpeg_bytes = await asyncio.to_thread(get_store().get_image, job_id, index)
+        except ValueError:
+            jpeg_bytes = None
+        if jpeg_bytes is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Gambar tidak ditemukan atau sudah kedaluwarsa"
+            )
+        return Response(content=jpeg_bytes, media_type="image/jpeg")
+
+    @router.delete("/jobs/{job_id}")
+    async def delete_job(job_id: str, x_admin_token: Optional[str] = Header(None)):
+        """Batalkan job yang belum selesai atau hapus hasil job sebelum retensi habis (butuh X-Admin-Token)"""
+        require_admin(x_admin_token)
+        try:
+            deleted = await asyncio.to_thread(get_store().delete, job_id)
+        except ValueError:
+            deleted = False
+        if not deleted:
+            raise HTTPException(
+                status_code=404,
+                detail="Job tidak ditemukan atau sudah kedaluwarsa"
+            )
+        return {"id": job_id, "deleted": True}
+
+    return router
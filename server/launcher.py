@@ -0,0 +1,160 @@
+"""
+Launcher production: beberapa worker uvicorn dengan model yang di-load sebelum fork
+
+Process induk:
+1. Load model (backend ultralytics) dan fuse layer, lalu gc.freeze() supaya
+   halaman memori bobot model tetap dibagi copy-on-write oleh semua worker
+2. Bind socket sekali, lalu fork N worker yang semuanya accept dari socket itu
+3. Restart worker yang mati, teruskan SIGTERM/SIGINT ke semua worker
+
+Setiap worker menjalankan startup server (set thread, warm-up model) sebelum
+menerima koneksi, jadi tidak ada request yang menanggung cold start. Jumlah
+worker, thread per worker dan batch diambil dari config autotune
+(tuned.json, lihat python benchmark.py autotune) jika ada.
+
+Usage:
+    python launcher.py [--workers 4] [--host 0.0.0.0] [--port 8000]
+
+Hanya untuk Linux/macOS (butuh os.fork).
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+from tuning import apply_tuned_config, thread_env
+
+# Config autotune sebelum default dibaca (environment yang sudah diset tetap diutamakan)
+apply_tuned_config()
+
+DEFAULT_WORKERS = int(os.getenv("DENTALOGIC_WORKERS", "2"))
+
+# Jeda sebelum worker yang mati di-restart (hindari restart loop yang cepat)
+RESTART_DELAY = 1.0
+
+
+def default_threads_per_worker(workers: int) -> int:
+    """Bagi core CPU rata ke semua worker supaya thread tidak oversubscribe"""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Socket listening yang diwariskan ke semua worker"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, log_level: str):
+    """Jalankan satu worker uvicorn di process hasil fork (tidak return)"""
+    import uvicorn
+    import server
+
+    # Reset handler sinyal milik induk; uvicorn memasang handler-nya sendiri
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    config = uvicorn.Config(server.app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+    os._exit(0)
+
+
+def spawn_worker(sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(sock, log_level)
+        except BaseException as e:
+            print(f"Worker {os.getpid()} crashed: {e}")
+        finally:
+            os._exit(1)
+    return pid
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Launcher multi-worker server Dentalogic8")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Jumlah worker (default DENTALOGIC_WORKERS atau 2)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    tuned = apply_tuned_config()
+    if tuned is not None and "DENTALOGIC_WORKERS" in tuned["env"] and args.workers != DEFAULT_WORKERS:
+        print(f"Warning: --workers {args.workers} differs from tuned config ({DEFAULT_WORKERS} workers); thread counts were tuned for {DEFAULT_WORKERS}")
+
+    # Thread per worker (torch, onnxruntime, BLAS/OpenMP): env yang sudah diset
+    # user atau config autotune tetap dipakai
+    threads = default_threads_per_worker(args.workers)
+    for key, value in thread_env(threads).items():
+        os.environ.setdefault(key, value)
+    # Satu worker inference per process: paralelisme sudah dari jumlah process
+    # dan thread intra-op, lebih dari itu membuat thread saling berebut core
+    os.environ.setdefault("DENTALOGIC_INFERENCE_WORKERS", "1")
+    # Worker baru menerima koneksi dari socket bersama setelah model siap
+    os.environ.setdefault("DENTALOGIC_BACKGROUND_LOAD", "0")
+
+    import server
+
+    start_time = time.time()
+    try:
+        if server.prepare_model_for_fork():
+            print(f"Model preloaded in {(time.time() - start_time) * 1000:.0f} ms, shared by {args.workers} workers")
+        else:
+            print(f"Backend {server.MODEL_BACKEND}: model di-load di setiap worker")
+    except Exception as e:
+        print(f"Warning: Failed to preload model: {e}")
+
+    sock = bind_socket(args.host, args.port)
+    print(f"Listening on {args.host}:{args.port} with {args.workers} workers ({os.environ['DENTALOGIC_TORCH_THREADS']} threads each)")
+
+    # Objek yang sudah ada (termasuk model) dipindah ke generasi permanen GC,
+    # supaya GC di worker tidak menulis ke halamannya dan memicu copy-on-write
+    gc.collect()
+    gc.freeze()
+
+    workers: Dict[int, int] = {}  # pid -> slot
+    for slot in range(args.workers):
+        workers[spawn_worker(sock, args.log_level)] = slot
+
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = workers.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        print(f"Worker {pid} exited (status {status}), restarting")
+        time.sleep(RESTART_DELAY)
+        workers[spawn_worker(sock, args.log_level)] = slot
+
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Helper streaming frame kamera live (WebSocket /ws/live)
+
+- LatestFrameSlot: menyimpan hanya frame terbaru; frame yang belum sempat
+  diproses ditimpa frame baru (frame basi dibuang saat inference tertinggal)
+- FrameRateLimiter: batas jumlah frame yang di-infer per detik per koneksi
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+
+class LatestFrameSlot:
+    """
+    Slot satu frame antara task penerima (WebSocket) dan loop inference
+
+    Dipakai dari satu event loop (tidak thread-safe).
+    """
+
+    def __init__(self):
+        self._frame: Optional[bytes] = None
+        self._seq = 0
+        self._closed = False
+        self._event = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame: bytes):
+        """Simpan frame baru; frame lama yang belum diambil dihitung sebagai dropped"""
+        self.received += 1
+        self._seq += 1
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._event.set()
+
+    def drop(self):
+        """Catat frame yang diambil tetapi tidak jadi diproses (misal executor penuh)"""
+        self.dropped += 1
+
+    def close(self):
+        """Tandai koneksi selesai: take() mengembalikan None setelah slot kosong"""
+        self._closed = True
+        self._event.set()
+
+    async def take(self) -> Optional[Tuple[int, bytes]]:
+        """
+        Tunggu dan ambil frame terbaru
+
+        Returns:
+            Tuple (nomor urut frame, bytes frame), atau None jika slot ditutup
+        """
+        while self._frame is None:
+            if self._closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        frame, self._frame = self._frame, None
+        return self._seq, frame
+
+    def stats(self) -> Dict:
+        return {"received": self.received, "dropped": self.dropped}
+
+
+class FrameRateLimiter:
+    """
+    Batas frame per detik: frame berikutnya boleh diproses paling cepat
+    1 / max_fps detik setelah frame sebelumnya mulai diproses
+
+    Args:
+        max_fps: Frame per detik maksimum (0 = tanpa batas)
+    """
+
+    def __init__(self, max_fps: float):
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self._next_at = 0.0
+
+    def wait_time(self) -> float:
+        """Detik yang harus ditunggu sebelum frame berikutnya boleh diproses"""
+        return max(0.0, self._next_at - time.monotonic())
+
+    def consume(self):
+        """Catat bahwa satu frame mulai diproses sekarang"""
+        self._next_at = time.monotonic() + self.interval
@@ -0,0 +1,141 @@
+"""
+Endpoint deteksi live (WebSocket /ws/live), lihat live.py
+"""
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from config import (
+    INFERENCE_EXECUTOR, LIVE_MAX_CONNECTIONS, LIVE_MAX_FPS, LIVE_MAX_FRAME_KB, MODEL_INPUT_SIZE,
+    PREPROCESS_RESAMPLE,
+)
+from inference import QueueFullError
+from live import FrameRateLimiter, LatestFrameSlot
+from metrics import Counter
+from preprocessing import LetterboxPreprocessor
+
+# Koneksi /ws/live yang sedang terbuka (process ini)
+live_connections = 0
+live_frame_counter = Counter("dentalogic_live_frames_total", "Frame /ws/live per status", ("status",))
+
+
+def create_router(
+    infer_frame: Callable[[Optional[LetterboxPreprocessor], bytes], Awaitable[Dict]],
+    is_ready: Callable[[], bool],
+    errors: Counter,
+) -> APIRouter:
+    """
+    Router WebSocket deteksi live
+
+    Args:
+        infer_frame: Jalankan inference satu frame (preprocessor milik koneksi atau None
+            di executor "process", bytes frame) di inference executor; raise
+            QueueFullError jika server sibuk
+        is_ready: Model sudah siap dipakai
+        errors: Counter error per tipe (/metrics)
+    """
+    router = APIRouter()
+
+    @router.websocket("/ws/live")
+    async def live_detection(websocket: WebSocket, fps: Optional[float] = None):
+        """
+        Deteksi live dari stream frame kamera
+
+        Client mengirim frame JPEG/PNG sebagai pesan biner; server membalas pesan
+        teks JSON per frame yang di-infer:
+            {"seq": 12, "frameSize": [w, h], "detections": [{"bbox": [...], "class": "D2",
+             "confidence": 87.5}], "inferenceTime": 20.1, "modelVersion": "3f2a9c1e0b7d", "dropped": 3}
+
+        Hanya frame terbaru yang diproses: frame yang datang saat inference masih
+        berjalan (atau sebelum batas fps) menimpa frame sebelumnya dan dihitung di "dropped".
+
+        Args:
+            fps: Frame per detik yang diinginkan client (dibatasi DENTALOGIC_LIVE_MAX_FPS)
+        """
+        global live_connections
+
+        if live_connections >= LIVE_MAX_CONNECTIONS:
+            # 1013 = try again later
+            await websocket.close(code=1013, reason="Koneksi live penuh")
+            return
+
+        live_connections += 1
+        try:
+            await websocket.accept()
+            max_frame_bytes = LIVE_MAX_FRAME_KB * 1024
+            slot = LatestFrameSlot()
+            limiter = FrameRateLimiter(min(fps, LIVE_MAX_FPS) if fps and fps > 0 else LIVE_MAX_FPS)
+            # Buffer input model milik koneksi ini, dipakai ulang untuk setiap frame. Di
+            # executor "process" buffer dipegang worker process (tidak di-pickle per frame).
+            preprocessor = None
+            if INFERENCE_EXECUTOR == "thread":
+                preprocessor = LetterboxPreprocessor(MODEL_INPUT_SIZE, max_batch=1, resample=PREPROCESS_RESAMPLE)
+
+            async def receive_frames():
+                try:
+                    while True:
+                        message = await websocket.receive()
+                        if message["type"] == "websocket.disconnect":
+                            break
+                        frame = message.get("bytes")
+                        if frame is None:
+                            continue
+                        if len(frame) > max_frame_bytes:
+                            # 1009 = message too big
+                            await websocket.close(code=1009, reason=f"Frame melebihi {LIVE_MAX_FRAME_KB} KB")
+                            break
+                        slot.put(frame)
+                finally:
+                    slot.close()
+
+            reported_dropped = 0
+
+            def report_dropped():
+                nonlocal reported_dropped
+                if slot.dropped > reported_dropped:
+                    live_frame_counter.inc(slot.dropped - reported_dropped, status="dropped")
+                    reported_dropped = slot.dropped
+
+            receiver = asyncio.create_task(receive_frames())
+            try:
+                while True:
+                    await asyncio.sleep(limiter.wait_time())
+                    frame = await slot.take()
+                    if frame is None:
+                        break
+                    seq, frame_data = frame
+                    limiter.consume()
+
+                    if not is_ready():
+                        slot.drop()
+                        await websocket.send_json({"seq": seq, "error": "Model sedang di-load"})
+                        continue
+                    try:
+                        result = await infer_frame(preprocessor, frame_data)
+                    except QueueFullError:
+                        # Server sibuk: buang frame ini, frame berikutnya dicoba lagi
+                        slot.drop()
+                        continue
+                    except Exception as e:
+                        errors.inc(type=type(e).__name__)
+                        live_frame_counter.inc(status="error")
+                        await websocket.send_json({"seq": seq, "error": f"Gagal memproses frame: {str(e)}"})
+                        continue
+
+                    live_frame_counter.inc(status="processed")
+                    report_dropped()
+                    result["seq"] = seq
+                    result["dropped"] = slot.dropped
+                    await websocket.send_text(json.dumps(result, separators=(",", ":")))
+            except (WebSocketDisconnect, RuntimeError):
+                # Client menutup koneksi saat response dikirim
+                pass
+            finally:
+                receiver.cancel()
+                report_dropped()
+        finally:
+            live_connections -= 1
+
+    return router
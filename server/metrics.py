@@ -0,0 +1,193 @@
+"""
+Metrics sederhana (in-process) untuk memantau latency per stage inference
+
+Selain ringkasan JSON (/health), semua metrics bisa di-render dalam format
+teks Prometheus (render_prometheus) untuk endpoint /metrics.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bucket default dalam milliseconds
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Histogram thread-safe dengan bucket tetap (nilai dalam ms)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # slot terakhir = +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Catat satu observasi"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def raw(self) -> Tuple[List[int], float, int]:
+        """Salinan (count per bucket non-kumulatif termasuk +Inf, sum, count)"""
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    def snapshot(self) -> Dict:
+        """Ambil ringkasan histogram (bucket kumulatif)"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+            count = self._count
+            maximum = self._max
+
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+
+        return {
+            "count": count,
+            "sum": round(total, 2),
+            "mean": round(total / count, 2) if count else 0.0,
+            "max": round(maximum, 2),
+            "buckets": buckets,
+        }
+
+
+class StageMetrics:
+    """Kumpulan histogram latency per stage (queue_wait, run, predict, dll)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self._buckets = buckets
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        """Ambil (atau buat) histogram untuk stage tertentu"""
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                hist = Histogram(self._buckets)
+                self._histograms[stage] = hist
+            return hist
+
+    def observe(self, stage: str, value_ms: float):
+        """Catat durasi (ms) untuk sebuah stage"""
+        self.histogram(stage).observe(value_ms)
+
+    def observe_many(self, timings: Optional[Dict[str, float]]):
+        """Catat beberapa stage sekaligus dari dict {stage: ms}"""
+        if not timings:
+            return
+        for stage, value_ms in timings.items():
+            self.observe(stage, value_ms)
+
+    def items(self) -> List[Tuple[str, Histogram]]:
+        """List (stage, histogram) terurut nama stage"""
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def snapshot(self) -> Dict:
+        """Ringkasan semua stage"""
+        return {stage: hist.snapshot() for stage, hist in self.items()}
+
+
+class Counter:
+    """Counter thread-safe dengan label (misal requests per endpoint dan status)"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        """Tambah counter untuk kombinasi label tertentu"""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_prometheus(
+    stage_metrics: StageMetrics,
+    counters: Sequence[Counter] = (),
+    gauges: Optional[Dict[str, Tuple[str, float]]] = None,
+    histogram_name: str = "stage_duration_seconds",
+    histogram_help: str = "Latency per stage",
+) -> str:
+    """
+    Render metrics dalam format teks Prometheus (text/plain; version=0.0.4)
+
+    Histogram per stage disimpan dalam ms dan diekspor dalam detik sesuai
+    konvensi Prometheus, dengan label stage.
+
+    Args:
+        stage_metrics: Histogram latency per stage
+        counters: Counter yang diekspor
+        gauges: Mapping nama -> (help, nilai)
+        histogram_name: Nama metric histogram stage
+        histogram_help: Deskripsi histogram stage
+    """
+    lines: List[str] = []
+
+    lines.append(f"# HELP {histogram_name} {histogram_help}")
+    lines.append(f"# TYPE {histogram_name} histogram")
+    for stage, hist in stage_metrics.items():
+        counts, total, count = hist.raw()
+        cumulative = 0
+        for bound, bucket_count in zip(hist.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels([("stage", stage), ("le", _format_value(bound / 1000))])
+            lines.append(f"{histogram_name}_bucket{labels} {cumulative}")
+        labels = _format_labels([("stage", stage), ("le", "+Inf")])
+        lines.append(f"{histogram_name}_bucket{labels} {count}")
+        stage_label = _format_labels([("stage", stage)])
+        lines.append(f"{histogram_name}_sum{stage_label} {_format_value(total / 1000)}")
+        lines.append(f"{histogram_name}_count{stage_label} {count}")
+
+    for counter in counters:
+        lines.append(f"# HELP {counter.name} {counter.help_text}")
+        lines.append(f"# TYPE {counter.name} counter")
+        for key, value in sorted(counter.snapshot().items()):
+            labels = _format_labels(zip(counter.label_names, key))
+            lines.append(f"{counter.name}{labels} {_format_value(value)}")
+
+    for name, (help_text, value) in (gauges or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,233 @@
+"""
+Non-Maximum Suppression untuk output mentah YOLO (backend ONNX)
+
+- Pre-filter confidence dan top-k sebelum suppression (ribuan anchor -> ratusan kandidat)
+- Class-aware dalam satu pass: box kelas berbeda tidak saling menekan (hard NMS
+  hanya menghitung IoU terhadap box kelas yang sama, Soft-NMS memakai offset
+  koordinat per kelas)
+- Greedy NMS dengan mask suppressed dan buffer scratch (tanpa membangun
+  ulang array index setiap iterasi), berhenti setelah max_det box
+- Soft-NMS opsional (linear atau gaussian): skor box yang overlap diturunkan,
+  bukan langsung dibuang
+- batched_nms untuk input dengan dimensi batch [B, N, 4]
+
+Konvensi IoU sama dengan reference.non_max_suppression(): area (x2 - x1 + offset) *
+(y2 - y1 + offset) dengan offset default 1 (koordinat pixel inklusif), box
+dibuang jika IoU > iou_threshold.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+NMS_METHODS = ("hard", "linear", "gaussian")
+
+# Skor minimum box Soft-NMS jika score_threshold tidak diberikan
+SOFT_NMS_MIN_SCORE = 0.001
+
+
+def _prefilter(scores: np.ndarray, score_threshold: float, top_k: int) -> np.ndarray:
+    """Index kandidat (skor >= threshold, maksimal top_k skor tertinggi), urut skor turun"""
+    candidates = np.flatnonzero(scores >= score_threshold) if score_threshold > 0 else np.arange(len(scores))
+    if top_k and len(candidates) > top_k:
+        # argpartition O(N), lalu hanya top_k yang diurutkan
+        part = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+        candidates = candidates[part]
+    # Sort sama dengan non_max_suppression (scores.argsort()[::-1]) supaya urutan
+    # box dengan skor sama juga identik
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def _class_offset_boxes(boxes: np.ndarray, classes: np.ndarray, offset: float) -> np.ndarray:
+    """Geser box per kelas supaya box dari kelas berbeda tidak pernah overlap"""
+    if len(boxes) == 0:
+        return boxes
+    span = float(boxes.max() - min(0.0, float(boxes.min()))) + offset + 1
+    return boxes + (classes.astype(boxes.dtype) * span)[:, None]
+
+
+def _hard_nms(
+    boxes: np.ndarray,
+    classes: Optional[np.ndarray],
+    iou_threshold: float,
+    max_det: int,
+    offset: float,
+) -> np.ndarray:
+    """
+    Greedy NMS untuk box yang sudah diurutkan skor turun; return posisi box yang dipertahankan
+
+    Box diproses dalam urutan skor global (berhenti tepat setelah max_det box),
+    tetapi IoU hanya dihitung terhadap box berikutnya dari kelas yang sama.
+    """
+    count = len(boxes)
+    if classes is None:
+        groups = [np.arange(count)]
+    else:
+        # Stable: urutan skor di dalam setiap kelas tetap terjaga
+        by_class = np.argsort(classes, kind="stable")
+        groups = np.split(by_class, np.flatnonzero(np.diff(classes[by_class])) + 1)
+
+    group_of = np.empty(count, dtype=np.intp)
+    position = np.empty(count, dtype=np.intp)
+    coords = []
+    for g, members in enumerate(groups):
+        group_of[members] = g
+        position[members] = np.arange(len(members))
+        x1, y1, x2, y2 = (np.ascontiguousarray(boxes[members, i]) for i in range(4))
+        coords.append((x1, y1, x2, y2, (x2 - x1 + offset) * (y2 - y1 + offset)))
+
+    suppressed = np.zeros(count, dtype=bool)
+    # Buffer scratch dipakai ulang setiap iterasi (view ke bagian depan buffer)
+    size = max(len(members) for members in groups)
+    buf_w = np.empty(size, dtype=boxes.dtype)
+    buf_h = np.empty(size, dtype=boxes.dtype)
+    keep = []
+
+    for i in range(count):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        if len(keep) == max_det:
+            break
+
+        members = groups[group_of[i]]
+        p = position[i]
+        n = len(members) - p - 1
+        if n == 0:
+            continue
+        x1, y1, x2, y2, areas = coords[group_of[i]]
+        rest = slice(p + 1, None)
+        w, h = buf_w[:n], buf_h[:n]
+        np.minimum(x2[p], x2[rest], out=w)
+        w -= np.maximum(x1[p], x1[rest])
+        w += offset
+        np.maximum(w, 0, out=w)
+        np.minimum(y2[p], y2[rest], out=h)
+        h -= np.maximum(y1[p], y1[rest])
+        h += offset
+        np.maximum(h, 0, out=h)
+        w *= h  # intersection
+
+        # IoU dihitung sama persis dengan non_max_suppression (float dtype box)
+        np.add(areas[rest], areas[p], out=h)
+        h -= w
+        np.divide(w, h, out=w)
+        suppressed[members[p + 1:][w > iou_threshold]] = True
+
+    return np.array(keep, dtype=np.int64)
+
+
+def _soft_nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float,
+    max_det: int,
+    offset: float,
+    method: str,
+    sigma: float,
+    min_score: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Soft-NMS: pilih skor tertinggi, turunkan skor box lain sesuai IoU; return (index, skor)"""
+    count = len(boxes)
+    x1, y1, x2, y2 = (np.ascontiguousarray(boxes[:, i]) for i in range(4))
+    areas = (x2 - x1 + offset) * (y2 - y1 + offset)
+    current = scores.astype(np.float64)  # copy
+    keep, kept_scores = [], []
+
+    while len(keep) < (max_det or count):
+        i = int(np.argmax(current))
+        if current[i] < min_score:
+            break
+        keep.append(i)
+        kept_scores.append(current[i])
+        current[i] = -np.inf
+
+        w = np.maximum(0, np.minimum(x2[i], x2) - np.maximum(x1[i], x1) + offset)
+        h = np.maximum(0, np.minimum(y2[i], y2) - np.maximum(y1[i], y1) + offset)
+        intersection = w * h
+        iou = intersection / (areas[i] + areas - intersection)
+
+        if method == "linear":
+            decay = np.where(iou > iou_threshold, 1 - iou, 1.0)
+        else:
+            decay = np.exp(-(iou * iou) / sigma)
+        np.multiply(current, decay, out=current, where=np.isfinite(current))
+        current[current < min_score] = -np.inf
+
+    return np.array(keep, dtype=np.int64), np.array(kept_scores, dtype=scores.dtype)
+
+
+def nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float = 0.5,
+    classes: Optional[np.ndarray] = None,
+    score_threshold: float = 0.0,
+    top_k: int = 0,
+    max_det: int = 0,
+    method: str = "hard",
+    sigma: float = 0.5,
+    offset: float = 1.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Non-Maximum Suppression untuk satu gambar
+
+    Args:
+        boxes: Array [N, 4] format xyxy
+        scores: Array [N] confidence
+        iou_threshold: Box dengan IoU > threshold terhadap box yang dipertahankan di-suppress
+            (Soft-NMS linear: batas mulai penurunan skor)
+        classes: Array [N] class id; None = semua box dianggap satu kelas
+        score_threshold: Buang kandidat dengan skor di bawah ini sebelum suppression
+            (Soft-NMS: juga skor minimum setelah diturunkan)
+        top_k: Hanya top_k skor tertinggi yang ikut suppression (0 = semua)
+        max_det: Jumlah box maksimum yang dikembalikan (0 = tanpa batas)
+        method: "hard" (NMS biasa), "linear" atau "gaussian" (Soft-NMS)
+        sigma: Parameter Soft-NMS gaussian
+        offset: Tambahan lebar/tinggi saat menghitung area (1 = sama dengan non_max_suppression)
+
+    Returns:
+        Tuple (index box yang dipertahankan urut skor turun, skor akhir box tersebut)
+    """
+    if method not in NMS_METHODS:
+        raise ValueError(f"Unknown NMS method '{method}', expected one of {NMS_METHODS}")
+    if len(boxes) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=scores.dtype)
+
+    order = _prefilter(scores, score_threshold, top_k)
+    if len(order) == 0:
+        return order.astype(np.int64), scores[order]
+    candidates = boxes[order]
+
+    if method == "hard":
+        kept = _hard_nms(candidates, None if classes is None else classes[order], iou_threshold, max_det, offset)
+        return order[kept], scores[order[kept]]
+
+    if classes is not None:
+        candidates = _class_offset_boxes(candidates, classes[order], offset)
+
+    min_score = score_threshold if score_threshold > 0 else SOFT_NMS_MIN_SCORE
+    kept, kept_scores = _soft_nms(
+        candidates, scores[order], iou_threshold, max_det, offset, method, sigma, min_score
+    )
+    return order[kept], kept_scores
+
+
+def batched_nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float = 0.5,
+    classes: Optional[np.ndarray] = None,
+    **kwargs,
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    NMS untuk batch gambar: boxes [B, N, 4], scores [B, N], classes [B, N] (opsional)
+
+    Setiap gambar di-suppress terpisah; argumen lain sama dengan nms().
+
+    Returns:
+        List (index, skor) per gambar
+    """
+    return [
+        nms(boxes[b], scores[b], iou_threshold, None if classes is None else classes[b], **kwargs)
+        for b in range(len(boxes))
+    ]
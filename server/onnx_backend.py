@@ -0,0 +1,250 @@
+"""
+Backend inference ONNX Runtime untuk model YOLO yang sudah di-export (best.onnx)
+
+OnnxYOLO meniru API minimal Ultralytics YOLO yang dipakai server
+(`names` dan `predict(source, conf, iou, verbose)`), sehingga hasil
+diproses oleh kode yang sama dengan backend .pt dan schema response identik.
+
+Export model:
+    python onnx_backend.py export [path/to/best.pt]
+"""
+import ast
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from nms import batched_nms
+from preprocessing import LetterboxInfo
+
+
+class _ArrayTensor:
+    """Pembungkus ndarray dengan API minimal torch.Tensor (.cpu().numpy())"""
+
+    def __init__(self, array: np.ndarray):
+        self._array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self) -> np.ndarray:
+        return self._array
+
+    def __getitem__(self, index):
+        return _ArrayTensor(self._array[index])
+
+    def __len__(self):
+        return len(self._array)
+
+
+class OnnxBoxes:
+    """Pengganti ultralytics Boxes: xyxy [N, 4], conf [N], cls [N]"""
+
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray):
+        self.xyxy = _ArrayTensor(xyxy)
+        self.conf = _ArrayTensor(conf)
+        self.cls = _ArrayTensor(cls)
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    def __iter__(self):
+        xyxy, conf, cls = self.xyxy.numpy(), self.conf.numpy(), self.cls.numpy()
+        for i in range(len(xyxy)):
+            yield OnnxBoxes(xyxy[i:i + 1], conf[i:i + 1], cls[i:i + 1])
+
+
+class OnnxResults:
+    """Pengganti ultralytics Results untuk satu gambar"""
+
+    def __init__(self, boxes: OnnxBoxes, names: Dict[int, str], orig_shape):
+        self.boxes = boxes
+        self.names = names
+        self.orig_shape = orig_shape
+
+
+def _parse_names(metadata: Dict[str, str], default_names: Sequence[str]) -> Dict[int, str]:
+    """Ambil class names dari metadata export Ultralytics, fallback ke default_names"""
+    raw = metadata.get("names")
+    if raw:
+        try:
+            names = ast.literal_eval(raw)
+            if isinstance(names, dict):
+                return {int(k): str(v) for k, v in names.items()}
+            if isinstance(names, (list, tuple)):
+                return {i: str(v) for i, v in enumerate(names)}
+        except (ValueError, SyntaxError):
+            pass
+    return {i: name for i, name in enumerate(default_names)}
+
+
+class OnnxYOLO:
+    """
+    Model YOLO (export ONNX) yang dijalankan dengan ONNX Runtime
+
+    Args:
+        model_path: Path ke file .onnx
+        preprocess: Fungsi list PIL Image -> (array float32 [N, 3, S, S], list LetterboxInfo),
+            misalnya preprocessing.LetterboxPreprocessor
+        nms: Fungsi NMS batch dengan signature nms.batched_nms (boxes [B, A, 4], scores [B, A],
+            iou_threshold, classes=[B, A], score_threshold=conf) -> list (indices, scores) per gambar
+        input_size: Ukuran input model (persegi)
+        default_names: Class names jika metadata model tidak tersedia
+        intra_op_threads: Jumlah thread di dalam satu operator (0 = default ORT)
+        inter_op_threads: Jumlah thread antar operator (0 = default ORT)
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        preprocess: Callable[[List[Image.Image]], Tuple[np.ndarray, List[LetterboxInfo]]],
+        nms: Callable[..., List[Tuple[np.ndarray, np.ndarray]]] = batched_nms,
+        input_size: int = 640,
+        default_names: Sequence[str] = (),
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+    ):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "onnxruntime belum ter-install (pip install onnxruntime)"
+            ) from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads > 0:
+            options.inter_op_num_threads = inter_op_threads
+
+        self.model_path = str(model_path)
+        self.session = ort.InferenceSession(
+            self.model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.preprocess = preprocess
+        self.nms = nms
+        self.input_size = input_size
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Model yang di-export tanpa dynamic=True punya batch dimension tetap (1)
+        batch_dim = model_input.shape[0] if model_input.shape else None
+        self.max_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+
+        metadata = self.session.get_modelmeta().custom_metadata_map or {}
+        self.names = _parse_names(metadata, default_names)
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        """Jalankan session, hormati batch dimension tetap jika ada"""
+        if self.max_batch is None or len(batch) <= self.max_batch:
+            return self.session.run(None, {self.input_name: batch})[0]
+        outputs = [
+            self.session.run(None, {self.input_name: batch[i:i + self.max_batch]})[0]
+            for i in range(0, len(batch), self.max_batch)
+        ]
+        return np.concatenate(outputs, axis=0)
+
+    @staticmethod
+    def _decode(outputs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decode output YOLO [B, 4 + nc, anchors] menjadi boxes xyxy [B, A, 4],
+        scores [B, A] dan class ids [B, A] (koordinat input model)
+
+        Skor kelas dari head YOLOv8+ sudah berupa probabilitas (sigmoid),
+        jadi tidak perlu softmax.
+        """
+        # [B, 4 + nc, anchors] -> [B, anchors, 4 + nc]
+        if outputs.shape[1] < outputs.shape[2]:
+            outputs = outputs.transpose(0, 2, 1)
+
+        class_scores = outputs[..., 4:]
+        class_ids = class_scores.argmax(axis=2)
+        scores = np.take_along_axis(class_scores, class_ids[..., None], axis=2)[..., 0].astype(np.float32)
+
+        # cx, cy, w, h -> x1, y1, x2, y2
+        boxes_cxcywh = outputs[..., :4]
+        boxes = np.empty(boxes_cxcywh.shape, dtype=np.float32)
+        half_w = boxes_cxcywh[..., 2] / 2
+        half_h = boxes_cxcywh[..., 3] / 2
+        boxes[..., 0] = boxes_cxcywh[..., 0] - half_w
+        boxes[..., 1] = boxes_cxcywh[..., 1] - half_h
+        boxes[..., 2] = boxes_cxcywh[..., 0] + half_w
+        boxes[..., 3] = boxes_cxcywh[..., 1] + half_h
+        return boxes, scores, class_ids
+
+    def _postprocess(
+        self,
+        outputs: np.ndarray,
+        infos: List[LetterboxInfo],
+        conf: float,
+        iou: float,
+    ) -> List[OnnxResults]:
+        """Decode + NMS per kelas untuk satu batch, box di koordinat gambar asli"""
+        boxes, scores, class_ids = self._decode(outputs)
+        # Pre-filter conf dan NMS per kelas (seperti Ultralytics) untuk semua gambar dalam batch
+        kept = self.nms(boxes, scores, iou, classes=class_ids, score_threshold=conf)
+
+        results = []
+        for i, (info, (keep, kept_scores)) in enumerate(zip(infos, kept)):
+            image_boxes = boxes[i, keep]
+            # Buang padding letterbox dan skala balik ke koordinat gambar asli
+            info.to_original(image_boxes)
+            results.append(OnnxResults(
+                OnnxBoxes(image_boxes, kept_scores.astype(np.float32), class_ids[i, keep].astype(np.float32)),
+                self.names,
+                (info.orig_height, info.orig_width),
+            ))
+        return results
+
+    def predict(self, source, conf: float = 0.25, iou: float = 0.5, verbose: bool = False, **kwargs) -> List[OnnxResults]:
+        """
+        Inference untuk satu PIL Image, list PIL Image (satu batch), atau array
+        float32 [N, 3, S, S] yang sudah di-letterbox (box di koordinat input model)
+        """
+        start_time = time.time()
+        if isinstance(source, np.ndarray):
+            batch = source
+            infos = [LetterboxInfo(1.0, 0, 0, self.input_size, self.input_size)] * len(batch)
+        else:
+            images = source if isinstance(source, (list, tuple)) else [source]
+            batch, infos = self.preprocess(images)
+        outputs = self._run(batch)
+        results = self._postprocess(outputs, infos, conf, iou)
+
+        if verbose:
+            print(f"ONNX inference: {len(batch)} image(s) in {(time.time() - start_time) * 1000:.1f} ms")
+        return results
+
+
+def export_onnx(weights: Path, input_size: int = 640) -> Path:
+    """
+    Export model .pt ke ONNX (dynamic batch, graph disederhanakan)
+
+    Membutuhkan ultralytics + torch; server yang memakai backend ONNX tidak.
+    """
+    from ultralytics import YOLO
+
+    model = YOLO(str(weights))
+    exported = model.export(format="onnx", imgsz=input_size, dynamic=True, simplify=True)
+    return Path(exported)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "export":
+        print("Usage: python onnx_backend.py export [path/to/best.pt]")
+        sys.exit(1)
+
+    weights = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(__file__).parent.parent / "model" / "best.pt"
+    if not weights.exists():
+        print(f"Error: File {weights} tidak ditemukan")
+        sys.exit(1)
+
+    output = export_onnx(weights)
+    print(f"✅ Model ONNX tersimpan di {output}")
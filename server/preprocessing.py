@@ -0,0 +1,202 @@
+"""
+Decode dan preprocessing gambar
+
+decode_image:
+- JPEG draft mode: decoder JPEG langsung menghasilkan gambar 1/2, 1/4 atau 1/8
+  ukuran asli, mendekati ukuran yang dibutuhkan (hemat CPU dan memori)
+- Orientasi EXIF diterapkan sekali
+- Downscale awal ke sisi terpanjang max_size
+
+LetterboxPreprocessor (backend non-Ultralytics / ONNX):
+- Resize dengan aspect ratio tetap + padding (letterbox, seperti saat training YOLO)
+- Menulis langsung ke buffer (batch, 3, S, S) float32 yang dipakai ulang antar panggilan
+- Konversi uint8 -> float32 [0, 1] in-place ke buffer (tanpa array float sementara)
+- Mengembalikan metadata scale/padding untuk memetakan box ke koordinat asli
+"""
+import io
+import math
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+RESAMPLE_MODES = {
+    "nearest": Image.Resampling.NEAREST,
+    "bilinear": Image.Resampling.BILINEAR,
+    "bicubic": Image.Resampling.BICUBIC,
+    "lanczos": Image.Resampling.LANCZOS,
+}
+
+# Nilai padding standar YOLO (abu-abu 114)
+PAD_VALUE = 114
+
+_INV_255 = np.float32(1.0 / 255.0)
+
+# Tag EXIF Orientation; nilai 5-8 berarti gambar diputar 90/270 derajat
+_EXIF_ORIENTATION = 0x0112
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+# Draft boleh menghasilkan sisi terpanjang sampai 0.75 x max_size, supaya skala
+# DCT (1/2, 1/4, 1/8) bisa langsung dipakai tanpa resize tambahan yang mahal
+DRAFT_MIN_RATIO = 0.75
+
+
+class DecodedImage(NamedTuple):
+    """Hasil decode: gambar (sudah di-orientasi dan di-downscale) + ukuran asli"""
+    image: Image.Image
+    original_size: Tuple[int, int]
+    scale: float  # ukuran image / ukuran asli (<= 1.0)
+
+
+def decode_image(image_data: bytes, max_size: int = 0) -> DecodedImage:
+    """
+    Decode bytes gambar menjadi PIL Image RGB
+
+    Args:
+        image_data: Bytes file gambar (JPEG, PNG, dll)
+        max_size: Sisi terpanjang maksimum hasil decode (0 = ukuran penuh)
+
+    Returns:
+        DecodedImage; original_size adalah ukuran gambar asli setelah orientasi EXIF.
+        Untuk JPEG, sisi terpanjang hasil berada di antara DRAFT_MIN_RATIO x max_size
+        dan max_size.
+    """
+    image = Image.open(io.BytesIO(image_data))
+
+    raw_width, raw_height = image.size
+    orientation = image.getexif().get(_EXIF_ORIENTATION, 1)
+    if orientation in _TRANSPOSED_ORIENTATIONS:
+        original_size = (raw_height, raw_width)
+    else:
+        original_size = (raw_width, raw_height)
+
+    if max_size and max(raw_width, raw_height) > max_size:
+        ratio = max_size * DRAFT_MIN_RATIO / max(raw_width, raw_height)
+        # draft() memilih skala DCT terkecil yang masih >= ukuran yang diminta
+        image.draft('RGB', (math.ceil(raw_width * ratio), math.ceil(raw_height * ratio)))
+
+    if orientation != 1:
+        image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    if max_size and max(image.size) > max_size:
+        image.thumbnail((max_size, max_size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    image.load()
+
+    return DecodedImage(image, original_size, image.size[0] / original_size[0])
+
+
+class LetterboxInfo(NamedTuple):
+    """Metadata letterbox satu gambar: box_model = box_asli * scale + pad"""
+    scale: float
+    pad_x: int
+    pad_y: int
+    orig_width: int
+    orig_height: int
+
+    def to_original(self, boxes: np.ndarray) -> np.ndarray:
+        """Petakan box xyxy [N, 4] dari koordinat input model ke koordinat gambar asli (in-place)"""
+        xs, ys = boxes[:, 0::2], boxes[:, 1::2]  # view kolom x1,x2 dan y1,y2
+        xs -= self.pad_x
+        ys -= self.pad_y
+        boxes /= self.scale
+        np.clip(xs, 0, self.orig_width, out=xs)
+        np.clip(ys, 0, self.orig_height, out=ys)
+        return boxes
+
+    def to_model(self, boxes: np.ndarray) -> np.ndarray:
+        """Kebalikan to_original: koordinat gambar asli -> koordinat input model"""
+        boxes = boxes * self.scale
+        boxes[:, 0::2] += self.pad_x
+        boxes[:, 1::2] += self.pad_y
+        return boxes
+
+
+class LetterboxPreprocessor:
+    """
+    Preprocessor letterbox dengan buffer yang dipakai ulang
+
+    Array yang dikembalikan adalah view ke buffer internal dan hanya valid
+    sampai panggilan berikutnya. Satu instance tidak boleh dipakai bersamaan
+    dari beberapa thread (buat satu instance per worker/model).
+
+    Args:
+        input_size: Ukuran input model (persegi)
+        max_batch: Ukuran batch awal buffer (buffer diperbesar otomatis jika perlu)
+        resample: Nama mode resample ("nearest", "bilinear", "bicubic", "lanczos")
+        pad_value: Nilai pixel padding (0-255)
+    """
+
+    def __init__(
+        self,
+        input_size: int = 640,
+        max_batch: int = 1,
+        resample: str = "bilinear",
+        pad_value: int = PAD_VALUE,
+    ):
+        if resample not in RESAMPLE_MODES:
+            raise ValueError(f"Unknown resample mode '{resample}', expected one of {tuple(RESAMPLE_MODES)}")
+        self.input_size = input_size
+        self.resample = resample
+        self._resample = RESAMPLE_MODES[resample]
+        self._pad = np.float32(pad_value / 255.0)
+        self._buffer = np.empty((max(1, max_batch), 3, input_size, input_size), dtype=np.float32)
+
+    def _ensure_capacity(self, batch_size: int):
+        if batch_size > len(self._buffer):
+            self._buffer = np.empty((batch_size, 3, self.input_size, self.input_size), dtype=np.float32)
+
+    def _layout(self, width: int, height: int) -> Tuple[LetterboxInfo, int, int]:
+        size = self.input_size
+        scale = min(size / width, size / height)
+        new_width = max(1, min(size, int(round(width * scale))))
+        new_height = max(1, min(size, int(round(height * scale))))
+        pad_x = (size - new_width) // 2
+        pad_y = (size - new_height) // 2
+        return LetterboxInfo(scale, pad_x, pad_y, width, height), new_width, new_height
+
+    def letterbox_info(self, width: int, height: int) -> LetterboxInfo:
+        """Hitung scale dan padding untuk gambar berukuran width x height"""
+        return self._layout(width, height)[0]
+
+    def _fill(self, out: np.ndarray, image: Image.Image) -> LetterboxInfo:
+        """Letterbox satu gambar ke out [3, S, S]"""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        width, height = image.size
+        info, new_width, new_height = self._layout(width, height)
+
+        if (new_width, new_height) != (width, height):
+            # reducing_gap: downscale bertahap (reduce() integer) untuk foto besar, jauh lebih murah
+            image = image.resize((new_width, new_height), self._resample, reducing_gap=3.0)
+
+        pixels = np.asarray(image)  # uint8 HWC, tanpa copy
+        top, left = info.pad_y, info.pad_x
+        bottom, right = top + new_height, left + new_width
+
+        # Isi padding saja (area gambar akan ditimpa)
+        if top > 0:
+            out[:, :top, :] = self._pad
+        if bottom < self.input_size:
+            out[:, bottom:, :] = self._pad
+        if left > 0:
+            out[:, top:bottom, :left] = self._pad
+        if right < self.input_size:
+            out[:, top:bottom, right:] = self._pad
+
+        # uint8 HWC -> float32 CHW [0, 1] langsung ke buffer
+        np.multiply(pixels.transpose(2, 0, 1), _INV_255, out=out[:, top:bottom, left:right])
+        return info
+
+    def __call__(self, images: Sequence[Image.Image]) -> Tuple[np.ndarray, List[LetterboxInfo]]:
+        """
+        Preprocess list gambar
+
+        Returns:
+            Tuple (array float32 [N, 3, S, S] view ke buffer, list LetterboxInfo per gambar)
+        """
+        self._ensure_capacity(len(images))
+        infos = [self._fill(self._buffer[i], image) for i, image in enumerate(images)]
+        return self._buffer[:len(images)], infos
@@ -0,0 +1,285 @@
+"""
+Profiling on-demand untuk pipeline prediksi
+
+- ProfileSession: profiler Python (cProfile stdlib, atau pyinstrument jika
+  ter-install) untuk satu eksekusi pipeline di worker inference, ditambah
+  ringkasan torch.profiler untuk model.predict (backend ultralytics)
+- ProfileSampler: pilih 1 dari N request untuk di-profile
+- ProfileStore: direktori output dengan batas jumlah file dan ukuran total
+  (file terlama dihapus)
+
+Tanpa sesi aktif tidak ada profiler yang dipasang: hook di jalur inference
+(torch_profile, profiling_active) hanya membaca satu atribut thread-local.
+
+File output:
+- .prof (cProfile, format pstats): snakeviz, `flameprof x.prof > x.svg`, gprof2dot
+- .speedscope.json (pyinstrument): flamegraph di https://www.speedscope.app
+- .txt: ringkasan teks (fungsi teratas + tabel operator torch)
+"""
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+PROFILE_ENGINES = ("cprofile", "pyinstrument")
+PROFILE_MODES = ("inline", "store")
+
+# Jumlah baris fungsi (pstats) dan operator torch di ringkasan
+SUMMARY_LIMIT = 40
+TORCH_ROW_LIMIT = 25
+
+_local = threading.local()
+
+# Satu sesi per process: mulai Python 3.12 cProfile memakai sys.monitoring
+# yang hanya boleh dipasang satu tool per process. Tidak pernah ditunggu
+# (acquire non-blocking, sesi berikutnya dilewati)
+_session_lock = threading.Lock()
+
+
+def engine_available(engine: str) -> bool:
+    """Engine profiler bisa dipakai (pyinstrument butuh library pyinstrument)"""
+    if engine != "pyinstrument":
+        return engine in PROFILE_ENGINES
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ProfileRequest(NamedTuple):
+    """Permintaan profiling untuk satu request (bisa di-pickle ke worker process)"""
+    engine: str  # "cprofile" atau "pyinstrument"
+    mode: str  # "inline" (laporan di response) atau "store" (file di ProfileStore)
+    label: str  # misal "predict", "predict-batch"; dipakai di nama file
+
+
+class ProfileSession:
+    """
+    Satu sesi profiling di thread yang menjalankan pipeline
+
+    Dipakai sebagai context manager; selama sesi aktif, current() di thread
+    yang sama mengembalikan sesi ini (dipakai torch_profile). Jika process ini
+    sedang menjalankan sesi lain, sesi dilewati (skipped) tanpa menunggu, jadi
+    profiling tidak pernah menambah antrian ke request; pipeline tetap jalan
+    tanpa profiler dan laporannya hanya {"id", "engine", "skipped": True}.
+    """
+
+    def __init__(self, request: ProfileRequest):
+        self.request = request
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.label}-{uuid.uuid4().hex[:8]}"
+        self.duration_ms = 0.0
+        self.torch_tables: List[str] = []
+        self.skipped = False
+        self._profiler = None
+        self._started_at = 0.0
+
+    def __enter__(self) -> "ProfileSession":
+        if not _session_lock.acquire(blocking=False):
+            self.skipped = True
+            return self
+        try:
+            if self.request.engine == "pyinstrument":
+                from pyinstrument import Profiler
+                self._profiler = Profiler(async_mode="disabled")
+            else:
+                self._profiler = cProfile.Profile()
+        except BaseException:
+            _session_lock.release()
+            raise
+        _local.session = self
+        self._started_at = time.perf_counter()
+        if self.request.engine == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.skipped:
+            return
+        if self.request.engine == "pyinstrument":
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        self.duration_ms = (time.perf_counter() - self._started_at) * 1000
+        _local.session = None
+        _session_lock.release()
+
+    def summary(self, limit: int = SUMMARY_LIMIT) -> str:
+        """Ringkasan teks: fungsi teratas (cumulative) atau call tree pyinstrument"""
+        if self.request.engine == "pyinstrument":
+            return self._profiler.output_text(unicode=False, color=False)
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stream)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def _stats(self) -> Dict:
+        """Data pstats mentah (isi file .prof, sama dengan cProfile.Profile.dump_stats)"""
+        self._profiler.create_stats()
+        return self._profiler.stats
+
+    def _skipped_report(self) -> Dict:
+        return {"id": self.id, "engine": self.request.engine, "skipped": True}
+
+    def report(self) -> Dict:
+        """Laporan untuk response (mode "inline")"""
+        if self.skipped:
+            return self._skipped_report()
+        return {
+            "id": self.id,
+            "engine": self.request.engine,
+            "durationMs": round(self.duration_ms, 2),
+            "summary": self.summary(),
+            "torch": "\n".join(self.torch_tables) or None,
+        }
+
+    def save(self, store: "ProfileStore") -> Dict:
+        """Tulis profile ke store (mode "store"); return id dan nama file"""
+        if self.skipped:
+            return self._skipped_report()
+        files = []
+        if self.request.engine == "pyinstrument":
+            from pyinstrument.renderers import SpeedscopeRenderer
+            files.append(store.write(f"{self.id}.speedscope.json", self._profiler.output(SpeedscopeRenderer()).encode("utf-8")))
+        else:
+            files.append(store.write(f"{self.id}.prof", marshal.dumps(self._stats())))
+        text = self.summary()
+        if self.torch_tables:
+            text += "\n\ntorch.profiler (model.predict)\n" + "\n".join(self.torch_tables)
+        files.append(store.write(f"{self.id}.txt", text.encode("utf-8")))
+        return {
+            "id": self.id,
+            "engine": self.request.engine,
+            "durationMs": round(self.duration_ms, 2),
+            "files": files,
+        }
+
+
+def current() -> Optional[ProfileSession]:
+    """Sesi profiling aktif di thread ini (None jika request tidak di-profile)"""
+    return getattr(_local, "session", None)
+
+
+def profiling_active() -> bool:
+    """Thread ini sedang menjalankan pipeline yang di-profile"""
+    return getattr(_local, "session", None) is not None
+
+
+@contextmanager
+def torch_profile(enabled: bool = True) -> Iterator[None]:
+    """
+    Bungkus model.predict dengan torch.profiler jika thread ini sedang di-profile
+
+    Tabel operator (self CPU time) ditambahkan ke sesi aktif. Tanpa sesi
+    aktif (atau enabled=False, misal backend onnx) tidak melakukan apa-apa.
+    """
+    session = current()
+    if session is None or not enabled:
+        yield
+        return
+    from torch.profiler import ProfilerActivity, profile
+    with profile(activities=[ProfilerActivity.CPU]) as prof:
+        yield
+    session.torch_tables.append(
+        prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=TORCH_ROW_LIMIT)
+    )
+
+
+class ProfileSampler:
+    """Pilih 1 dari every request (every <= 0 = tidak pernah)"""
+
+    def __init__(self, every: int):
+        self.every = every
+        self._counter = itertools.count(1)
+        self.sampled = 0
+
+    def sample(self) -> bool:
+        if self.every <= 0:
+            return False
+        if next(self._counter) % self.every:
+            return False
+        self.sampled += 1
+        return True
+
+
+# Nama file profile yang boleh diambil lewat endpoint (tanpa path separator)
+SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+class ProfileStore:
+    """
+    Direktori output profile dengan batas jumlah file dan ukuran total
+
+    Setelah setiap write, file terlama dihapus sampai kedua batas terpenuhi.
+    Aman dipakai beberapa process (worker process menulis ke direktori yang sama).
+    """
+
+    def __init__(self, directory: Path, max_files: int = 200, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def write(self, name: str, data: bytes) -> str:
+        """Tulis satu file profile; return nama file"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / f".{name}.tmp"
+        tmp_path.write_bytes(data)
+        tmp_path.replace(self.directory / name)
+        self.prune()
+        return name
+
+    def files(self) -> List[Dict]:
+        """File profile, terbaru dulu"""
+        entries = []
+        if not self.directory.is_dir():
+            return entries
+        for path in self.directory.iterdir():
+            if path.name.startswith(".") or not path.is_file():
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append({"name": path.name, "bytes": stat.st_size, "modified": stat.st_mtime})
+        entries.sort(key=lambda entry: entry["modified"], reverse=True)
+        return entries
+
+    def path(self, name: str) -> Optional[Path]:
+        """Path file profile name (None jika nama tidak valid atau file tidak ada)"""
+        if not SAFE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def prune(self):
+        with self._lock:
+            entries = self.files()
+            total = sum(entry["bytes"] for entry in entries)
+            while entries and (len(entries) > self.max_files or total > self.max_bytes):
+                oldest = entries.pop()
+                total -= oldest["bytes"]
+                try:
+                    (self.directory / oldest["name"]).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict:
+        entries = self.files()
+        return {
+            "directory": str(self.directory),
+            "files": len(entries),
+            "bytes": sum(entry["bytes"] for entry in entries),
+            "max_files": self.max_files,
+            "max_bytes": self.max_bytes,
+        }
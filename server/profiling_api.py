@@ -0,0 +1,38 @@
+"""
+Endpoint file profile (GET /profiles, GET /profiles/{name}), lihat profiling.py
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from api import require_admin
+from profiling import ProfileStore
+
+
+def create_router(store: ProfileStore) -> APIRouter:
+    """
+    Router endpoint profile (butuh X-Admin-Token)
+
+    Args:
+        store: Direktori output profile (mode "store" dan sampling)
+    """
+    router = APIRouter()
+
+    @router.get("/profiles")
+    async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+        """File profile di DENTALOGIC_PROFILE_DIR (terbaru dulu)"""
+        require_admin(x_admin_token)
+        return {**store.stats(), "profiles": store.files()}
+
+    @router.get("/profiles/{name}")
+    async def get_profile(name: str, x_admin_token: Optional[str] = Header(None)):
+        """Download satu file profile (.prof, .speedscope.json atau .txt)"""
+        require_admin(x_admin_token)
+        path = store.path(name)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Profile tidak ditemukan atau sudah dihapus")
+        media_type = "application/octet-stream" if name.endswith(".prof") else None
+        return FileResponse(path, media_type=media_type, filename=name)
+
+    return router
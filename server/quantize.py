@@ -0,0 +1,325 @@
+"""
+Varian presisi rendah model ONNX (INT8 / FP16) dan laporan akurasi vs FP32
+
+INT8 (default "static"): quantization QDQ per-channel untuk layer Conv, dengan
+kalibrasi range aktivasi dari folder gambar contoh (diproses dengan decode dan
+letterbox yang sama dengan server). Head deteksi (sigmoid, concat, decode box)
+tetap FP32. Mode "dynamic" tidak butuh kalibrasi, tetapi biasanya lebih lambat
+untuk model konvolusi.
+
+FP16: bobot dan aktivasi FP16, input/output tetap FP32. Di CPU hanya lebih cepat
+jika hardware mendukung FP16; selalu ukur dengan `compare`.
+
+Usage:
+    python quantize.py export --precision int8 [--model ../model/best.onnx] [--images ..] [--mode static]
+    python quantize.py export --precision fp16
+    python quantize.py compare --precision int8 [--images ..] [--json laporan.json]
+
+Model yang dihasilkan dipakai server dengan DENTALOGIC_MODEL_BACKEND=onnx dan
+DENTALOGIC_MODEL_PRECISION=int8 (atau fp16).
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import onnx
+
+import config
+from preprocessing import LetterboxPreprocessor, decode_image
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+QUANTIZE_MODES = ("static", "dynamic")
+
+# Default folder gambar kalibrasi / evaluasi: root repo (sample *_View.jpg)
+DEFAULT_IMAGES_DIR = Path(__file__).parent.parent
+
+# IoU minimum agar deteksi varian dianggap sama dengan deteksi FP32
+MATCH_IOU = 0.5
+
+
+def find_images(directory: Path, limit: int = 0) -> List[Path]:
+    """Semua file gambar di directory (rekursif), terurut"""
+    paths = sorted(path for path in directory.rglob("*") if path.suffix.lower() in IMAGE_SUFFIXES)
+    return paths[:limit] if limit else paths
+
+
+def iter_model_inputs(paths: List[Path], input_size: int) -> Iterator[np.ndarray]:
+    """Batch [1, 3, S, S] per gambar, diproses seperti di server (decode + letterbox)"""
+    preprocessor = LetterboxPreprocessor(input_size, max_batch=1, resample=config.PREPROCESS_RESAMPLE)
+    for path in paths:
+        decoded = decode_image(path.read_bytes(), config.DECODE_MAX_SIZE)
+        batch, _ = preprocessor([decoded.image])
+        yield batch.copy()
+
+
+def copy_metadata(source: onnx.ModelProto, target_path: Path):
+    """Salin metadata export (class names, dll) ke model hasil konversi"""
+    target = onnx.load(str(target_path))
+    existing = {prop.key for prop in target.metadata_props}
+    for prop in source.metadata_props:
+        if prop.key not in existing:
+            target.metadata_props.append(onnx.StringStringEntryProto(key=prop.key, value=prop.value))
+    onnx.save(target, str(target_path))
+
+
+def export_int8(model_path: Path, output_path: Path, images: List[Path], mode: str = "static"):
+    """Quantize model ONNX FP32 ke INT8"""
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    source = onnx.load(str(model_path))
+    input_name = source.graph.input[0].name
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Shape inference + optimasi graph sebelum quantization (disarankan ORT)
+        prepared_path = Path(tmp_dir) / "prepared.onnx"
+        try:
+            quant_pre_process(str(model_path), str(prepared_path))
+        except Exception as e:
+            print(f"Warning: quant_pre_process gagal ({e}), memakai model asli")
+            prepared_path = model_path
+
+        if mode == "dynamic":
+            quantize_dynamic(
+                str(prepared_path),
+                str(output_path),
+                weight_type=QuantType.QUInt8,
+                op_types_to_quantize=["Conv", "MatMul"],
+            )
+        else:
+            if not images:
+                raise ValueError("Quantization static butuh gambar kalibrasi (--images)")
+
+            class ImageCalibrationReader(CalibrationDataReader):
+                def __init__(self):
+                    self._inputs = iter_model_inputs(images, config.MODEL_INPUT_SIZE)
+
+                def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+                    batch = next(self._inputs, None)
+                    return None if batch is None else {input_name: batch}
+
+            quantize_static(
+                str(prepared_path),
+                str(output_path),
+                ImageCalibrationReader(),
+                quant_format=QuantFormat.QDQ,
+                per_channel=True,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                op_types_to_quantize=["Conv"],
+                calibrate_method=CalibrationMethod.MinMax,
+            )
+
+    copy_metadata(source, output_path)
+
+
+def export_fp16(model_path: Path, output_path: Path):
+    """Konversi bobot model ONNX ke FP16 (input/output tetap FP32)"""
+    from onnxruntime.transformers.float16 import convert_float_to_float16
+
+    source = onnx.load(str(model_path))
+    converted = convert_float_to_float16(source, keep_io_types=True)
+    onnx.save(converted, str(output_path))
+    copy_metadata(source, output_path)
+
+
+def box_iou(box: List[float], boxes: np.ndarray) -> np.ndarray:
+    """IoU satu box xyxy terhadap array box [N, 4]"""
+    if len(boxes) == 0:
+        return np.zeros(0)
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(area + areas - intersection, 1e-9)
+
+
+def match_detections(baseline: List[Dict], variant: List[Dict], stats: Dict[str, Dict]):
+    """
+    Cocokkan deteksi varian ke deteksi FP32 (kelas sama, IoU >= MATCH_IOU, greedy
+    berdasarkan confidence) dan akumulasi statistik per kelas
+    """
+    for cls in config.CARIES_CLASSES:
+        base = [det for det in baseline if det["class"] == cls]
+        other = sorted((det for det in variant if det["class"] == cls), key=lambda det: -det["confidence"])
+        entry = stats[cls]
+        entry["baseline"] += len(base)
+        entry["variant"] += len(other)
+
+        base_boxes = np.array([det["bbox"] for det in base], dtype=np.float64).reshape(-1, 4)
+        used = np.zeros(len(base), dtype=bool)
+        for det in other:
+            ious = box_iou(det["bbox"], base_boxes)
+            ious[used] = 0
+            if len(ious) and ious.max() >= MATCH_IOU:
+                index = int(ious.argmax())
+                used[index] = True
+                entry["matched"] += 1
+                entry["confidence_diff"].append(abs(det["confidence"] - base[index]["confidence"]))
+
+
+def run_model(model, image) -> tuple:
+    import server
+    start = time.perf_counter()
+    results = model.predict(source=image, conf=config.CONFIDENCE_THRESHOLD, iou=config.IOU_THRESHOLD, verbose=False)
+    elapsed = (time.perf_counter() - start) * 1000
+    return server.build_prediction_result(results[0] if results else None, elapsed), elapsed
+
+
+def compare(model_path: Path, precision: str, images: List[Path], repeat: int = 1) -> Dict:
+    """
+    Bandingkan varian presisi dengan model FP32 pada gambar yang sama
+
+    Returns:
+        Laporan: latency rata-rata per gambar, kesesuaian kelas utama, dan per kelas
+        jumlah deteksi, recall/precision relatif terhadap FP32, selisih confidence
+    """
+    variant = config.variant_path(model_path, precision)
+    if not variant.exists():
+        raise FileNotFoundError(f"Varian {variant} belum ada (python quantize.py export --precision {precision})")
+
+    # Model dibuat dan hasilnya dibentuk lewat server (letterbox, NMS, build_prediction_result)
+    # supaya perbandingan sama dengan yang dilayani endpoint; export tidak butuh server
+    import server
+    baseline_model = server.create_onnx_model(model_path)
+    variant_model = server.create_onnx_model(variant)
+
+    stats = {cls: {"baseline": 0, "variant": 0, "matched": 0, "confidence_diff": []} for cls in config.CARIES_CLASSES}
+    baseline_times, variant_times = [], []
+    top_class_agree = 0
+
+    for path in images:
+        image = decode_image(path.read_bytes(), config.DECODE_MAX_SIZE).image
+        # Run pertama sebagai warm-up, tidak dihitung
+        run_model(baseline_model, image)
+        run_model(variant_model, image)
+        for _ in range(repeat):
+            baseline_result, baseline_ms = run_model(baseline_model, image)
+            variant_result, variant_ms = run_model(variant_model, image)
+            baseline_times.append(baseline_ms)
+            variant_times.append(variant_ms)
+        top_class_agree += baseline_result["class"] == variant_result["class"]
+        match_detections(baseline_result["detections"], variant_result["detections"], stats)
+
+    per_class = {}
+    for cls, entry in stats.items():
+        diffs = entry.pop("confidence_diff")
+        per_class[cls] = {
+            **entry,
+            "recall": round(entry["matched"] / entry["baseline"], 4) if entry["baseline"] else None,
+            "precision": round(entry["matched"] / entry["variant"], 4) if entry["variant"] else None,
+            "mean_confidence_diff": round(statistics.fmean(diffs), 3) if diffs else None,
+        }
+
+    total_baseline = sum(entry["baseline"] for entry in per_class.values())
+    total_variant = sum(entry["variant"] for entry in per_class.values())
+    total_matched = sum(entry["matched"] for entry in per_class.values())
+    baseline_mean = statistics.fmean(baseline_times) if baseline_times else 0.0
+    variant_mean = statistics.fmean(variant_times) if variant_times else 0.0
+
+    return {
+        "baseline": str(model_path),
+        "variant": str(variant),
+        "precision": precision,
+        "images": len(images),
+        "latency_ms": {
+            "fp32": round(baseline_mean, 2),
+            precision: round(variant_mean, 2),
+            "speedup": round(baseline_mean / variant_mean, 3) if variant_mean else None,
+        },
+        "model_size_mb": {
+            "fp32": round(model_path.stat().st_size / 1e6, 2),
+            precision: round(variant.stat().st_size / 1e6, 2),
+        },
+        "top_class_agreement": round(top_class_agree / len(images), 4) if images else None,
+        "overall": {
+            "baseline": total_baseline,
+            "variant": total_variant,
+            "matched": total_matched,
+            "recall": round(total_matched / total_baseline, 4) if total_baseline else None,
+            "precision": round(total_matched / total_variant, 4) if total_variant else None,
+        },
+        "per_class": per_class,
+    }
+
+
+def print_report(report: Dict):
+    precision = report["precision"]
+    latency = report["latency_ms"]
+    print(f"Varian {precision}: {report['variant']} ({report['images']} gambar)")
+    print(f"  Latency/gambar: fp32 {latency['fp32']} ms, {precision} {latency[precision]} ms (speedup {latency['speedup']}x)")
+    print(f"  Ukuran model: {report['model_size_mb']}")
+    print(f"  Kelas utama sama: {report['top_class_agreement']}")
+    overall = report["overall"]
+    print(f"  Deteksi: fp32 {overall['baseline']}, {precision} {overall['variant']}, cocok {overall['matched']} "
+          f"(recall {overall['recall']}, precision {overall['precision']})")
+    for cls, entry in report["per_class"].items():
+        if entry["baseline"] or entry["variant"]:
+            print(f"    {cls}: fp32 {entry['baseline']}, {precision} {entry['variant']}, recall {entry['recall']}, "
+                  f"precision {entry['precision']}, selisih conf {entry['mean_confidence_diff']}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Varian INT8/FP16 model ONNX Dentalogic8")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("export", "Buat varian presisi rendah"), ("compare", "Laporan akurasi vs FP32")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--precision", required=True, choices=[p for p in config.MODEL_PRECISIONS if p != "fp32"])
+        sub.add_argument("--model", type=Path, default=config.ONNX_MODEL_PATH, help="Model ONNX FP32")
+        sub.add_argument("--images", type=Path, default=DEFAULT_IMAGES_DIR, help="Folder gambar kalibrasi/evaluasi")
+        sub.add_argument("--max-images", type=int, default=200)
+        if name == "export":
+            sub.add_argument("--mode", choices=QUANTIZE_MODES, default="static", help="Mode quantization INT8")
+        else:
+            sub.add_argument("--repeat", type=int, default=3, help="Jumlah run per gambar untuk latency")
+            sub.add_argument("--json", type=Path, help="Simpan laporan sebagai JSON")
+
+    args = parser.parse_args(argv)
+
+    if not args.model.exists():
+        print(f"Error: File {args.model} tidak ditemukan")
+        return 1
+    images = find_images(args.images, args.max_images)
+
+    if args.command == "export":
+        output = config.variant_path(args.model, args.precision)
+        start = time.time()
+        if args.precision == "int8":
+            if args.mode == "static":
+                print(f"Kalibrasi dengan {len(images)} gambar dari {args.images}")
+            export_int8(args.model, output, images, args.mode)
+        else:
+            export_fp16(args.model, output)
+        print(f"✅ Model {args.precision} tersimpan di {output} ({time.time() - start:.1f} s)")
+        return 0
+
+    if not images:
+        print(f"Error: Tidak ada gambar di {args.images}")
+        return 1
+    report = compare(args.model, args.precision, images, args.repeat)
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nLaporan disimpan di {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
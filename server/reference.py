@@ -0,0 +1,331 @@
+"""
+Implementasi referensi lama dari server.py (tidak dipakai endpoint)
+
+Dipertahankan sebagai baseline benchmark.py dan acuan ekuivalensi test_modules.py:
+- preprocess_image: resize LANCZOS ke input model tanpa letterbox
+- draw_bounding_boxes: annotasi dengan font dicari per panggilan
+- non_max_suppression / legacy_class_nms: NMS greedy per box (acuan nms.py)
+- legacy_build_prediction_result: konversi Results per box (acuan
+  server.build_prediction_result)
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import nms
+from config import CARIES_CLASSES, CONFIDENCE_THRESHOLD, IOU_THRESHOLD, MODEL_INPUT_SIZE
+
+
+def preprocess_image(image: Image.Image) -> np.ndarray:
+    """
+    Preprocess image untuk model ONNX (versi sederhana, tanpa letterbox)
+    
+    Backend ONNX memakai preprocessing.LetterboxPreprocessor.
+    
+    - Resize ke 640x640
+    - Convert ke RGB
+    - Normalize pixel values ke [0, 1]
+    - Convert ke format CHW [1, 3, 640, 640]
+    """
+    # Convert ke RGB jika perlu
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    
+    # Resize ke 640x640 dengan antialiasing
+    image = image.resize((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE), Image.Resampling.LANCZOS)
+    
+    # Convert ke numpy array
+    img_array = np.array(image, dtype=np.float32)
+    
+    # Normalize ke [0, 1]
+    img_array = img_array / 255.0
+    
+    # Convert dari HWC ke CHW format
+    # Original: (640, 640, 3) -> Target: (3, 640, 640)
+    img_array = np.transpose(img_array, (2, 0, 1))
+    
+    # Add batch dimension: (3, 640, 640) -> (1, 3, 640, 640)
+    img_array = np.expand_dims(img_array, axis=0)
+    
+    return img_array
+
+
+def draw_bounding_boxes(image: Image.Image, detections: List[Dict], line_width: int = 3) -> Image.Image:
+    """
+    Draw bounding boxes and labels on image
+    
+    Endpoint memakai annotate.AnnotationRenderer
+    (font di-resolve sekali, ukuran mengikuti resolusi, gambar langsung di output).
+    
+    Args:
+        image: PIL Image
+        detections: List of detection dicts with 'bbox', 'class', 'confidence'
+        line_width: Width of bounding box lines
+    
+    Returns:
+        PIL Image with bounding boxes drawn
+    """
+    # Create a copy of the image to draw on
+    img_with_boxes = image.copy()
+    draw = ImageDraw.Draw(img_with_boxes)
+    
+    # Color map for different classes
+    colors = {
+        'D0': (0, 255, 0),      # Green
+        'D1': (255, 255, 0),     # Yellow
+        'D2': (255, 165, 0),     # Orange
+        'D3': (255, 0, 0),       # Red
+        'D4': (255, 0, 255),     # Magenta
+        'D5': (128, 0, 128),     # Purple
+        'D6': (0, 0, 255),       # Blue
+    }
+    
+    # Try to load a font, fallback to default if not available
+    # Increased font size for better readability on mobile
+    try:
+        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 40)
+        font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)
+    except:
+        try:
+            # Try alternative font paths for different systems
+            font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 40)
+            font_small = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 28)
+        except:
+            try:
+                font = ImageFont.load_default()
+                font_small = ImageFont.load_default()
+            except:
+                font = None
+                font_small = None
+    
+    for det in detections:
+        bbox = det['bbox']
+        x1, y1, x2, y2 = bbox[0], bbox[1], bbox[2], bbox[3]
+        cls = det['class']
+        conf = det['confidence']
+        
+        # Get color for this class
+        color = colors.get(cls, (255, 255, 255))
+        
+        # Draw bounding box
+        draw.rectangle([x1, y1, x2, y2], outline=color, width=line_width)
+        
+        # Prepare label text
+        label = f"{cls} {conf:.1f}%"
+        
+        # Calculate text size
+        if font:
+            bbox_text = draw.textbbox((0, 0), label, font=font)
+            text_width = bbox_text[2] - bbox_text[0]
+            text_height = bbox_text[3] - bbox_text[1]
+        else:
+            text_width = len(label) * 6
+            text_height = 12
+        
+        # Draw background for text (increased padding for larger font)
+        text_bg = [x1, y1 - text_height - 12, x1 + text_width + 12, y1]
+        draw.rectangle(text_bg, fill=color)
+        
+        # Draw text (increased padding for larger font)
+        draw.text((x1 + 6, y1 - text_height - 6), label, fill=(0, 0, 0), font=font)
+    
+    return img_with_boxes
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    Non-Maximum Suppression untuk filter overlapping bounding boxes
+    
+    Greedy, satu kelas. Backend ONNX memakai nms.batched_nms; fungsi ini
+    baseline dan acuan cek ekuivalensi.
+    
+    Args:
+        boxes: Array of shape [N, 4] dengan format [x1, y1, x2, y2]
+        scores: Array of shape [N] dengan confidence scores
+        iou_threshold: IoU threshold untuk NMS
+    
+    Returns:
+        Indices of boxes to keep
+    """
+    if len(boxes) == 0:
+        return np.array([], dtype=np.int32)
+    
+    # Extract coordinates
+    x1 = boxes[:, 0]
+    y1 = boxes[:, 1]
+    x2 = boxes[:, 2]
+    y2 = boxes[:, 3]
+    
+    # Calculate areas
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    
+    # Sort by score (descending)
+    order = scores.argsort()[::-1]
+    
+    keep = []
+    while len(order) > 0:
+        # Take the box with highest score
+        i = order[0]
+        keep.append(i)
+        
+        if len(order) == 1:
+            break
+        
+        # Calculate IoU with remaining boxes
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        
+        w = np.maximum(0, xx2 - xx1 + 1)
+        h = np.maximum(0, yy2 - yy1 + 1)
+        intersection = w * h
+        
+        iou = intersection / (areas[i] + areas[order[1:]] - intersection)
+        
+        # Keep boxes with IoU < threshold
+        inds = np.where(iou <= iou_threshold)[0]
+        order = order[inds + 1]
+    
+    return np.array(keep, dtype=np.int32)
+
+
+def random_boxes(count: int, width: int = 1280, height: int = 960, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Box xyxy, score dan class acak (float32) untuk microbenchmark"""
+    rng = np.random.default_rng(seed)
+    centers = rng.random((count, 2)) * (width, height)
+    sizes = rng.random((count, 2)) * (width / 4, height / 4) + 4
+    boxes = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1).astype(np.float32)
+    scores = rng.random(count).astype(np.float32)
+    classes = rng.integers(0, len(CARIES_CLASSES), count).astype(np.float32)
+    return boxes, scores, classes
+
+
+def legacy_class_nms(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray, iou: float) -> np.ndarray:
+    """NMS per kelas seperti backend ONNX sebelumnya: non_max_suppression() pada box yang digeser offset kelas"""
+    span = float(boxes.max() - boxes.min()) + 2
+    return non_max_suppression(boxes + classes[:, None] * span, scores, iou)
+
+
+def check_nms_equivalence(counts: List[int]) -> List[str]:
+    """
+    Bandingkan nms.py dengan non_max_suppression() pada box acak
+
+    Returns:
+        List pesan kegagalan (kosong = semua ekuivalen)
+    """
+    failures = []
+    iou = IOU_THRESHOLD
+    for count in counts:
+        for seed in range(3):
+            boxes, scores, classes = random_boxes(count, seed=seed)
+            case = f"{count} boxes, seed {seed}"
+
+            expected = non_max_suppression(boxes, scores, iou)
+            keep, kept_scores = nms.nms(boxes, scores, iou)
+            if not np.array_equal(keep, expected):
+                failures.append(f"hard: {case}")
+            if not np.array_equal(kept_scores, scores[expected]):
+                failures.append(f"hard scores: {case}")
+
+            expected = legacy_class_nms(boxes, scores, classes, iou)
+            keep, _ = nms.nms(boxes, scores, iou, classes=classes)
+            if not np.array_equal(keep, expected):
+                failures.append(f"class-aware: {case}")
+
+            # top_k >= jumlah kandidat dan max_det tidak boleh mengubah urutan hasil
+            keep_topk, _ = nms.nms(boxes, scores, iou, classes=classes, top_k=count, max_det=10)
+            if not np.array_equal(keep_topk, expected[:10]):
+                failures.append(f"top_k/max_det: {case}")
+
+            conf = CONFIDENCE_THRESHOLD
+            mask = np.flatnonzero(scores >= conf)
+            expected = mask[legacy_class_nms(boxes[mask], scores[mask], classes[mask], iou)]
+            keep, _ = nms.nms(boxes, scores, iou, classes=classes, score_threshold=conf)
+            if not np.array_equal(keep, expected):
+                failures.append(f"score_threshold: {case}")
+
+        # Batch [B, N, 4] = NMS per gambar
+        batch = [random_boxes(count, seed=seed) for seed in range(3)]
+        results = nms.batched_nms(
+            np.stack([b for b, _, _ in batch]), np.stack([s for _, s, _ in batch]), iou,
+            classes=np.stack([c for _, _, c in batch]),
+        )
+        for (keep, _), (boxes, scores, classes) in zip(results, batch):
+            if not np.array_equal(keep, nms.nms(boxes, scores, iou, classes=classes)[0]):
+                failures.append(f"batched: {count} boxes")
+
+    # Soft-NMS: box yang tidak overlap tidak berubah skornya, box identik diturunkan
+    boxes = np.array([[0, 0, 10, 10], [0, 0, 10, 10], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+    for method in ("linear", "gaussian"):
+        keep, kept_scores = nms.nms(boxes, scores, iou, method=method)
+        by_index = dict(zip(keep.tolist(), kept_scores.tolist()))
+        if by_index.get(0) != scores[0] or by_index.get(2) != scores[2] or by_index.get(1, 0) >= scores[1]:
+            failures.append(f"soft-nms {method}: {by_index}")
+    return failures
+
+
+def legacy_build_prediction_result(result, inference_time: float) -> Dict:
+    """
+    Konversi YOLO Results menjadi response /predict dengan loop per box
+
+    Implementasi lama predict_caries() server.py (satu .cpu().numpy() per box);
+    server.build_prediction_result harus menghasilkan dictionary yang sama.
+    """
+    detections = []
+    filtered_boxes = []
+
+    if result.boxes is not None and len(result.boxes) > 0:
+        for box in result.boxes:
+            bbox = box.xyxy[0].cpu().numpy()
+            x1, y1, x2, y2 = float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3])
+            cls_id = int(box.cls[0].cpu().numpy())
+            conf = float(box.conf[0].cpu().numpy())
+
+            # Nama kelas dari result.names, fallback ke index CARIES_CLASSES
+            if cls_id in result.names:
+                class_name = result.names[cls_id]
+            elif cls_id < len(CARIES_CLASSES):
+                class_name = CARIES_CLASSES[cls_id]
+            else:
+                class_name = "D0"
+
+            # Nama di luar format D0-D6 diganti berdasarkan index
+            if class_name not in CARIES_CLASSES and not (class_name.startswith('D') and len(class_name) == 2):
+                class_name = CARIES_CLASSES[cls_id] if cls_id < len(CARIES_CLASSES) else "D0"
+
+            detections.append({
+                "bbox": [x1, y1, x2, y2],
+                "class": class_name,
+                "confidence": conf * 100
+            })
+            filtered_boxes.append([x1, y1, x2, y2])
+
+    if len(detections) > 0:
+        best_detection = max(detections, key=lambda x: x['confidence'])
+        predicted_class = best_detection['class']
+        confidence = float(best_detection['confidence'])
+    else:
+        predicted_class = "D0"
+        confidence = 0.0
+
+    class_probs = {cls: 0.0 for cls in CARIES_CLASSES}
+    for det in detections:
+        cls = det['class']
+        conf = det['confidence'] / 100.0
+        if cls in class_probs:
+            class_probs[cls] = max(class_probs[cls], conf)
+
+    return {
+        "class": str(predicted_class),
+        "confidence": float(confidence),
+        "allProbabilities": [
+            {"class": cls, "probability": float(class_probs[cls] * 100)}
+            for cls in CARIES_CLASSES
+        ],
+        "inferenceTime": float(round(inference_time, 2)),
+        "detections": detections,
+        "boundingBoxes": filtered_boxes
+    }
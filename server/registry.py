@@ -0,0 +1,463 @@
+"""
+Registry model: beberapa model bernama resident di memori, hot-swap versi tanpa downtime
+
+- Setiap nama model (misal "default", "v2") punya satu versi aktif
+- Versi baru di-load dan di-warm-up di thread background, lalu di-swap secara
+  atomik: request yang sedang berjalan tetap memakai versi lama sampai selesai
+  (lease), request berikutnya langsung memakai versi baru
+- Versi lama dilepas (instance model dibuang + gc.collect) setelah lease
+  terakhirnya selesai, sehingga memorinya kembali
+- Satu versi memegang pool instance model: satu per worker yang memakainya,
+  karena model Ultralytics tidak thread-safe untuk dipakai bersama
+- Versi = prefix hash SHA-256 isi file model, sama di semua worker untuk
+  checkpoint yang sama
+"""
+import gc
+import hashlib
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# Panjang prefix hex hash file yang dipakai sebagai versi
+VERSION_LENGTH = 12
+
+
+class ModelNotFoundError(LookupError):
+    """Nama model tidak terdaftar di registry"""
+
+    def __init__(self, name: str, available: Sequence[str]):
+        super().__init__(f"Unknown model '{name}', expected one of {tuple(available)}")
+        self.name = name
+        self.available = list(available)
+
+
+class ModelUnavailableError(RuntimeError):
+    """
+    Model terdaftar tetapi belum punya versi aktif (belum di-load atau load gagal),
+    atau versi yang diminta (version) sudah tidak ada di process ini
+    """
+
+    def __init__(self, name: str, version: Optional[str] = None):
+        if version is None:
+            super().__init__(f"Model '{name}' is not loaded")
+        else:
+            super().__init__(f"Model '{name}' version {version} is not loaded")
+        self.name = name
+        self.version = version
+
+
+class ModelRef(NamedTuple):
+    """Referensi versi model yang bisa di-pickle (dikirim ke worker process)"""
+    name: str
+    version: str
+
+
+def parse_model_specs(value: str) -> Dict[str, Path]:
+    """
+    Parse daftar model "nama=path,nama2=path2" (DENTALOGIC_MODELS)
+
+    Raises:
+        ValueError: Jika ada entry tanpa nama atau path
+    """
+    specs = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, path = (part.strip() for part in entry.partition("="))
+        if not sep or not name or not path:
+            raise ValueError(f"Invalid model entry '{entry}', expected name=path")
+        specs[name] = Path(path)
+    return specs
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """(ukuran, mtime) file untuk deteksi perubahan murah; None jika file tidak ada"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def file_version(path: Path) -> str:
+    """Versi model dari hash SHA-256 isi file (prefix hex)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:VERSION_LENGTH]
+
+
+class ModelVersion:
+    """
+    Satu versi model yang sudah di-load
+
+    Args:
+        name: Nama model di registry
+        version: Label versi (misal hasil file_version)
+        path: File model
+        instances: Instance model; kosong = hanya metadata (model dipegang process lain)
+        signature: (ukuran, mtime) file saat di-load, untuk watcher
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        path: Path,
+        instances: Sequence,
+        signature: Optional[Tuple[int, int]] = None,
+    ):
+        self.name = name
+        self.version = version
+        self.path = path
+        self.instances = list(instances)
+        self.names: Dict[int, str] = dict(self.instances[0].names) if self.instances else {}
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.load_ms = 0.0
+        self.warmup_ms = 0.0
+        self.warmed = False
+
+        self._pool: "queue.SimpleQueue" = queue.SimpleQueue()
+        for instance in self.instances:
+            self._pool.put(instance)
+        # Diubah registry di bawah lock-nya
+        self.leases = 0
+        self.retired = False
+
+    @property
+    def ref(self) -> ModelRef:
+        return ModelRef(self.name, self.version)
+
+    @contextmanager
+    def instance(self) -> Iterator[object]:
+        """Pinjam satu instance model selama blok (menunggu jika semua sedang dipakai)"""
+        if not self.instances:
+            raise ModelUnavailableError(self.name)
+        model = self._pool.get()
+        try:
+            yield model
+        finally:
+            self._pool.put(model)
+
+    def close(self):
+        """Buang referensi ke semua instance supaya memorinya bisa dibebaskan"""
+        self.instances = []
+        while True:
+            try:
+                self._pool.get_nowait()
+            except queue.Empty:
+                break
+
+    def info(self) -> Dict:
+        """Status versi untuk /health"""
+        return {
+            "version": self.version,
+            "path": str(self.path),
+            "instances": len(self.instances),
+            "loaded_at": round(self.loaded_at, 3),
+            "load_ms": round(self.load_ms, 1),
+            "warmup_ms": round(self.warmup_ms, 1),
+            "warmed": self.warmed,
+            "in_flight": self.leases,
+        }
+
+
+class ModelLease:
+    """
+    Pemakaian satu ModelVersion oleh satu request
+
+    Selama lease belum dilepas, versi tidak dibuang walaupun sudah di-swap.
+    Dipakai sebagai context manager (`with registry.acquire(name) as version`)
+    atau dilepas manual dengan release().
+    """
+
+    def __init__(self, registry: "ModelRegistry", version: ModelVersion):
+        self.version = version
+        self._registry = registry
+        self._released = False
+
+    def __enter__(self) -> ModelVersion:
+        return self.version
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._registry._end_lease(self.version)
+
+
+class ModelRegistry:
+    """
+    Model bernama dengan satu versi aktif per nama
+
+    Args:
+        factory: Fungsi (name, path, **options) -> ModelVersion yang me-load
+            (dan warm-up) satu versi; dipanggil di luar lock registry
+        default: Nama model untuk request tanpa pilihan model
+    """
+
+    def __init__(self, factory: Callable[..., ModelVersion], default: str = "default"):
+        self.factory = factory
+        self.default = default
+
+        self._paths: Dict[str, Path] = {}
+        self._active: Dict[str, ModelVersion] = {}
+        self._draining: List[ModelVersion] = []
+        self._errors: Dict[str, str] = {}
+        self._loaders: Dict[str, threading.Thread] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._swaps = 0
+        self._released = 0
+
+        self._watcher: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+
+    def register(self, name: str, path: Path):
+        """Daftarkan nama model dengan file-nya (belum di-load)"""
+        with self._lock:
+            self._paths[name] = Path(path)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._paths)
+
+    def _check(self, name: str):
+        # Dipanggil di bawah self._lock
+        if name not in self._paths:
+            raise ModelNotFoundError(name, list(self._paths))
+
+    def path(self, name: Optional[str] = None) -> Path:
+        """File terdaftar untuk model name"""
+        name = name or self.default
+        with self._lock:
+            self._check(name)
+            return self._paths[name]
+
+    def get(self, name: Optional[str] = None) -> Optional[ModelVersion]:
+        """Versi aktif model name (None jika belum di-load), tanpa lease"""
+        name = name or self.default
+        with self._lock:
+            self._check(name)
+            return self._active.get(name)
+
+    def find(self, ref: ModelRef) -> Optional[ModelVersion]:
+        """
+        Versi persis ref (aktif atau masih dipakai request setelah swap)
+
+        Returns:
+            None jika versi itu tidak ada di process ini (tidak ada fallback
+            ke versi lain; pemanggil yang memutuskan)
+        """
+        with self._lock:
+            for version in [self._active.get(ref.name), *self._draining]:
+                if version is not None and version.ref == ref:
+                    return version
+            return None
+
+    def acquire(self, name: Optional[str] = None) -> ModelLease:
+        """
+        Lease versi aktif model name untuk satu request
+
+        Raises:
+            ModelNotFoundError: Nama tidak terdaftar
+            ModelUnavailableError: Belum ada versi aktif
+        """
+        name = name or self.default
+        with self._lock:
+            self._check(name)
+            version = self._active.get(name)
+            if version is None:
+                raise ModelUnavailableError(name)
+            version.leases += 1
+        return ModelLease(self, version)
+
+    def _end_lease(self, version: ModelVersion):
+        with self._lock:
+            version.leases -= 1
+            release = version.retired and version.leases == 0 and version in self._draining
+            if release:
+                self._draining.remove(version)
+        if release:
+            self._release(version)
+
+    def _release(self, version: ModelVersion):
+        version.close()
+        with self._lock:
+            self._released += 1
+        gc.collect()
+        print(f"Model {version.name} version {version.version} released")
+
+    def install(self, version: ModelVersion) -> Optional[ModelVersion]:
+        """
+        Jadikan version versi aktif untuk namanya (atomik)
+
+        Versi lama langsung dilepas jika tidak ada request yang memakainya,
+        jika masih ada, dilepas saat lease terakhirnya selesai.
+
+        Returns:
+            Versi yang digantikan (None jika belum ada)
+        """
+        with self._lock:
+            self._paths[version.name] = version.path
+            self._errors.pop(version.name, None)
+            old = self._active.get(version.name)
+            self._active[version.name] = version
+            release = False
+            if old is not None and old is not version:
+                self._swaps += 1
+                old.retired = True
+                if old.leases:
+                    self._draining.append(old)
+                else:
+                    release = True
+        if release:
+            self._release(old)
+        return old
+
+    def load(self, name: Optional[str] = None, path: Optional[Path] = None, **options) -> ModelVersion:
+        """
+        Load versi baru model name (blocking), lalu swap ke versi aktif
+
+        Args:
+            path: File model baru (default file terdaftar); nama baru boleh
+                didaftarkan dengan memberikan path
+            options: Diteruskan ke factory
+
+        Raises:
+            ModelNotFoundError: Nama tidak terdaftar dan path tidak diberikan
+        """
+        name = name or self.default
+        with self._lock:
+            if path is None:
+                self._check(name)
+                path = self._paths[name]
+            lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Satu load per nama sekaligus; load nama lain tetap bisa paralel
+        with lock:
+            try:
+                version = self.factory(name, Path(path), **options)
+            except Exception as e:
+                with self._lock:
+                    self._errors[name] = str(e)
+                raise
+            self.install(version)
+        return version
+
+    def load_async(self, name: Optional[str] = None, path: Optional[Path] = None, **options) -> bool:
+        """
+        load() di thread background
+
+        Returns:
+            False jika load untuk nama ini masih berjalan (tidak memulai load baru)
+        """
+        name = name or self.default
+        with self._lock:
+            if path is None:
+                self._check(name)
+            loader = self._loaders.get(name)
+            if loader is not None and loader.is_alive():
+                return False
+            loader = threading.Thread(
+                target=self._load_background,
+                args=(name, path),
+                kwargs=options,
+                name=f"model-loader-{name}",
+                daemon=True,
+            )
+            self._loaders[name] = loader
+        loader.start()
+        return True
+
+    def _load_background(self, name: str, path: Optional[Path], **options):
+        try:
+            self.load(name, path, **options)
+        except Exception as e:
+            print(f"Warning: Failed to load model {name}: {e}")
+
+    def loading(self, name: Optional[str] = None) -> bool:
+        """True jika load background untuk name masih berjalan"""
+        with self._lock:
+            loader = self._loaders.get(name or self.default)
+        return loader is not None and loader.is_alive()
+
+    def error(self, name: Optional[str] = None) -> Optional[str]:
+        """Error load terakhir untuk name (None jika load terakhir berhasil)"""
+        with self._lock:
+            return self._errors.get(name or self.default)
+
+    def check_changes(self):
+        """Reload (background) model yang file-nya berubah sejak versi aktif di-load"""
+        with self._lock:
+            active = list(self._active.values())
+        for version in active:
+            signature = file_signature(version.path)
+            if signature is None or version.signature is None or signature == version.signature:
+                continue
+            if self.loading(version.name):
+                continue
+            try:
+                changed = file_version(version.path) != version.version
+            except OSError:
+                # File sedang diganti; dicek lagi di interval berikutnya
+                continue
+            if changed:
+                print(f"Model file {version.path} changed, reloading {version.name}")
+                self.load_async(version.name)
+            else:
+                version.signature = signature
+
+    def watch(self, interval: float):
+        """Cek perubahan file model setiap interval detik di thread background (idempotent)"""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._watch_stop.clear()
+
+        def loop():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self.check_changes()
+                except Exception as e:
+                    print(f"Warning: Model watcher error: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watch(self):
+        self._watch_stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def stats(self) -> Dict:
+        """Status semua model untuk /health"""
+        with self._lock:
+            paths = dict(self._paths)
+            active = dict(self._active)
+            errors = dict(self._errors)
+            draining = [{"name": version.name, **version.info()} for version in self._draining]
+            swaps, released = self._swaps, self._released
+        return {
+            "default": self.default,
+            "models": {
+                name: {
+                    "path": str(path),
+                    "active": active[name].info() if name in active else None,
+                    "loading": self.loading(name),
+                    "error": errors.get(name),
+                }
+                for name, path in paths.items()
+            },
+            "draining": draining,
+            "swaps": swaps,
+            "released": released,
+        }
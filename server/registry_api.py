@@ -0,0 +1,101 @@
+"""
+Endpoint registry model (GET /models, POST /models/{name}/reload), lihat registry.py
+"""
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse
+
+from api import require_admin
+from config import INFERENCE_EXECUTOR, MODEL_BACKEND, MODEL_DIR
+from metrics import Counter
+from registry import ModelRegistry
+
+
+def resolve_reload_path(path: str) -> Path:
+    """
+    Path file model untuk reload, relatif ke MODEL_DIR (path absolut juga harus di dalamnya)
+
+    Raises:
+        HTTPException 400: Jika path keluar dari MODEL_DIR (termasuk lewat .. atau symlink)
+    """
+    model_dir = MODEL_DIR.resolve()
+    model_path = (model_dir / path).resolve()
+    if not model_path.is_relative_to(model_dir):
+        raise HTTPException(status_code=400, detail=f"path harus berada di dalam {MODEL_DIR}")
+    return model_path
+
+
+def create_router(registry: ModelRegistry, errors: Counter) -> APIRouter:
+    """
+    Router status dan hot-swap model
+
+    Args:
+        registry: Registry model server
+        errors: Counter error per tipe (/metrics)
+    """
+    router = APIRouter()
+
+    @router.get("/models")
+    async def list_models():
+        """Model di registry: versi aktif, status load, dan versi lama yang masih dipakai request"""
+        return registry.stats()
+
+    @router.post("/models/{name}/reload")
+    async def reload_model(
+        name: str,
+        path: Optional[str] = None,
+        wait: bool = False,
+        x_admin_token: Optional[str] = Header(None)
+    ):
+        """
+        Hot-swap model: load versi baru di background, warm-up, lalu swap atomik
+
+        Request yang sedang berjalan selesai dengan versi lama; versi lama dilepas
+        dari memori setelah request terakhirnya selesai. Hanya berlaku untuk process
+        server yang menerima request ini (multi-worker: pakai DENTALOGIC_MODEL_WATCH_INTERVAL).
+
+        Args:
+            name: Nama model di registry
+            path: File model baru, relatif ke DENTALOGIC_MODEL_DIR (default file terdaftar);
+                nama baru didaftarkan dengan path
+            wait: true = response dikirim setelah versi baru aktif
+
+        Returns:
+            202 {"name", "status": "loading"}, atau 200 dengan versi baru jika wait=true
+        """
+        require_admin(x_admin_token)
+        if INFERENCE_EXECUTOR != "thread":
+            raise HTTPException(
+                status_code=409,
+                detail="Hot-swap hanya didukung executor thread; restart worker untuk executor process"
+            )
+        model_path = resolve_reload_path(path) if path else None
+        if model_path is None and name not in registry.names():
+            raise HTTPException(
+                status_code=404,
+                detail=f"Model {name} tidak terdaftar; berikan path untuk mendaftarkan model baru"
+            )
+        if model_path is not None and MODEL_BACKEND != "stub" and not model_path.is_file():
+            raise HTTPException(status_code=400, detail=f"File model tidak ditemukan: {path}")
+        if registry.loading(name):
+            raise HTTPException(status_code=409, detail=f"Model {name} sedang di-load")
+
+        if wait:
+            try:
+                version = await asyncio.to_thread(registry.load, name, model_path)
+            except Exception as e:
+                errors.inc(type=type(e).__name__)
+                raise HTTPException(status_code=500, detail=f"Gagal me-load model {name}: {str(e)}")
+            return {"name": name, "status": "active", **version.info()}
+
+        if not registry.load_async(name, model_path):
+            raise HTTPException(status_code=409, detail=f"Model {name} sedang di-load")
+        return JSONResponse(
+            status_code=202,
+            content={"name": name, "status": "loading", "statusUrl": "/models"}
+        )
+
+    return router
@@ -0,0 +1,94 @@
+"""
+Format response endpoint prediksi (content negotiation)
+
+- "json" (default): shape JSON yang sudah ada (detections + boundingBoxes, annotatedImage base64)
+- "columnar": JSON kolumnar, diserialisasi dengan orjson jika ter-install
+- "msgpack": MessagePack kolumnar, annotatedImage berupa bytes JPEG mentah (tanpa base64)
+
+Bentuk kolumnar: koordinat tidak diduplikasi di boundingBoxes, deteksi menjadi
+satu array datar per kolom:
+
+    "detections": {
+        "count": 2,
+        "boxes": [x1, y1, x2, y2, x1, y1, x2, y2],
+        "classes": ["D2", "D1"],
+        "confidences": [80.1, 45.3]
+    }
+"""
+import json
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # fallback ke json stdlib
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # format msgpack tidak tersedia
+    msgpack = None
+
+RESPONSE_FORMATS = ("json", "columnar", "msgpack")
+
+# Media type yang dikenali di header Accept
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+COLUMNAR_MEDIA_TYPE = "application/vnd.dentalogic.columnar+json"
+
+
+def is_available(response_format: str) -> bool:
+    """Format bisa dipakai di server ini (msgpack butuh library msgpack)"""
+    return response_format != "msgpack" or msgpack is not None
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    Pilih format dari header Accept (media type pertama yang dikenali, q > 0)
+
+    Format yang library-nya tidak ter-install dilewati, fallback "json".
+    """
+    for entry in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        if any(param.replace(" ", "") in ("q=0", "q=0.0") for param in params):
+            continue
+        media_type = media_type.lower()
+        if media_type in MSGPACK_MEDIA_TYPES and is_available("msgpack"):
+            return "msgpack"
+        if media_type == COLUMNAR_MEDIA_TYPE:
+            return "columnar"
+    return "json"
+
+
+def to_columnar(result: Dict) -> Dict:
+    """Ubah detections + boundingBoxes di result menjadi bentuk kolumnar (in-place)"""
+    detections = result.pop('detections', None) or []
+    result.pop('boundingBoxes', None)
+    result['detections'] = {
+        "count": len(detections),
+        "boxes": [coord for det in detections for coord in det['bbox']],
+        "classes": [det['class'] for det in detections],
+        "confidences": [det['confidence'] for det in detections],
+    }
+    return result
+
+
+def render_response(content: Dict, response_format: str, status_code: int = 200) -> Response:
+    """
+    Serialisasi content sesuai format
+
+    Response negotiated selalu membawa header Vary: Accept supaya cache HTTP
+    tidak mencampur format.
+    """
+    headers = {"Vary": "Accept"}
+    if response_format == "msgpack":
+        # Float 32-bit: cukup untuk koordinat pixel dan confidence, payload lebih kecil
+        body = msgpack.packb(content, use_bin_type=True, use_single_float=True)
+        return Response(body, status_code=status_code, media_type="application/msgpack", headers=headers)
+    if response_format == "columnar":
+        if orjson is not None:
+            body = orjson.dumps(content)
+        else:
+            body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return Response(body, status_code=status_code, media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+    return JSONResponse(content=content, status_code=status_code, headers=headers)
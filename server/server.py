@@ -1,19 +1,81 @@
 """
-FastAPI Server untuk Deteksi Karies Gigi menggunakan YOLO Model (.pt)
+FastAPI Server untuk Deteksi Karies Gigi menggunakan YOLO Model (.pt atau .onnx)
+
+Library berat (ultralytics/torch, onnxruntime) baru di-import saat model di-load,
+dan model di-load di thread background: /live langsung menjawab, /ready
+menjawab 200 setelah model siap dipakai.
 """
-import os
 import time
+_import_start = time.perf_counter()
+
+import os
+import threading
+
+# Config (termasuk config autotune: thread per worker, batch) dibaca sebelum numpy
+# di-import supaya jumlah thread BLAS/OpenMP ikut terkunci
+from config import (
+    MODEL_PATH, MODEL_INPUT_SIZE, MODEL_BACKENDS, MODEL_BACKEND, ONNX_MODEL_PATH,
+    ORT_INTRA_OP_THREADS, ORT_INTER_OP_THREADS, MODEL_PRECISIONS, MODEL_PRECISION,
+    PREPROCESS_RESAMPLE, DEFAULT_MODEL_NAME, MODEL_SPECS, MODEL_DEFAULT, MODEL_WATCH_INTERVAL,
+    CARIES_CLASSES, CONFIDENCE_THRESHOLD, IOU_THRESHOLD, NMS_METHOD, NMS_TOP_K,
+    NMS_MAX_DET, NMS_SIGMA, DECODE_MAX_SIZE, COORDINATE_MODES, COORDINATE_DEFAULT, TILING_DEFAULT,
+    TILE_DECODE_MAX_SIZE, TILE_SIZE, TILE_OVERLAP, TILE_MAX, TILE_FULL_IMAGE, TILE_MERGE_IOU,
+    THUMB_MAX_SIZE, THUMB_JPEG_QUALITY, FULL_JPEG_QUALITY,
+    ANNOTATION_FONT, DELIVERY_MODES, IMAGE_STORE_TTL, IMAGE_STORE_MAX_MB, RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_MB, RESULT_CACHE_TTL, RESULT_CACHE_DIR,
+    RESULT_CACHE_DISK_MAX_MB, BATCH_MAX_FILES, UPLOAD_MAX_BYTES,
+    UPLOAD_FORM_OVERHEAD, JOBS_ENABLED, JOBS_DIR, JOB_WORKERS, JOB_MAX_FILES,
+    JOB_RETENTION, JOB_MAX_JOBS, JOB_LEASE, WEBHOOK_ALLOWED_HOSTS, JOB_POLL_INTERVAL,
+    JOB_SWEEP_INTERVAL, JOB_WEBHOOK_TIMEOUT, LIVE_MAX_FPS, LIVE_MAX_CONNECTIONS,
+    LIVE_DECODE_MAX_SIZE, INFERENCE_EXECUTOR, INFERENCE_WORKERS, MODEL_INSTANCES, INFERENCE_MAX_QUEUE,
+    INFERENCE_RETRY_AFTER, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, WARMUP_BATCHES, WARMUP_BATCH_SIZE,
+    TORCH_THREADS, BACKGROUND_LOAD, PROFILE_ENABLED, PROFILE_SAMPLE_RATE, PROFILE_ENGINE,
+    PROFILE_DIR, PROFILE_MAX_FILES, PROFILE_MAX_MB,
+    tuned_config, variant_path,
+)
+
 import numpy as np
 from pathlib import Path
-from typing import List, Dict
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import uuid
+from typing import List, Dict, NamedTuple, Optional, Tuple
+from fastapi import FastAPI, File, UploadFile, HTTPException, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from PIL import Image, ImageDraw, ImageFont
+from fastapi.responses import JSONResponse, Response
+from PIL import Image
 import io
 import uvicorn
 import base64
-from ultralytics import YOLO
+import asyncio
+import copy
+import functools
+import json
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import jobs_api
+import live_api
+import profiling_api
+import registry_api
+from annotate import AnnotationRenderer
+from api import get_view_name, require_admin, resolve_render, validate_option
+from cache import DiskCache, LRUCache, ResultCache, content_key
+from inference import InferenceExecutor, MicroBatcher, QueueFullError
+from jobs import JobItem, JobStore, WebhookRejected, check_webhook_url
+from metrics import Counter, StageMetrics, render_prometheus
+from nms import NMS_METHODS, batched_nms
+from onnx_backend import OnnxBoxes, OnnxResults
+from preprocessing import DecodedImage, LetterboxPreprocessor, decode_image
+from profiling import (
+    PROFILE_MODES, ProfileRequest, ProfileSampler, ProfileSession, ProfileStore,
+    engine_available, profiling_active, torch_profile,
+)
+from registry import (
+    ModelNotFoundError, ModelRef, ModelRegistry, ModelUnavailableError, ModelVersion,
+    file_signature, file_version,
+)
+from responses import RESPONSE_FORMATS, is_available, negotiate_format, render_response, to_columnar
+from tiling import TilePlan, merge_tile_boxes, plan_tiles
+from uploads import BodySizeLimitMiddleware, UploadRejected, read_upload
 
 # Inisialisasi FastAPI app
 app = FastAPI(
@@ -31,155 +93,391 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Konfigurasi
-MODEL_PATH = Path(__file__).parent.parent / "model" / "best.pt"
-MODEL_INPUT_SIZE = 640
-CARIES_CLASSES = ['D0', 'D1', 'D2', 'D3', 'D4', 'D5', 'D6']
+# Body request yang melewati batas ditolak (413) sebelum selesai di-parse
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/predict": UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD,
+        "/predict/batch": (UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD) * BATCH_MAX_FILES,
+        "/jobs": (UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD) * JOB_MAX_FILES,
+    },
+)
+
+# Global variables untuk model (versi aktif setiap model ada di model_registry)
+model_warmed = False
+# Lock supaya load model di thread background dan request pertama tidak load dua kali
+_model_lock = threading.Lock()
+# True di worker process executor "process" (process ini yang memegang instance model)
+_inference_process = False
+# Buffer input /ws/live milik worker process (executor "process", lihat get_live_preprocessor)
+_live_preprocessor = None
+
+# Status loader model (thread background) dan durasi fase startup dalam ms
+model_loader = None
+model_load_error = None
+startup_timings: Dict[str, float] = {}
+
+
+class ClassLookup(NamedTuple):
+    """Lookup class id model -> nama kelas, dibangun sekali per model"""
+    names: np.ndarray  # nama kelas per class id (object array); index terakhir = fallback "D0"
+    caries_index: np.ndarray  # index kelas di CARIES_CLASSES per class id (-1 jika tidak ada)
+
+
+# Lookup class id per model.names (beberapa model bisa resident sekaligus)
+_class_lookups: Dict[Tuple[Tuple[int, str], ...], ClassLookup] = {}
+
+# Metrics latency per stage dan executor (dibuat saat startup)
+inference_metrics = StageMetrics()
+
+# Counter untuk /metrics
+request_counter = Counter("dentalogic_requests_total", "HTTP request per endpoint dan status", ("endpoint", "status"))
+error_counter = Counter("dentalogic_errors_total", "Error prediksi per tipe", ("type",))
+detection_counter = Counter("dentalogic_detections_total", "Jumlah deteksi per kelas", ("class",))
+
+# Endpoint yang durasinya dicatat sebagai stage "total"
+PREDICT_ENDPOINTS = ("/predict", "/predict/batch")
+inference_executor = None
+micro_batcher = None
+
+# JPEG annotasi untuk delivery "link" (GET /images/{id})
+annotated_image_store = LRUCache(
+    max_entries=0,
+    ttl_seconds=IMAGE_STORE_TTL,
+    max_bytes=IMAGE_STORE_MAX_MB * 1024 * 1024,
+)
+
+# Cache hasil prediksi (dibuat saat startup jika aktif)
+result_cache = None
 
-# Global variables untuk model
-yolo_model = None
-model_loaded = False
+# Renderer annotasi (font di-resolve sekali saat import)
+annotation_renderer = AnnotationRenderer(ANNOTATION_FONT)
+
+# Output profile (mode "store" dan sampling); sampler dibuat saat startup jika aktif
+profile_store = ProfileStore(PROFILE_DIR, max_files=PROFILE_MAX_FILES, max_bytes=PROFILE_MAX_MB * 1024 * 1024)
+profile_sampler = None
+
+# Antrian job asynchronous dan task worker job (dibuat saat startup jika aktif)
+job_store = None
+job_workers: List[asyncio.Task] = []
+# Waktu sweep retensi job terakhir (0 = sweep pertama saat worker job start)
+last_job_sweep = 0.0
+# Item job yang sedang berjalan di inference executor (process ini)
+jobs_inflight = 0
+
+
+
+def get_model_path() -> Path:
+    """Path file model sesuai backend dan presisi yang dipilih"""
+    if MODEL_BACKEND == "onnx":
+        return variant_path(ONNX_MODEL_PATH, MODEL_PRECISION)
+    return MODEL_PATH
+
+
+def create_onnx_model(model_path: Path):
+    """Buat OnnxYOLO dengan preprocessing dan NMS server"""
+    from onnx_backend import OnnxYOLO
+    return OnnxYOLO(
+        str(model_path),
+        preprocess=LetterboxPreprocessor(
+            MODEL_INPUT_SIZE,
+            max_batch=BATCH_MAX_SIZE,
+            resample=PREPROCESS_RESAMPLE,
+        ),
+        nms=functools.partial(
+            batched_nms,
+            method=NMS_METHOD,
+            top_k=NMS_TOP_K,
+            max_det=NMS_MAX_DET,
+            sigma=NMS_SIGMA,
+        ),
+        input_size=MODEL_INPUT_SIZE,
+        default_names=CARIES_CLASSES,
+        intra_op_threads=ORT_INTRA_OP_THREADS,
+        inter_op_threads=ORT_INTER_OP_THREADS,
+    )
 
 
-def load_model():
-    """Load YOLO model (.pt) ke memory menggunakan Ultralytics"""
-    global yolo_model, model_loaded
+def create_model(model_path: Optional[Path] = None):
+    """
+    Buat instance model baru sesuai MODEL_BACKEND
     
-    if model_loaded and yolo_model is not None:
-        return yolo_model
+    Backend "onnx" tidak meng-import ultralytics/torch sama sekali.
     
-    if not MODEL_PATH.exists():
-        raise FileNotFoundError(f"Model file not found at {MODEL_PATH}")
+    Args:
+        model_path: File model (default get_model_path(); diabaikan backend "stub")
+    """
+    if MODEL_BACKEND not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{MODEL_BACKEND}', expected one of {MODEL_BACKENDS}")
+    if NMS_METHOD not in NMS_METHODS:
+        raise ValueError(f"Unknown NMS method '{NMS_METHOD}', expected one of {NMS_METHODS}")
+    if MODEL_PRECISION not in MODEL_PRECISIONS:
+        raise ValueError(f"Unknown model precision '{MODEL_PRECISION}', expected one of {MODEL_PRECISIONS}")
+    if MODEL_PRECISION != "fp32" and MODEL_BACKEND != "onnx":
+        raise ValueError(
+            f"Presisi {MODEL_PRECISION} hanya didukung backend onnx "
+            f"(python quantize.py export --precision {MODEL_PRECISION})"
+        )
     
-    try:
-        # Load YOLO model menggunakan Ultralytics
-        yolo_model = YOLO(str(MODEL_PATH))
-        model_loaded = True
-        print(f"YOLO model loaded successfully from {MODEL_PATH}")
-        
-        # Print model info
-        print(f"Model classes: {yolo_model.names}")
-        print(f"Model input size: {MODEL_INPUT_SIZE}")
-        
-        return yolo_model
-    except Exception as e:
-        raise RuntimeError(f"Failed to load YOLO model: {str(e)}")
+    if MODEL_BACKEND == "stub":
+        from stub_model import StubYOLO
+        return StubYOLO(
+            CARIES_CLASSES,
+            latency_ms=float(os.getenv("DENTALOGIC_STUB_LATENCY_MS", "20")),
+            per_image_ms=float(os.getenv("DENTALOGIC_STUB_PER_IMAGE_MS", "5")),
+            boxes=int(os.getenv("DENTALOGIC_STUB_BOXES", "10")),
+            mode=os.getenv("DENTALOGIC_STUB_MODE", "cpu"),
+        )
+    
+    model_path = model_path or get_model_path()
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+    
+    if MODEL_BACKEND == "onnx":
+        return create_onnx_model(model_path)
+    
+    # Load YOLO model menggunakan Ultralytics (import torch memakan waktu paling lama)
+    stage_start = time.time()
+    from ultralytics import YOLO
+    startup_timings.setdefault("backend_import_ms", round((time.time() - stage_start) * 1000, 1))
+    return YOLO(str(model_path))
 
 
-def preprocess_image(image: Image.Image) -> np.ndarray:
-    """
-    Preprocess image untuk model ONNX
-    - Resize ke 640x640
-    - Convert ke RGB
-    - Normalize pixel values ke [0, 1]
-    - Convert ke format CHW [1, 3, 640, 640]
+def batching_enabled() -> bool:
+    """Micro-batching aktif: thread batcher satu-satunya pemakai model"""
+    return INFERENCE_EXECUTOR == "thread" and BATCH_MAX_SIZE > 1
+
+
+def model_instances_per_version() -> int:
     """
-    # Convert ke RGB jika perlu
-    if image.mode != 'RGB':
-        image = image.convert('RGB')
+    Jumlah instance model per versi di process ini
     
-    # Resize ke 640x640 dengan antialiasing
-    image = image.resize((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE), Image.Resampling.LANCZOS)
+    - Micro-batching: 1 (hanya dipakai thread batcher)
+    - Executor "thread" tanpa batching: MODEL_INSTANCES, maksimal satu per worker (model
+      Ultralytics tidak thread-safe; worker menunggu giliran jika instance lebih sedikit)
+    - Executor "process": 1 di setiap worker process, 0 di process induk (hanya metadata versi)
+    """
+    if INFERENCE_EXECUTOR == "process":
+        return 1 if _inference_process else 0
+    return 1 if batching_enabled() else max(1, min(MODEL_INSTANCES, INFERENCE_WORKERS))
+
+
+def warm_up_version(version: ModelVersion) -> float:
+    """Warm-up semua instance versi (paralel, satu thread per instance); return durasi ms"""
+    stage_start = time.time()
+    if len(version.instances) > 1:
+        with ThreadPoolExecutor(max_workers=len(version.instances), thread_name_prefix="warmup") as pool:
+            list(pool.map(warm_up_model, version.instances))
+    else:
+        for model in version.instances:
+            warm_up_model(model)
+    version.warmup_ms = (time.time() - stage_start) * 1000
+    version.warmed = WARMUP_BATCHES > 0
+    return version.warmup_ms
+
+
+def create_model_version(name: str, model_path: Path, warm_up: bool = True) -> ModelVersion:
+    """
+    Factory model_registry: load satu versi model dari model_path
     
-    # Convert ke numpy array
-    img_array = np.array(image, dtype=np.float32)
+    Versi = hash isi file (sama di semua worker untuk checkpoint yang sama);
+    backend "stub" tanpa file memakai versi "stub".
     
-    # Normalize ke [0, 1]
-    img_array = img_array / 255.0
+    Args:
+        name: Nama model di registry
+        model_path: File model
+        warm_up: Warm-up semua instance sebelum versi dipasang
+    """
+    signature = file_signature(model_path)
+    if signature is None and MODEL_BACKEND != "stub":
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+    version_label = file_version(model_path) if signature is not None else MODEL_BACKEND
+    count = model_instances_per_version()
     
-    # Convert dari HWC ke CHW format
-    # Original: (640, 640, 3) -> Target: (3, 640, 640)
-    img_array = np.transpose(img_array, (2, 0, 1))
+    stage_start = time.time()
+    if count > 1:
+        with ThreadPoolExecutor(max_workers=count, thread_name_prefix="model-load") as pool:
+            instances = list(pool.map(lambda _: create_model(model_path), range(count)))
+    else:
+        instances = [create_model(model_path) for _ in range(count)]
+    version = ModelVersion(name, version_label, model_path, instances, signature)
+    version.load_ms = (time.time() - stage_start) * 1000
+    print(
+        f"Model {name} version {version_label} loaded from {model_path} "
+        f"({count} instance, backend: {MODEL_BACKEND}, precision: {MODEL_PRECISION}) in {version.load_ms:.0f} ms"
+    )
+    if instances:
+        print(f"Model classes: {version.names}")
     
-    # Add batch dimension: (3, 640, 640) -> (1, 3, 640, 640)
-    img_array = np.expand_dims(img_array, axis=0)
+    if warm_up and instances and WARMUP_BATCHES > 0:
+        warmup_time = warm_up_version(version)
+        print(f"Model {name} warm-up: {warmup_time:.1f} ms")
+    return version
+
+
+def create_model_registry() -> ModelRegistry:
+    """Registry dengan model utama ("default") dan model tambahan DENTALOGIC_MODELS"""
+    registry = ModelRegistry(create_model_version, default=MODEL_DEFAULT)
+    registry.register(DEFAULT_MODEL_NAME, get_model_path())
+    for name, model_path in MODEL_SPECS.items():
+        registry.register(name, model_path)
+    return registry
+
+
+# Semua model yang bisa dipilih request (versi aktif + versi lama yang masih dipakai)
+model_registry = create_model_registry()
+
+
+def load_model(name: Optional[str] = None, warm_up: bool = True) -> ModelVersion:
+    """Versi aktif model name (default DENTALOGIC_MODEL_DEFAULT), di-load dulu jika belum ada"""
+    version = model_registry.get(name)
+    if version is not None:
+        return version
     
-    return img_array
+    with _model_lock:
+        version = model_registry.get(name)
+        if version is not None:
+            return version
+        try:
+            return model_registry.load(name, warm_up=warm_up)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load YOLO model: {str(e)}")
 
 
-def softmax(logits: np.ndarray) -> np.ndarray:
-    """Apply softmax function untuk convert logits ke probabilities"""
-    exp_logits = np.exp(logits - np.max(logits))
-    return exp_logits / np.sum(exp_logits)
+def is_model_loaded() -> bool:
+    """Model default sudah punya versi aktif"""
+    try:
+        return model_registry.get() is not None
+    except ModelNotFoundError:
+        return False
 
 
-def draw_bounding_boxes(image: Image.Image, detections: List[Dict], line_width: int = 3) -> Image.Image:
+def build_class_lookup(model_names: Dict[int, str]) -> ClassLookup:
     """
-    Draw bounding boxes and labels on image
+    Bangun lookup class id -> nama kelas dari model.names
     
-    Args:
-        image: PIL Image
-        detections: List of detection dicts with 'bbox', 'class', 'confidence'
-        line_width: Width of bounding box lines
+    Aturan fallback: nama yang bukan format "Dx" diganti CARIES_CLASSES[id]
+    (atau "D0" jika id di luar CARIES_CLASSES). Class id di luar jangkauan
+    dipetakan ke slot terakhir ("D0").
+    """
+    size = max(len(CARIES_CLASSES), max(model_names, default=-1) + 1)
+    names = []
+    for cls_id in range(size):
+        fallback = CARIES_CLASSES[cls_id] if cls_id < len(CARIES_CLASSES) else "D0"
+        name = str(model_names.get(cls_id, fallback))
+        if name not in CARIES_CLASSES and not (name.startswith('D') and len(name) == 2):
+            name = fallback
+        names.append(name)
+    names.append("D0")
+    
+    caries_index = np.array(
+        [CARIES_CLASSES.index(name) if name in CARIES_CLASSES else -1 for name in names],
+        dtype=np.int64
+    )
+    return ClassLookup(np.array(names, dtype=object), caries_index)
+
+
+def get_class_lookup(model_names: Dict[int, str]) -> ClassLookup:
+    """Lookup untuk model_names, dibangun sekali per set nama kelas"""
+    key = tuple(model_names.items())
+    lookup = _class_lookups.get(key)
+    if lookup is None:
+        lookup = _class_lookups[key] = build_class_lookup(model_names)
+    return lookup
+
+
+def init_inference_worker():
+    """Initializer worker process inference: load + warm-up semua model registry di process ini"""
+    global _inference_process
+    _inference_process = True
+    set_torch_threads(TORCH_THREADS)
+    # Jangan raise di sini: initializer yang gagal membuat seluruh pool rusak.
+    # Worker akan fallback ke load_model() dan error dilaporkan per request.
+    for name in model_registry.names():
+        try:
+            model_registry.load(name)
+        except Exception as e:
+            print(f"Warning: Inference worker failed to load model {name}: {e}")
+
+
+def resolve_model_version(model: Optional[ModelRef] = None) -> ModelVersion:
+    """
+    Versi model untuk pipeline: versi persis model (masih di-lease request
+    walaupun sudah di-swap), atau versi aktif model default jika model None
+
+    Raises:
+        ModelUnavailableError: Versi model tidak ada di process ini (misal
+            worker process me-load checkpoint yang berbeda dari process induk);
+            request tidak pernah dilayani versi lain diam-diam
+    """
+    if model is None:
+        return load_model()
+    version = model_registry.find(model)
+    if version is None and _inference_process:
+        # Worker process yang gagal load saat start: coba load sekarang
+        load_model(model.name)
+        version = model_registry.find(model)
+    if version is None:
+        raise ModelUnavailableError(model.name, model.version)
+    return version
+
+
+def set_torch_threads(threads: int):
+    """Set jumlah thread intra-op torch (hanya backend ultralytics, 0 = biarkan default)"""
+    if MODEL_BACKEND != "ultralytics" or threads <= 0:
+        return
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def warm_up_model(model) -> float:
+    """
+    Jalankan predict dummy (gambar abu-abu MODEL_INPUT_SIZE) supaya alokasi,
+    fuse layer dan inisialisasi thread pool tidak terjadi di request pertama
     
     Returns:
-        PIL Image with bounding boxes drawn
-    """
-    # Create a copy of the image to draw on
-    img_with_boxes = image.copy()
-    draw = ImageDraw.Draw(img_with_boxes)
-    
-    # Color map for different classes
-    colors = {
-        'D0': (0, 255, 0),      # Green
-        'D1': (255, 255, 0),     # Yellow
-        'D2': (255, 165, 0),     # Orange
-        'D3': (255, 0, 0),       # Red
-        'D4': (255, 0, 255),     # Magenta
-        'D5': (128, 0, 128),     # Purple
-        'D6': (0, 0, 255),       # Blue
-    }
+        Durasi warm-up dalam ms (0 jika DENTALOGIC_WARMUP_BATCHES = 0)
+    """
+    if WARMUP_BATCHES <= 0:
+        return 0.0
+    dummy = Image.new("RGB", (MODEL_INPUT_SIZE, MODEL_INPUT_SIZE), (114, 114, 114))
+    source = [dummy] * WARMUP_BATCH_SIZE if WARMUP_BATCH_SIZE > 1 else dummy
     
-    # Try to load a font, fallback to default if not available
-    # Increased font size for better readability on mobile
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 40)
-        font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)
-    except:
-        try:
-            # Try alternative font paths for different systems
-            font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 40)
-            font_small = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 28)
-        except:
-            try:
-                font = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-            except:
-                font = None
-                font_small = None
+    start_time = time.time()
+    for _ in range(WARMUP_BATCHES):
+        model.predict(source=source, conf=CONFIDENCE_THRESHOLD, iou=IOU_THRESHOLD, verbose=False)
+    warmup_time = (time.time() - start_time) * 1000
+    inference_metrics.observe("warmup", warmup_time)
+    return warmup_time
+
+
+def prepare_model_for_fork():
+    """
+    Load model di process induk sebelum fork worker (dipakai launcher.py)
     
-    for det in detections:
-        bbox = det['bbox']
-        x1, y1, x2, y2 = bbox[0], bbox[1], bbox[2], bbox[3]
-        cls = det['class']
-        conf = det['confidence']
-        
-        # Get color for this class
-        color = colors.get(cls, (255, 255, 255))
-        
-        # Draw bounding box
-        draw.rectangle([x1, y1, x2, y2], outline=color, width=line_width)
-        
-        # Prepare label text
-        label = f"{cls} {conf:.1f}%"
-        
-        # Calculate text size
-        if font:
-            bbox_text = draw.textbbox((0, 0), label, font=font)
-            text_width = bbox_text[2] - bbox_text[0]
-            text_height = bbox_text[3] - bbox_text[1]
-        else:
-            text_width = len(label) * 6
-            text_height = 12
-        
-        # Draw background for text (increased padding for larger font)
-        text_bg = [x1, y1 - text_height - 12, x1 + text_width + 12, y1]
-        draw.rectangle(text_bg, fill=color)
-        
-        # Draw text (increased padding for larger font)
-        draw.text((x1 + 6, y1 - text_height - 6), label, fill=(0, 0, 0), font=font)
+    Bobot model lalu dibagi copy-on-write oleh semua worker. Layer di-fuse
+    sekarang supaya worker tidak membuat salinan bobot saat fuse di predict
+    pertama. Session ONNX Runtime tidak aman dipakai setelah fork (thread pool
+    internal), jadi untuk backend "onnx" model di-load di setiap worker.
+    
+    Semua model registry di-load tanpa warm-up (warm-up berjalan di setiap
+    worker saat startup). Versi yang di-swap setelah fork di-load per worker.
     
-    return img_with_boxes
+    Returns:
+        True jika model sudah di-load di process induk
+    """
+    if MODEL_BACKEND == "onnx":
+        return False
+    # Satu thread selama preload: region OpenMP di induk membuat worker hasil fork hang
+    set_torch_threads(1)
+    for name in model_registry.names():
+        for model in load_model(name, warm_up=False).instances:
+            if hasattr(model, "fuse"):
+                model.fuse()
+    return True
 
 
 def to_native_type(value):
@@ -209,189 +507,235 @@ def to_native_type(value):
         return value
 
 
-def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+def to_model_source(tensors: List[np.ndarray]):
+    """
+    Gabungkan input yang sudah di-letterbox (masing-masing [1, 3, S, S]) menjadi
+    source predict: array [N, 3, S, S], atau torch.Tensor untuk backend ultralytics
+    (tanpa copy untuk satu input)
+    """
+    batch = tensors[0] if len(tensors) == 1 else np.concatenate(tensors)
+    if MODEL_BACKEND == "ultralytics":
+        import torch
+        return torch.from_numpy(batch)
+    return batch
+
+
+def run_yolo(images: List, version: Optional[ModelVersion] = None) -> Tuple[list, float]:
     """
-    Non-Maximum Suppression untuk filter overlapping bounding boxes
+    Jalankan satu forward pass YOLO untuk satu atau beberapa gambar
     
     Args:
-        boxes: Array of shape [N, 4] dengan format [x1, y1, x2, y2]
-        scores: Array of shape [N] dengan confidence scores
-        iou_threshold: IoU threshold untuk NMS
+        images: List PIL Image, atau list array [1, 3, S, S] yang sudah di-letterbox
+            (box hasil di koordinat input model)
+        version: Versi model (default versi aktif model default); satu instance
+            dipinjam dari pool versi selama predict
     
     Returns:
-        Indices of boxes to keep
+        Tuple (list Results per gambar, inference time dalam ms)
     """
-    if len(boxes) == 0:
-        return np.array([], dtype=np.int32)
+    version = version or load_model()
     
-    # Extract coordinates
-    x1 = boxes[:, 0]
-    y1 = boxes[:, 1]
-    x2 = boxes[:, 2]
-    y2 = boxes[:, 3]
+    if isinstance(images[0], np.ndarray):
+        source = to_model_source(images)
+    else:
+        source = images if len(images) > 1 else images[0]
     
-    # Calculate areas
-    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    with version.instance() as model, torch_profile(MODEL_BACKEND == "ultralytics"):
+        start_time = time.time()
+        results = model.predict(
+            source=source,
+            conf=CONFIDENCE_THRESHOLD,
+            iou=IOU_THRESHOLD,
+            verbose=False
+        )
+        inference_time = (time.time() - start_time) * 1000  # Convert ke milliseconds
     
-    # Sort by score (descending)
-    order = scores.argsort()[::-1]
+    return list(results) if results else [], inference_time
+
+
+def run_yolo_batch(images: List, version: Optional[ModelVersion] = None) -> List[Tuple[object, float]]:
+    """
+    Satu predict untuk semua gambar, hasil (Results atau None, ms) per gambar
     
-    keep = []
-    while len(order) > 0:
-        # Take the box with highest score
-        i = order[0]
-        keep.append(i)
-        
-        if len(order) == 1:
-            break
-        
-        # Calculate IoU with remaining boxes
-        xx1 = np.maximum(x1[i], x1[order[1:]])
-        yy1 = np.maximum(y1[i], y1[order[1:]])
-        xx2 = np.minimum(x2[i], x2[order[1:]])
-        yy2 = np.minimum(y2[i], y2[order[1:]])
-        
-        w = np.maximum(0, xx2 - xx1 + 1)
-        h = np.maximum(0, yy2 - yy1 + 1)
-        intersection = w * h
-        
-        iou = intersection / (areas[i] + areas[order[1:]] - intersection)
-        
-        # Keep boxes with IoU < threshold
-        inds = np.where(iou <= iou_threshold)[0]
-        order = order[inds + 1]
+    Batch campuran (PIL Image dari /predict dan array dari /ws/live) dijalankan
+    sebagai satu predict per jenis input.
+    """
+    is_tensor = [isinstance(image, np.ndarray) for image in images]
+    if any(is_tensor) and not all(is_tensor):
+        outputs = [None] * len(images)
+        for kind in (False, True):
+            indices = [i for i, flag in enumerate(is_tensor) if flag == kind]
+            for index, output in zip(indices, run_yolo_batch([images[i] for i in indices], version)):
+                outputs[index] = output
+        return outputs
     
-    return np.array(keep, dtype=np.int32)
+    results, inference_time = run_yolo(images, version)
+    if not results:
+        return [(None, inference_time) for _ in images]
+    if len(results) != len(images):
+        raise IndexError(f"Model returned {len(results)} results for {len(images)} images")
+    return [(result, inference_time) for result in results]
 
 
-def predict_caries(original_image: Image.Image) -> Dict:
+def run_micro_batch(items: List[Tuple[ModelVersion, object]]) -> List[Tuple[object, float]]:
     """
-    Run inference pada image menggunakan YOLO model (.pt)
-    Returns: Dictionary dengan hasil prediksi termasuk bounding boxes
+    run_batch untuk micro-batcher: item (versi model, gambar)
+    
+    Item dengan versi model berbeda (model lain, atau versi lama/baru saat
+    hot-swap) dijalankan sebagai satu predict per versi.
     """
-    global yolo_model
+    groups: Dict[int, List[int]] = {}
+    for index, (version, _) in enumerate(items):
+        groups.setdefault(id(version), []).append(index)
     
-    try:
-        if yolo_model is None:
-            yolo_model = load_model()
-        
-        # Get original image size
-        orig_width, orig_height = original_image.size
-        
-        # Run inference dengan YOLO
-        start_time = time.time()
-        results = yolo_model.predict(
-            source=original_image,
-            conf=0.25,  # Confidence threshold
-            iou=0.5,   # IoU threshold for NMS
-            verbose=False
-        )
-        inference_time = (time.time() - start_time) * 1000  # Convert ke milliseconds
-        
-        # Process results
-        if not results or len(results) == 0:
-            return {
-                "class": "D0",
-                "confidence": 0.0,
-                "allProbabilities": [
-                    {"class": cls, "probability": 0.0} for cls in CARIES_CLASSES
-                ],
-                "inferenceTime": round(inference_time, 2),
-                "detections": [],
-                "boundingBoxes": []
-            }
-        
-        # Get first result (single image)
-        result = results[0]
-        
-        # Extract detections
-        detections = []
-        filtered_boxes = []
-        
-        if result.boxes is not None and len(result.boxes) > 0:
-            print(f"Found {len(result.boxes)} detections")
-            
-            for box in result.boxes:
-                # Get bounding box coordinates (already in pixel coordinates)
-                bbox = box.xyxy[0].cpu().numpy()  # [x1, y1, x2, y2]
-                x1, y1, x2, y2 = float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3])
-                
-                # Get class ID and confidence
-                cls_id = int(box.cls[0].cpu().numpy())
-                conf = float(box.conf[0].cpu().numpy())
-                
-                # Map class ID to class name
-                # YOLO model class names are in result.names
-                if cls_id in result.names:
-                    class_name = result.names[cls_id]
-                else:
-                    # Fallback: use class index if not in names
-                    if cls_id < len(CARIES_CLASSES):
-                        class_name = CARIES_CLASSES[cls_id]
-                    else:
-                        class_name = "D0"
-                
-                # Ensure class_name is in our CARIES_CLASSES
-                if class_name not in CARIES_CLASSES:
-                    # Try to map it
-                    if class_name.startswith('D') and len(class_name) == 2:
-                        # Already in D0-D6 format
-                        pass
-                    else:
-                        # Use class index as fallback
-                        if cls_id < len(CARIES_CLASSES):
-                            class_name = CARIES_CLASSES[cls_id]
-                        else:
-                            class_name = "D0"
-                
-                detections.append({
-                    "bbox": [x1, y1, x2, y2],
-                    "class": class_name,
-                    "confidence": conf * 100
-                })
-                
-                filtered_boxes.append([x1, y1, x2, y2])
-                
-                print(f"Detection: {class_name} ({conf:.3f}) at [{x1:.1f}, {y1:.1f}, {x2:.1f}, {y2:.1f}]")
+    outputs = [None] * len(items)
+    for indices in groups.values():
+        version = items[indices[0]][0]
+        for index, output in zip(indices, run_yolo_batch([items[i][1] for i in indices], version)):
+            outputs[index] = output
+    return outputs
+
+
+def summarize_detections(detections: List[Dict]) -> Tuple[str, float, List[Dict]]:
+    """
+    Ringkas list deteksi menjadi kelas utama, confidence, dan allProbabilities
+    
+    allProbabilities berisi confidence maksimum per kelas dari semua deteksi.
+    Dipakai untuk satu gambar maupun agregat beberapa view satu pasien.
+    
+    Returns:
+        Tuple (predicted_class, confidence, all_probabilities)
+    """
+    # Get best detection for main result
+    if len(detections) > 0:
+        best_detection = max(detections, key=lambda x: x['confidence'])
+        predicted_class = best_detection['class']
+        confidence = float(best_detection['confidence'])
+    else:
+        predicted_class = "D0"
+        confidence = 0.0
+    
+    # Create all probabilities (aggregate from all detections)
+    class_probs = {cls: 0.0 for cls in CARIES_CLASSES}
+    for det in detections:
+        cls = det['class']
+        conf = det['confidence'] / 100.0
+        if cls in class_probs:
+            class_probs[cls] = max(class_probs[cls], conf)
+    
+    all_probabilities = [
+        {
+            "class": cls,
+            "probability": float(class_probs[cls] * 100)
+        }
+        for cls in CARIES_CLASSES
+    ]
+    
+    return str(predicted_class), float(confidence), all_probabilities
+
+
+def build_prediction_result(result, inference_time: float) -> Dict:
+    """
+    Konversi satu YOLO Results menjadi dictionary response /predict
+    
+    Args:
+        result: Ultralytics Results untuk satu gambar (None jika model tidak mengembalikan hasil)
+        inference_time: Waktu inference dalam ms
+    """
+    if result is None:
+        return {
+            "class": "D0",
+            "confidence": 0.0,
+            "allProbabilities": [
+                {"class": cls, "probability": 0.0} for cls in CARIES_CLASSES
+            ],
+            "inferenceTime": round(inference_time, 2),
+            "detections": [],
+            "boundingBoxes": []
+        }
+    
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        predicted_class, confidence, all_probabilities = summarize_detections([])
+        detections, filtered_boxes = [], []
+    else:
+        # Satu transfer per tensor (bukan per box), koordinat sudah dalam pixel
+        xyxy = boxes.xyxy.cpu().numpy()
+        conf = boxes.conf.cpu().numpy().astype(np.float64)
+        lookup = get_class_lookup(result.names)
+        cls_ids = np.minimum(boxes.cls.cpu().numpy().astype(np.int64), len(lookup.names) - 1)
         
-        # Get best detection for main result
-        if len(detections) > 0:
-            best_detection = max(detections, key=lambda x: x['confidence'])
-            predicted_class = best_detection['class']
-            confidence = float(best_detection['confidence'])
-        else:
-            predicted_class = "D0"
-            confidence = 0.0
-            print("No detections found")
+        # tolist() menghasilkan tipe Python native (tanpa to_native_type)
+        class_names = lookup.names[cls_ids].tolist()
+        confidences = (conf * 100).tolist()
+        detections = [
+            {"bbox": bbox, "class": class_name, "confidence": box_conf}
+            for bbox, class_name, box_conf in zip(xyxy.tolist(), class_names, confidences)
+        ]
+        filtered_boxes = xyxy.tolist()
         
-        # Create all probabilities (aggregate from all detections)
-        class_probs = {cls: 0.0 for cls in CARIES_CLASSES}
-        for det in detections:
-            cls = det['class']
-            conf = det['confidence'] / 100.0
-            if cls in class_probs:
-                class_probs[cls] = max(class_probs[cls], conf)
+        # Confidence maksimum per kelas
+        class_probs = np.zeros(len(CARIES_CLASSES), dtype=np.float64)
+        caries_index = lookup.caries_index[cls_ids]
+        valid = caries_index >= 0
+        np.maximum.at(class_probs, caries_index[valid], conf[valid])
         
+        best = int(np.argmax(conf))
+        predicted_class = class_names[best]
+        confidence = confidences[best]
         all_probabilities = [
-            {
-                "class": cls,
-                "probability": float(class_probs[cls] * 100)
-            }
-            for cls in CARIES_CLASSES
+            {"class": cls, "probability": probability}
+            for cls, probability in zip(CARIES_CLASSES, (class_probs * 100).tolist())
         ]
-        
-        # Ensure all values are JSON serializable (native Python types)
-        result_dict = {
-            "class": str(predicted_class),
-            "confidence": float(confidence),
-            "allProbabilities": all_probabilities,
-            "inferenceTime": float(round(inference_time, 2)),
-            "detections": detections,
-            "boundingBoxes": filtered_boxes
-        }
-        
-        # Final pass to ensure all numpy types are converted
-        return to_native_type(result_dict)
+    
+    return {
+        "class": predicted_class,
+        "confidence": confidence,
+        "allProbabilities": all_probabilities,
+        "inferenceTime": float(round(inference_time, 2)),
+        "detections": detections,
+        "boundingBoxes": filtered_boxes
+    }
+
+
+def infer_images(images: List[Image.Image], version: Optional[ModelVersion] = None) -> List[Tuple[object, float]]:
+    """
+    Jalankan inference untuk beberapa gambar sebagai satu batch
+    
+    Jika micro-batcher aktif, semua gambar dimasukkan ke batcher sekaligus
+    (instance model hanya dipakai oleh thread batcher). Request yang di-profile
+    melewati batcher supaya predict berjalan di thread yang di-profile
+    (instance dipinjam bergantian dengan batcher lewat pool versi).
+    
+    Returns:
+        List (Results atau None, inference time dalam ms) per gambar
+    """
+    version = version or load_model()
+    if micro_batcher is not None and not profiling_active():
+        futures = [micro_batcher.submit_async((version, image)) for image in images]
+        return [future.result() for future in futures]
+    
+    return run_yolo_batch(images, version)
+
+
+def predict_caries_batch(
+    images: List[Image.Image],
+    timings: Optional[Dict[str, float]] = None,
+    version: Optional[ModelVersion] = None
+) -> List[Dict]:
+    """
+    Run inference untuk beberapa gambar dalam satu forward pass YOLO
+    Returns: List dictionary hasil prediksi (urutan sama dengan input)
+    
+    Jika timings diberikan, durasi ekstraksi box dicatat sebagai stage "extract".
+    """
+    try:
+        outputs = infer_images(images, version)
+        stage_start = time.time()
+        results = [build_prediction_result(result, inference_time) for result, inference_time in outputs]
+        if timings is not None:
+            timings["extract"] = timings.get("extract", 0.0) + (time.time() - stage_start) * 1000
+        return results
     
     except Exception as e:
         import traceback
@@ -399,135 +743,1345 @@ def predict_caries(original_image: Image.Image) -> Dict:
         raise ValueError(f"Error processing YOLO prediction: {str(e)}")
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Load model saat server startup"""
-    try:
-        load_model()
-        print("Server started successfully")
-    except Exception as e:
-        print(f"Warning: Failed to load model at startup: {e}")
-        print("Model will be loaded on first request")
+def predict_caries(
+    original_image: Image.Image,
+    timings: Optional[Dict[str, float]] = None,
+    version: Optional[ModelVersion] = None
+) -> Dict:
+    """
+    Run inference pada satu image (predict_caries_batch dengan batch satu gambar)
+    
+    Berlaku untuk semua backend model (ultralytics .pt, onnx, stub) dan versi
+    model dari registry (default: versi aktif model default).
+    Returns: Dictionary dengan hasil prediksi termasuk bounding boxes
+    """
+    return predict_caries_batch([original_image], timings, version)[0]
 
 
-@app.get("/")
-async def root():
-    """Health check endpoint"""
-    return {
-        "status": "ok",
-        "message": "Dentalogic8 API Server",
-        "model_loaded": model_loaded
-    }
+def tile_image(image: Image.Image, plan: TilePlan) -> List[Image.Image]:
+    """Potong image sesuai plan (gambar diperkecil dulu jika plan.scale < 1)"""
+    working = image if plan.scale == 1.0 else image.resize(plan.size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    if len(plan.tiles) == 1 and plan.tiles[0].box == (0, 0, *working.size):
+        return [working]
+    return [working.crop(tile.box) for tile in plan.tiles]
 
 
-@app.get("/health")
-async def health():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "model_loaded": model_loaded,
-        "model_path": str(MODEL_PATH) if MODEL_PATH.exists() else None
-    }
+def merge_tile_results(
+    image: Image.Image,
+    plan: TilePlan,
+    outputs: List[Tuple[object, float]],
+    inference_time: float
+) -> Dict:
+    """
+    Gabungkan Results per tile (+ pass gambar utuh di akhir jika ada) menjadi
+    result /predict untuk image
+    """
+    parts = []
+    names = None
+    offsets = [(tile.x, tile.y) for tile in plan.tiles] + [(0, 0)] * (len(outputs) - len(plan.tiles))
+    scales = [plan.scale] * len(plan.tiles) + [1.0] * (len(outputs) - len(plan.tiles))
+    for (result, _), offset, scale in zip(outputs, offsets, scales):
+        if result is None or result.boxes is None or len(result.boxes) == 0:
+            continue
+        names = result.names
+        boxes = result.boxes
+        parts.append((
+            boxes.xyxy.cpu().numpy(),
+            boxes.conf.cpu().numpy(),
+            boxes.cls.cpu().numpy(),
+            offset,
+            scale,
+        ))
+    
+    if not parts:
+        return build_prediction_result(None, inference_time)
+    
+    xyxy, conf, cls = merge_tile_boxes(parts, image.size, TILE_MERGE_IOU, NMS_MAX_DET)
+    merged = OnnxResults(OnnxBoxes(xyxy, conf, cls), names, (image.height, image.width))
+    return build_prediction_result(merged, inference_time)
 
 
-@app.post("/predict")
-async def predict(file: UploadFile = File(...)):
+def predict_caries_tiled_batch(
+    images: List[Image.Image],
+    timings: Optional[Dict[str, float]] = None,
+    version: Optional[ModelVersion] = None
+) -> List[Dict]:
     """
-    Endpoint untuk prediksi karies dari uploaded image dengan YOLO object detection
+    Tiled inference untuk beberapa gambar: tile semua gambar di-infer sebagai
+    batch (per BATCH_MAX_SIZE tile, lewat micro-batcher jika aktif), box digeser
+    ke koordinat gambar lalu duplikat antar tile digabung dengan NMS per kelas
     
-    Args:
-        file: Image file (JPEG, PNG, dll)
+    Jika timings diberikan, durasi potong tile dicatat sebagai stage "tile" dan
+    penggabungan + ekstraksi box sebagai stage "extract".
     
     Returns:
-        JSON dengan hasil prediksi termasuk bounding boxes:
-        {
-            "class": "D0",
-            "confidence": 95.5,
-            "allProbabilities": [...],
-            "inferenceTime": 123.45,
-            "detections": [
-                {
-                    "bbox": [x1, y1, x2, y2],
-                    "class": "D0",
-                    "confidence": 95.5
-                }
-            ],
-            "boundingBoxes": [[x1, y1, x2, y2], ...]
-        }
+        List dictionary hasil prediksi (schema sama dengan predict_caries)
     """
     try:
-        # Validasi file
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(
-                status_code=400,
-                detail="File harus berupa gambar (JPEG, PNG, dll)"
-            )
+        stage_start = time.time()
+        plans = [plan_tiles(image.size, TILE_SIZE, TILE_OVERLAP, TILE_MAX) for image in images]
+        crops, counts = [], []
+        for image, plan in zip(images, plans):
+            tiles = tile_image(image, plan)
+            # Gambar yang muat dalam satu tile tidak perlu pass gambar utuh terpisah
+            if TILE_FULL_IMAGE and len(tiles) > 1:
+                tiles.append(image)
+            crops.extend(tiles)
+            counts.append(len(tiles))
+        if timings is not None:
+            timings["tile"] = timings.get("tile", 0.0) + (time.time() - stage_start) * 1000
         
-        # Read image data
-        image_data = await file.read()
-        
-        # Open image dengan PIL
-        try:
-            image = Image.open(io.BytesIO(image_data))
-        except Exception as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Gagal membaca gambar: {str(e)}"
-            )
+        stage_start = time.time()
+        chunk = max(1, BATCH_MAX_SIZE)
+        outputs = []
+        for start in range(0, len(crops), chunk):
+            outputs.extend(infer_images(crops[start:start + chunk], version))
+        inference_time = (time.time() - stage_start) * 1000
         
-        # Run prediction (YOLO handles preprocessing internally)
-        try:
-            result = predict_caries(image)
-            
-            # Draw bounding boxes on image if there are detections
-            annotated_image = image.copy()
-            if result.get('detections') and len(result['detections']) > 0:
-                annotated_image = draw_bounding_boxes(annotated_image, result['detections'])
-            
-            # Convert annotated image to base64
-            img_buffer = io.BytesIO()
-            annotated_image.save(img_buffer, format='JPEG', quality=95)
-            img_buffer.seek(0)
-            img_base64 = base64.b64encode(img_buffer.read()).decode('utf-8')
-            
-            # Add image to result (ensure it's a native type)
-            result['annotatedImage'] = str(f"data:image/jpeg;base64,{img_base64}")
-            
-            # Final conversion to ensure all values are JSON serializable
-            result = to_native_type(result)
-            
-            return JSONResponse(content=result)
-        except ValueError as e:
-            # ValueError biasanya dari validasi atau processing
-            print(f"ValueError in prediction: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error processing prediction: {str(e)}"
-            )
-        except IndexError as e:
-            # IndexError dari akses array
-            print(f"IndexError in prediction: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error accessing model output: {str(e)}. Model mungkin tidak kompatibel."
-            )
-        except Exception as e:
-            # Error lainnya
-            print(f"Unexpected error in prediction: {type(e).__name__}: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise HTTPException(
-                status_code=500,
-                detail=f"Gagal menjalankan prediksi: {str(e)}"
-            )
+        stage_start = time.time()
+        results = []
+        position = 0
+        for image, plan, count in zip(images, plans, counts):
+            results.append(merge_tile_results(image, plan, outputs[position:position + count], inference_time))
+            position += count
+        if timings is not None:
+            timings["extract"] = timings.get("extract", 0.0) + (time.time() - stage_start) * 1000
+        return results
     
-    except HTTPException:
-        raise
     except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error internal server: {str(e)}"
+        import traceback
+        traceback.print_exc()
+        raise ValueError(f"Error processing tiled YOLO prediction: {str(e)}")
+
+
+def map_result_to_original(result: Dict) -> Dict:
+    """Skala balik koordinat box di result dari imageSize ke originalSize (in-place)"""
+    (image_width, image_height), (original_width, original_height) = result['imageSize'], result['originalSize']
+    if (image_width, image_height) == (original_width, original_height):
+        return result
+    factor_x = original_width / image_width
+    factor_y = original_height / image_height
+    
+    def scale_box(box):
+        return [box[0] * factor_x, box[1] * factor_y, box[2] * factor_x, box[3] * factor_y]
+    
+    for det in result.get('detections', []):
+        det['bbox'] = scale_box(det['bbox'])
+    result['boundingBoxes'] = [scale_box(box) for box in result.get('boundingBoxes', [])]
+    return result
+
+
+def add_image_info(result: Dict, decoded: DecodedImage) -> Dict:
+    """Tambahkan ukuran gambar (acuan koordinat box) dan ukuran foto asli ke result"""
+    result['imageSize'] = list(decoded.image.size)
+    result['originalSize'] = list(decoded.original_size)
+    return result
+
+
+def render_annotated_image(
+    image: Image.Image,
+    detections: List[Dict],
+    timings: Dict[str, float],
+    render: str = "full"
+) -> Optional[bytes]:
+    """
+    Gambar bounding boxes lalu encode ke JPEG
+    
+    Durasi stage "annotate" dan "encode" ditambahkan ke timings.
+    
+    Untuk render "full" box digambar langsung di image (image ikut berubah,
+    jadi panggil setelah inference selesai); untuk "thumb" gambar di-downscale
+    dulu lalu box digambar di thumbnail, tanpa copy resolusi penuh.
+    
+    Args:
+        render: "full" (ukuran image), "thumb" (sisi terpanjang THUMB_MAX_SIZE)
+            atau "none" (tidak menggambar dan tidak encode)
+    
+    Returns:
+        Bytes JPEG, atau None untuk render "none"
+    """
+    if render == "none":
+        return None
+    
+    stage_start = time.time()
+    annotated_image = image
+    scale = 1.0
+    quality = FULL_JPEG_QUALITY
+    if render == "thumb":
+        quality = THUMB_JPEG_QUALITY
+        if max(image.size) > THUMB_MAX_SIZE:
+            scale = THUMB_MAX_SIZE / max(image.size)
+            thumb_size = (
+                max(1, round(image.width * scale)),
+                max(1, round(image.height * scale))
+            )
+            annotated_image = image.resize(thumb_size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    annotation_renderer.draw(annotated_image, detections, scale)
+    timings["annotate"] = timings.get("annotate", 0.0) + (time.time() - stage_start) * 1000
+    
+    stage_start = time.time()
+    img_buffer = io.BytesIO()
+    annotated_image.save(img_buffer, format='JPEG', quality=quality)
+    timings["encode"] = timings.get("encode", 0.0) + (time.time() - stage_start) * 1000
+    
+    return img_buffer.getvalue()
+
+
+def add_model_info(result: Dict, version: ModelVersion) -> Dict:
+    """Tambahkan nama dan versi model yang menghasilkan result"""
+    result['model'] = version.name
+    result['modelVersion'] = version.version
+    return result
+
+
+def run_prediction_pipeline(
+    image_data: bytes,
+    render: str = "full",
+    tiled: bool = False,
+    model: Optional[ModelRef] = None
+) -> Tuple[Dict, Dict[str, float]]:
+    """
+    Pipeline lengkap untuk satu gambar: decode, inference, annotate, encode
+    
+    Dijalankan di worker InferenceExecutor (bukan di event loop). Gambar
+    di-decode sekali (draft mode + downscale ke DECODE_MAX_SIZE) dan gambar
+    yang sama dipakai untuk inference dan annotasi.
+    
+    Result yang dikembalikan berbentuk kanonik (bisa di-cache): koordinat box
+    relatif ke imageSize dan JPEG annotasi (jika ada) berupa bytes di
+    'annotatedImageBytes'. Pilihan client diterapkan oleh finalize_result().
+    
+    Args:
+        image_data: Bytes file gambar
+        render: "none", "thumb" atau "full" (lihat render_annotated_image)
+        tiled: Tiled inference (decode sampai TILE_DECODE_MAX_SIZE, lihat predict_caries_tiled_batch)
+        model: Versi model yang di-lease request (default versi aktif model default)
+    
+    Returns:
+        Tuple (result dict, timings per stage dalam ms)
+    """
+    timings = {}
+    version = resolve_model_version(model)
+    
+    stage_start = time.time()
+    decoded = decode_image(image_data, TILE_DECODE_MAX_SIZE if tiled else DECODE_MAX_SIZE)
+    timings["decode"] = (time.time() - stage_start) * 1000
+    
+    stage_start = time.time()
+    if tiled:
+        result = predict_caries_tiled_batch([decoded.image], timings, version)[0]
+    else:
+        result = predict_caries(decoded.image, timings, version)
+    timings["predict"] = (time.time() - stage_start) * 1000 - timings.get("extract", 0.0) - timings.get("tile", 0.0)
+    
+    jpeg_bytes = render_annotated_image(decoded.image, result.get('detections'), timings, render)
+    if jpeg_bytes is not None:
+        result['annotatedImageBytes'] = jpeg_bytes
+    add_image_info(result, decoded)
+    add_model_info(result, version)
+    
+    return result, timings
+
+
+def run_batch_prediction_pipeline(
+    images_data: List[bytes],
+    render: str = "full",
+    tiled: bool = False,
+    model: Optional[ModelRef] = None
+) -> Tuple[List[Dict], Dict[str, float]]:
+    """
+    Pipeline untuk beberapa view satu pasien: semua view di-infer dalam satu batch
+    
+    Result per view berbentuk kanonik seperti run_prediction_pipeline.
+    
+    Returns:
+        Tuple (list result dict per view, timings per stage dalam ms)
+    """
+    timings = {}
+    version = resolve_model_version(model)
+    
+    stage_start = time.time()
+    max_size = TILE_DECODE_MAX_SIZE if tiled else DECODE_MAX_SIZE
+    decoded_images = [decode_image(image_data, max_size) for image_data in images_data]
+    timings["decode"] = (time.time() - stage_start) * 1000
+    
+    stage_start = time.time()
+    predict_batch = predict_caries_tiled_batch if tiled else predict_caries_batch
+    results = predict_batch([decoded.image for decoded in decoded_images], timings, version)
+    timings["predict"] = (time.time() - stage_start) * 1000 - timings.get("extract", 0.0) - timings.get("tile", 0.0)
+    
+    for decoded, result in zip(decoded_images, results):
+        jpeg_bytes = render_annotated_image(decoded.image, result.get('detections'), timings, render)
+        if jpeg_bytes is not None:
+            result['annotatedImageBytes'] = jpeg_bytes
+        add_image_info(result, decoded)
+        add_model_info(result, version)
+    
+    return results, timings
+
+
+def run_profiled_pipeline(profile: ProfileRequest, pipeline, *args):
+    """
+    Jalankan pipeline prediksi di bawah profiler (di thread/process worker inference)
+    
+    Returns:
+        Tuple (hasil pipeline, timings, laporan profile); laporan mode "store"
+        berisi nama file di DENTALOGIC_PROFILE_DIR, laporan berisi
+        "skipped": true jika process ini sedang mem-profile request lain
+    """
+    with ProfileSession(profile) as session:
+        result, timings = pipeline(*args)
+    report = session.save(profile_store) if profile.mode == "store" else session.report()
+    return result, timings, report
+
+
+def build_live_result(result, decoded: DecodedImage, info, inference_time: float) -> Dict:
+    """
+    Result ringkas untuk frame live: hanya deteksi, koordinat frame asli (dibulatkan)
+
+    Box dari model di koordinat input model (letterbox), dipetakan balik lewat
+    LetterboxInfo lalu skala decode.
+    """
+    detections = []
+    boxes = result.boxes if result is not None else None
+    if boxes is not None and len(boxes) > 0:
+        xyxy = np.array(boxes.xyxy.cpu().numpy(), dtype=np.float32)
+        info.to_original(xyxy)
+        xyxy /= decoded.scale
+        conf = boxes.conf.cpu().numpy().astype(np.float64)
+        lookup = get_class_lookup(result.names)
+        cls_ids = np.minimum(boxes.cls.cpu().numpy().astype(np.int64), len(lookup.names) - 1)
+        detections = [
+            {"bbox": bbox, "class": class_name, "confidence": box_conf}
+            for bbox, class_name, box_conf in zip(
+                np.round(xyxy.astype(np.float64), 1).tolist(),
+                lookup.names[cls_ids].tolist(),
+                np.round(conf * 100, 1).tolist()
+            )
+        ]
+    return {
+        "frameSize": list(decoded.original_size),
+        "detections": detections,
+        "inferenceTime": round(inference_time, 1),
+    }
+
+
+def get_live_preprocessor() -> LetterboxPreprocessor:
+    """Preprocessor live milik worker process ini (executor "process" menjalankan satu task per worker)"""
+    global _live_preprocessor
+    if _live_preprocessor is None:
+        _live_preprocessor = LetterboxPreprocessor(MODEL_INPUT_SIZE, max_batch=1, resample=PREPROCESS_RESAMPLE)
+    return _live_preprocessor
+
+
+def run_live_frame(
+    preprocessor: Optional[LetterboxPreprocessor],
+    frame_data: bytes,
+    model: Optional[ModelRef] = None
+) -> Tuple[Dict, Dict[str, float]]:
+    """
+    Pipeline satu frame live: decode, letterbox ke buffer milik koneksi, inference
+
+    Tanpa annotasi maupun encode JPEG. Buffer input [1, 3, S, S] di preprocessor
+    dipakai ulang untuk setiap frame koneksi yang sama (executor "thread"). Di
+    executor "process" preprocessor None dan buffer milik worker process dipakai,
+    sehingga tidak ada buffer yang di-pickle per frame.
+
+    Returns:
+        Tuple (result ringkas, timings per stage dalam ms)
+    """
+    timings = {}
+    version = resolve_model_version(model)
+    preprocessor = preprocessor or get_live_preprocessor()
+
+    stage_start = time.time()
+    decoded = decode_image(frame_data, LIVE_DECODE_MAX_SIZE)
+    batch, infos = preprocessor([decoded.image])
+    timings["live_decode"] = (time.time() - stage_start) * 1000
+
+    stage_start = time.time()
+    (result, inference_time), = infer_images([batch], version)
+    live_result = build_live_result(result, decoded, infos[0], inference_time)
+    live_result["modelVersion"] = version.version
+    timings["live_predict"] = (time.time() - stage_start) * 1000
+
+    return live_result, timings
+
+
+def prepare_model():
+    """
+    Load dan warm-up semua model registry (di thread background atau langsung di startup)
+    
+    Model yang sudah di-load sebelum fork (launcher.py) hanya di-warm-up. Di
+    executor "process" process induk hanya mencatat versi model; setiap worker
+    process me-load dan warm-up modelnya sendiri (init_inference_worker).
+    Model tambahan yang gagal di-load hanya dilaporkan (model default tetap dipakai).
+    """
+    global model_warmed, model_load_error
+    
+    set_torch_threads(TORCH_THREADS)
+    try:
+        stage_start = time.time()
+        model_registry.path(MODEL_DEFAULT)
+        load_model(MODEL_DEFAULT, warm_up=False)
+        for name in model_registry.names():
+            if name != MODEL_DEFAULT:
+                try:
+                    load_model(name, warm_up=False)
+                except Exception as e:
+                    print(f"Warning: Failed to load model {name}: {e}")
+        startup_timings["model_load_ms"] = round((time.time() - stage_start) * 1000, 1)
+        print("Server started successfully")
+    except Exception as e:
+        model_load_error = str(e)
+        print(f"Warning: Failed to load model at startup: {e}")
+        print("Model will be loaded on next request")
+        return
+    
+    if WARMUP_BATCHES > 0:
+        try:
+            stage_start = time.time()
+            if INFERENCE_EXECUTOR == "process":
+                inference_executor.prestart()
+            else:
+                for name in model_registry.names():
+                    version = model_registry.get(name)
+                    if version is not None and not version.warmed:
+                        warm_up_version(version)
+            warmup_time = (time.time() - stage_start) * 1000
+            startup_timings["warmup_ms"] = round(warmup_time, 1)
+            model_warmed = True
+            print(f"Model warm-up: {WARMUP_BATCHES} x batch {WARMUP_BATCH_SIZE} in {warmup_time:.1f} ms")
+        except Exception as e:
+            print(f"Warning: Model warm-up failed: {e}")
+    
+    if MODEL_WATCH_INTERVAL > 0 and INFERENCE_EXECUTOR == "thread":
+        model_registry.watch(MODEL_WATCH_INTERVAL)
+        print(f"Watching model files every {MODEL_WATCH_INTERVAL:g} s")
+    
+    startup_timings["ready_ms"] = round((time.perf_counter() - _import_start) * 1000, 1)
+    print(f"Ready {startup_timings['ready_ms']:.0f} ms after import start")
+
+
+def is_ready() -> bool:
+    """Model sudah di-load (dan warm-up selesai) dan executor siap"""
+    loading = model_loader is not None and model_loader.is_alive()
+    return is_model_loaded() and not loading and inference_executor is not None
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start inference executor, lalu load model (background atau langsung)"""
+    global inference_executor, micro_batcher, result_cache, model_loader, job_store, profile_sampler
+    
+    # Dengan micro-batching, thread batcher satu-satunya pemakai model. Tanpa
+    # batching setiap versi model punya satu instance per worker thread. Di mode
+    # "process" setiap process hanya menjalankan satu request sekaligus, jadi
+    # batching tidak dipakai dan model di-load oleh init_inference_worker.
+    use_batching = batching_enabled()
+    if use_batching:
+        micro_batcher = MicroBatcher(
+            run_micro_batch,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+            metrics=inference_metrics,
+        )
+        micro_batcher.start()
+        print(f"Micro-batching: max batch {BATCH_MAX_SIZE}, max wait {BATCH_MAX_WAIT_MS} ms")
+    
+    # Worker tanpa model murah, jadi sediakan cukup worker untuk mengisi satu batch penuh
+    workers = max(INFERENCE_WORKERS, BATCH_MAX_SIZE) if use_batching else INFERENCE_WORKERS
+    inference_executor = InferenceExecutor(
+        mode=INFERENCE_EXECUTOR,
+        workers=workers,
+        max_queue=INFERENCE_MAX_QUEUE,
+        initializer=init_inference_worker if INFERENCE_EXECUTOR == "process" else None,
+        metrics=inference_metrics,
+    )
+    inference_executor.start()
+    
+    result_cache = create_result_cache()
+    print(f"Inference executor: {INFERENCE_EXECUTOR} x{workers} (max queue {INFERENCE_MAX_QUEUE})")
+    
+    if JOBS_ENABLED:
+        job_store = JobStore(
+            JOBS_DIR,
+            retention_seconds=JOB_RETENTION,
+            max_jobs=JOB_MAX_JOBS,
+            lease_seconds=JOB_LEASE,
+        )
+        job_workers.extend(asyncio.create_task(job_worker()) for _ in range(JOB_WORKERS))
+        print(f"Job queue: {JOBS_DIR} ({JOB_WORKERS} worker)")
+    
+    if PROFILE_SAMPLE_RATE > 0:
+        if engine_available(PROFILE_ENGINE):
+            profile_sampler = ProfileSampler(PROFILE_SAMPLE_RATE)
+            print(f"Profiling: 1 of {PROFILE_SAMPLE_RATE} predictions ({PROFILE_ENGINE}) -> {PROFILE_DIR}")
+        else:
+            print(f"Warning: Profiler {PROFILE_ENGINE} not available, sampling disabled")
+    
+    if BACKGROUND_LOAD:
+        model_loader = threading.Thread(target=prepare_model, name="model-loader", daemon=True)
+        model_loader.start()
+    else:
+        # Startup (dan penerimaan koneksi oleh uvicorn) menunggu model siap
+        prepare_model()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Matikan worker job, watcher model, inference executor dan micro-batcher"""
+    # Item yang sedang berjalan kembali ke antrian setelah lease habis
+    for task in job_workers:
+        task.cancel()
+    job_workers.clear()
+    model_registry.stop_watch()
+    if inference_executor is not None:
+        inference_executor.shutdown(wait=False)
+    if micro_batcher is not None:
+        micro_batcher.stop()
+
+
+@app.get("/")
+async def root():
+    """Health check endpoint"""
+    return {
+        "status": "ok",
+        "message": "Dentalogic8 API Server",
+        "model_loaded": is_model_loaded()
+    }
+
+
+@app.get("/health")
+async def health():
+    """Health check endpoint"""
+    try:
+        active = model_registry.get()
+    except ModelNotFoundError:
+        active = None
+    return {
+        "status": "healthy",
+        "model_loaded": active is not None,
+        "model_warmed": model_warmed,
+        "model_path": str(active.path) if active is not None and active.path.exists() else None,
+        "model_version": active.version if active is not None else None,
+        "model_backend": MODEL_BACKEND,
+        "model_precision": MODEL_PRECISION,
+        "nms_method": NMS_METHOD,
+        "models": model_registry.stats(),
+        "pid": os.getpid(),
+        "ready": is_ready(),
+        "startup": startup_timings,
+        "tuned_config": tuned_config,
+        "inference": {
+            "executor": inference_executor.stats() if inference_executor is not None else None,
+            "batching": micro_batcher.stats() if micro_batcher is not None else None,
+            "stages": inference_metrics.snapshot()
+        },
+        "image_store": annotated_image_store.stats(),
+        "annotation": annotation_renderer.stats(),
+        "tiling": {
+            "default": TILING_DEFAULT,
+            "decode_max_size": TILE_DECODE_MAX_SIZE,
+            "tile_size": TILE_SIZE,
+            "overlap": TILE_OVERLAP,
+            "max_tiles": TILE_MAX,
+            "full_image": TILE_FULL_IMAGE
+        },
+        "cache": result_cache.stats() if result_cache is not None else None,
+        "jobs": job_store.stats() if job_store is not None else None,
+        "profiling": {
+            "enabled": PROFILE_ENABLED,
+            "engine": PROFILE_ENGINE,
+            "sample_rate": PROFILE_SAMPLE_RATE,
+            "sampled": profile_sampler.sampled if profile_sampler is not None else 0
+        },
+        "live": {"connections": live_api.live_connections, "max_connections": LIVE_MAX_CONNECTIONS, "max_fps": LIVE_MAX_FPS}
+    }
+
+
+@app.get("/live")
+async def live():
+    """Liveness probe: process hidup dan event loop responsif"""
+    return {"status": "alive"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 jika model siap menerima request prediksi, 503 jika belum"""
+    if is_ready():
+        return {"status": "ready", "model_warmed": model_warmed, "startup": startup_timings}
+    status = "error" if model_load_error and not is_model_loaded() else "loading"
+    return JSONResponse(
+        status_code=503,
+        content={"status": status, "error": model_load_error, "startup": startup_timings},
+        headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+    )
+
+
+async def read_image_upload(file: UploadFile) -> bytes:
+    """
+    Baca dan validasi file gambar yang di-upload
+    
+    Format dicek dari magic bytes (content_type dari client tidak dipercaya),
+    decode penuh dilakukan di inference worker.
+    
+    Raises:
+        HTTPException 400: Jika file bukan gambar
+        HTTPException 413: Jika file melebihi DENTALOGIC_UPLOAD_MAX_MB
+    """
+    stage_start = time.time()
+    try:
+        image_data, _ = await read_upload(file, UPLOAD_MAX_BYTES)
+    except UploadRejected as e:
+        error_counter.inc(type=type(e).__name__)
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    inference_metrics.observe("upload_read", (time.time() - stage_start) * 1000)
+    
+    # Validasi header gambar dengan PIL (Image.open bersifat lazy,
+    # decode penuh dilakukan di inference worker)
+    try:
+        Image.open(io.BytesIO(image_data))
+    except Exception as e:
+        error_counter.inc(type=type(e).__name__)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Gagal membaca gambar: {str(e)}"
+        )
+    
+    return image_data
+
+
+async def run_inference_job(pipeline, *args, profile: Optional[ProfileRequest] = None):
+    """
+    Jalankan pipeline prediksi di inference executor
+    
+    Error dari pipeline dipetakan ke HTTPException (503 saat queue penuh, 500 lainnya).
+    Tanpa profile, 1 dari DENTALOGIC_PROFILE_SAMPLE_RATE job di-profile ke
+    DENTALOGIC_PROFILE_DIR (laporannya tidak dikembalikan ke client).
+    
+    Returns:
+        Tuple (hasil pertama dari pipeline, laporan profile atau None);
+        timings dicatat ke inference_metrics
+    """
+    if inference_executor is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Inference executor belum siap",
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+        )
+    if model_loader is not None and model_loader.is_alive():
+        raise HTTPException(
+            status_code=503,
+            detail="Model sedang di-load, silakan coba lagi",
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+        )
+    
+    # Run prediction di inference executor (YOLO handles preprocessing internally)
+    sampled = profile is None and profile_sampler is not None and profile_sampler.sample()
+    if sampled:
+        profile = ProfileRequest(PROFILE_ENGINE, "store", "sample")
+    try:
+        if profile is None:
+            result, timings = await inference_executor.run(pipeline, *args)
+            report = None
+        else:
+            result, timings, report = await inference_executor.run(run_profiled_pipeline, profile, pipeline, *args)
+        inference_metrics.observe_many(timings)
+        return result, None if sampled else report
+    except ModelUnavailableError as e:
+        # Versi yang di-lease tidak ada di worker (checkpoint berbeda), coba lagi setelah worker sinkron
+        error_counter.inc(type=type(e).__name__)
+        print(f"Model unavailable in inference worker: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model {e.name} tidak tersedia di worker inference, silakan coba lagi",
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+        )
+    except QueueFullError as e:
+        # Semua worker sibuk dan antrian penuh
+        error_counter.inc(type=type(e).__name__)
+        print(f"Inference queue full: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server sedang sibuk, silakan coba lagi",
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+        )
+    except ValueError as e:
+        # ValueError biasanya dari validasi atau processing
+        error_counter.inc(type=type(e).__name__)
+        print(f"ValueError in prediction: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing prediction: {str(e)}"
+        )
+    except IndexError as e:
+        # IndexError dari akses array
+        error_counter.inc(type=type(e).__name__)
+        print(f"IndexError in prediction: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error accessing model output: {str(e)}. Model mungkin tidak kompatibel."
+        )
+    except Exception as e:
+        # Error lainnya
+        error_counter.inc(type=type(e).__name__)
+        print(f"Unexpected error in prediction: {type(e).__name__}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Gagal menjalankan prediksi: {str(e)}"
+        )
+
+
+def resolve_format(response_format: Optional[str], accept: Optional[str]) -> str:
+    """Format response dari query ?format=, header Accept, atau "json" (shape default)"""
+    if not response_format:
+        return negotiate_format(accept)
+    value = validate_option("format", response_format.lower(), RESPONSE_FORMATS)
+    if not is_available(value):
+        raise HTTPException(
+            status_code=406,
+            detail=f"Format {value} tidak tersedia di server (pip install {value})"
         )
+    return value
+
+
+def resolve_profile(x_profile: Optional[str], x_admin_token: Optional[str], label: str) -> Optional[ProfileRequest]:
+    """
+    Profiling request ini dari header X-Profile: "inline" (laporan di field
+    "profile" response) atau "store" (file di DENTALOGIC_PROFILE_DIR, lihat GET /profiles)
+    
+    Raises:
+        HTTPException 401/404: Token admin tidak valid atau endpoint admin nonaktif
+        HTTPException 403: Jika DENTALOGIC_PROFILE_ENABLED tidak aktif
+    """
+    if not x_profile:
+        return None
+    require_admin(x_admin_token)
+    if not PROFILE_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling nonaktif (DENTALOGIC_PROFILE_ENABLED)")
+    mode = validate_option("X-Profile", x_profile.lower(), PROFILE_MODES)
+    if not engine_available(PROFILE_ENGINE):
+        raise HTTPException(
+            status_code=501,
+            detail=f"Profiler {PROFILE_ENGINE} tidak tersedia di server (pip install {PROFILE_ENGINE})"
+        )
+    return ProfileRequest(PROFILE_ENGINE, mode, label)
+
+
+def lease_model(name: Optional[str]):
+    """
+    Lease versi aktif model ?model= (default DENTALOGIC_MODEL_DEFAULT) selama request
+    
+    Request yang sedang berjalan tetap memakai versi ini walaupun model di-swap.
+    
+    Raises:
+        HTTPException 400: Jika nama model tidak terdaftar
+        HTTPException 503: Jika model belum di-load (load dicoba lagi di background)
+    """
+    try:
+        return model_registry.acquire(name)
+    except ModelNotFoundError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"model harus salah satu dari {', '.join(e.available)}"
+        )
+    except ModelUnavailableError as e:
+        error_counter.inc(type=type(e).__name__)
+        loading = model_loader is not None and model_loader.is_alive()
+        if not loading and INFERENCE_EXECUTOR == "thread":
+            model_registry.load_async(e.name)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model {e.name} sedang di-load, silakan coba lagi",
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+        )
+
+
+def finalize_result(result: Dict, coords: str, delivery: str, response_format: str = "json") -> Dict:
+    """
+    Terapkan pilihan client ke result kanonik dari pipeline/cache (in-place)
+    
+    - coords "original": skala box ke ukuran foto asli
+    - delivery "inline": JPEG annotasi menjadi base64 data URI di 'annotatedImage'
+      (format "msgpack": bytes JPEG mentah)
+    - delivery "link": JPEG disimpan di annotated_image_store, URL di 'annotatedImageUrl'
+    - format "columnar" / "msgpack": deteksi dalam bentuk kolumnar (lihat responses.py)
+    """
+    if coords == "original":
+        map_result_to_original(result)
+    result['coords'] = coords
+    
+    jpeg_bytes = result.pop('annotatedImageBytes', None)
+    if jpeg_bytes is not None:
+        if delivery == "link":
+            image_id = uuid.uuid4().hex
+            if annotated_image_store.put(image_id, jpeg_bytes):
+                result['annotatedImageUrl'] = f"/images/{image_id}"
+        elif response_format == "msgpack":
+            result['annotatedImage'] = jpeg_bytes
+        else:
+            img_base64 = base64.b64encode(jpeg_bytes).decode('utf-8')
+            result['annotatedImage'] = str(f"data:image/jpeg;base64,{img_base64}")
+    if response_format != "json":
+        to_columnar(result)
+    return result
+
+
+def count_detections(detections: List[Dict]):
+    """Tambah counter deteksi per kelas untuk /metrics"""
+    for det in detections:
+        detection_counter.inc(**{"class": det['class']})
+
+
+def get_model_identity(model: ModelRef) -> str:
+    """Identitas model untuk key cache (backend, nama, versi = hash isi file model)"""
+    return f"{MODEL_BACKEND}:{model.name}:{model.version}"
+
+
+def make_result_cache_key(image_data: bytes, render: str, tiled: bool, model: ModelRef) -> str:
+    """Key cache: hash isi upload + semua parameter yang mempengaruhi hasil"""
+    # Parameter tiling hanya ikut key mode tiled (key mode biasa tidak berubah)
+    tiling = (
+        "tiled", TILE_DECODE_MAX_SIZE, TILE_SIZE, TILE_OVERLAP, TILE_MAX, TILE_FULL_IMAGE, TILE_MERGE_IOU
+    ) if tiled else ()
+    return content_key(
+        image_data,
+        get_model_identity(model),
+        CONFIDENCE_THRESHOLD,
+        IOU_THRESHOLD,
+        NMS_METHOD,
+        NMS_TOP_K,
+        NMS_MAX_DET,
+        NMS_SIGMA,
+        DECODE_MAX_SIZE,
+        render,
+        THUMB_MAX_SIZE if render == "thumb" else "",
+        THUMB_JPEG_QUALITY if render == "thumb" else FULL_JPEG_QUALITY,
+        *tiling,
+    )
+
+
+def create_result_cache() -> Optional[ResultCache]:
+    """Buat ResultCache sesuai konfigurasi (None jika nonaktif)"""
+    if not RESULT_CACHE_ENABLED:
+        return None
+    
+    def sizeof(result: Dict) -> int:
+        # Perkiraan: bytes JPEG + overhead per deteksi
+        return len(result.get('annotatedImageBytes') or b"") + 256 * (len(result.get('detections', [])) + 4)
+    
+    memory = LRUCache(
+        max_entries=RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds=RESULT_CACHE_TTL,
+        max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+        sizeof=sizeof,
+    )
+    disk = None
+    if RESULT_CACHE_DIR:
+        disk = DiskCache(
+            Path(RESULT_CACHE_DIR),
+            ttl_seconds=RESULT_CACHE_TTL,
+            max_bytes=RESULT_CACHE_DISK_MAX_MB * 1024 * 1024,
+        )
+    return ResultCache(memory, disk)
+
+
+async def cache_lookup(
+    images_data: List[bytes],
+    render: str,
+    tiled: bool,
+    model: ModelRef
+) -> Tuple[List[Optional[str]], List[Optional[Dict]]]:
+    """
+    Cari result di cache untuk setiap gambar
+    
+    Hashing dan baca tier disk dijalankan di thread agar tidak memblokir event loop.
+    
+    Returns:
+        Tuple (list key, list result kanonik atau None); semua None jika cache nonaktif
+    """
+    if result_cache is None:
+        return [None] * len(images_data), [None] * len(images_data)
+    
+    def lookup():
+        keys = [make_result_cache_key(image_data, render, tiled, model) for image_data in images_data]
+        return keys, [result_cache.get(key) for key in keys]
+    
+    keys, cached = await asyncio.to_thread(lookup)
+    # Copy supaya finalize_result tidak mengubah entry cache
+    return keys, [copy.deepcopy(result) if result is not None else None for result in cached]
+
+
+async def cache_store(keys: List[Optional[str]], results: List[Dict]):
+    """Simpan result kanonik ke cache (copy, ditulis di thread)"""
+    if result_cache is None:
+        return
+    entries = [(key, copy.deepcopy(result)) for key, result in zip(keys, results) if key is not None]
+    
+    def store():
+        for key, result in entries:
+            result_cache.put(key, result)
+    
+    await asyncio.to_thread(store)
+
+
+@app.post("/predict")
+async def predict(
+    file: UploadFile = File(...),
+    coords: str = COORDINATE_DEFAULT,
+    render: Optional[str] = None,
+    delivery: str = "inline",
+    tiled: Optional[bool] = None,
+    model: Optional[str] = None,
+    response_format: Optional[str] = Query(None, alias="format"),
+    x_render: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Endpoint untuk prediksi karies dari uploaded image dengan YOLO object detection
+    
+    Args:
+        file: Image file (JPEG, PNG, dll)
+        coords: Sistem koordinat bbox: "original" (default, resolusi foto asli)
+            atau "image" (sesuai annotatedImage)
+        render: "none" (tanpa annotatedImage), "thumb" atau "full";
+            bisa juga lewat header X-Render
+        delivery: "inline" (base64 di JSON) atau "link" (annotatedImageUrl ke GET /images/{id})
+        tiled: Tiled inference untuk lesi kecil di foto resolusi tinggi
+            (default DENTALOGIC_TILING_DEFAULT); schema response sama
+        model: Nama model di registry (default DENTALOGIC_MODEL_DEFAULT, lihat GET /models)
+        format: "json" (default), "columnar" atau "msgpack"; bisa juga lewat header
+            Accept (application/msgpack, application/vnd.dentalogic.columnar+json)
+        X-Profile: Header "inline" atau "store" untuk mem-profile request ini
+            (butuh X-Admin-Token dan DENTALOGIC_PROFILE_ENABLED=1; cache dilewati)
+    
+    Returns:
+        JSON dengan hasil prediksi termasuk bounding boxes:
+        {
+            "class": "D0",
+            "confidence": 95.5,
+            "allProbabilities": [...],
+            "inferenceTime": 123.45,
+            "detections": [
+                {
+                    "bbox": [x1, y1, x2, y2],
+                    "class": "D0",
+                    "confidence": 95.5
+                }
+            ],
+            "boundingBoxes": [[x1, y1, x2, y2], ...],
+            "imageSize": [width, height],
+            "originalSize": [width, height],
+            "coords": "original",
+            "model": "default",
+            "modelVersion": "3f2a9c1e0b7d"
+        }
+    """
+    try:
+        validate_option("coords", coords, COORDINATE_MODES)
+        validate_option("delivery", delivery, DELIVERY_MODES)
+        render_mode = resolve_render(render, x_render)
+        output_format = resolve_format(response_format, accept)
+        profile = resolve_profile(x_profile, x_admin_token, "predict")
+        image_data = await read_image_upload(file)
+        
+        # Upload yang sama (hash isi + versi model + parameter) langsung dari cache;
+        # request yang di-profile selalu menjalankan pipeline
+        use_tiling = TILING_DEFAULT if tiled is None else tiled
+        with lease_model(model) as version:
+            keys, cached = await cache_lookup([image_data], render_mode, use_tiling, version.ref)
+            if profile is not None:
+                cached = [None]
+            result = cached[0]
+            if result is None:
+                result, report = await run_inference_job(
+                    run_prediction_pipeline, image_data, render_mode, use_tiling, version.ref,
+                    profile=profile
+                )
+                await cache_store(keys, [result])
+        result['cached'] = cached[0] is not None
+        count_detections(result.get('detections', []))
+        finalize_result(result, coords, delivery, output_format)
+        if profile is not None:
+            result['profile'] = report
+        
+        return render_response(result, output_format)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error internal server: {str(e)}"
+        )
+
+
+@app.post("/predict/batch")
+async def predict_batch(
+    files: List[UploadFile] = File(...),
+    coords: str = COORDINATE_DEFAULT,
+    render: Optional[str] = None,
+    delivery: str = "inline",
+    tiled: Optional[bool] = None,
+    model: Optional[str] = None,
+    response_format: Optional[str] = Query(None, alias="format"),
+    x_render: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Endpoint untuk prediksi beberapa view satu pasien (Frontal_View,
+    Left_Lateral_View, Right_Lateral_View) dalam satu batch inference
+    
+    Args:
+        files: Beberapa image file (field "files", multipart)
+        coords: Sistem koordinat bbox: "original" (default) atau "image"
+        render / delivery / tiled / model / format / X-Profile: Sama dengan /predict
+            (format kolumnar per view, satu profile untuk semua view yang di-infer)
+    
+    Returns:
+        JSON dengan hasil per view dan agregat level pasien:
+        {
+            "views": [
+                {"view": "Frontal_View", "filename": "...", "class": "D2", ...}
+            ],
+            "aggregate": {
+                "class": "D2",
+                "confidence": 80.0,
+                "allProbabilities": [...],
+                "detectionCount": 3
+            },
+            "inferenceTime": 123.45,
+            "model": "default",
+            "modelVersion": "3f2a9c1e0b7d"
+        }
+    """
+    try:
+        validate_option("coords", coords, COORDINATE_MODES)
+        validate_option("delivery", delivery, DELIVERY_MODES)
+        render_mode = resolve_render(render, x_render)
+        output_format = resolve_format(response_format, accept)
+        profile = resolve_profile(x_profile, x_admin_token, "predict-batch")
+        if len(files) == 0:
+            raise HTTPException(status_code=400, detail="Minimal satu gambar harus di-upload")
+        if len(files) > BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maksimal {BATCH_MAX_FILES} gambar per request"
+            )
+        
+        images_data = [await read_image_upload(file) for file in files]
+        use_tiling = TILING_DEFAULT if tiled is None else tiled
+        
+        # View yang sudah ada di cache tidak ikut di-infer
+        with lease_model(model) as version:
+            keys, results = await cache_lookup(images_data, render_mode, use_tiling, version.ref)
+            if profile is not None:
+                results = [None] * len(images_data)
+            missing = [index for index, result in enumerate(results) if result is None]
+            report = None
+            if missing:
+                computed, report = await run_inference_job(
+                    run_batch_prediction_pipeline,
+                    [images_data[index] for index in missing],
+                    render_mode,
+                    use_tiling,
+                    version.ref,
+                    profile=profile
+                )
+                await cache_store([keys[index] for index in missing], computed)
+                for index, result in zip(missing, computed):
+                    results[index] = result
+                    result['cached'] = False
+        
+        views = []
+        all_detections = []
+        for index, (file, result) in enumerate(zip(files, results)):
+            result.setdefault('cached', True)
+            all_detections.extend(result.get('detections', []))
+            finalize_result(result, coords, delivery, output_format)
+            views.append({
+                "view": get_view_name(file.filename, index),
+                "filename": file.filename,
+                **result
+            })
+        
+        count_detections(all_detections)
+        
+        # Agregat level pasien: confidence maksimum per kelas dari semua view
+        predicted_class, confidence, all_probabilities = summarize_detections(all_detections)
+        
+        response = {
+            "views": views,
+            "aggregate": {
+                "class": predicted_class,
+                "confidence": confidence,
+                "allProbabilities": all_probabilities,
+                "detectionCount": len(all_detections)
+            },
+            # Semua view di-infer dalam satu forward pass
+            "inferenceTime": max((result.get('inferenceTime', 0.0) for result in results), default=0.0),
+            "model": version.name,
+            "modelVersion": version.version
+        }
+        if profile is not None:
+            response['profile'] = report
+        
+        return render_response(response, output_format)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error internal server: {str(e)}"
+        )
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Hitung request per endpoint/status dan catat durasi total endpoint prediksi"""
+    start_time = time.time()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Pakai template path route (misal /images/{image_id}) supaya label tidak meledak
+        # (413 dari BodySizeLimitMiddleware tidak punya route, pakai path endpoint prediksi)
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", None)
+        if endpoint is None:
+            endpoint = request.url.path if request.url.path in PREDICT_ENDPOINTS else "unmatched"
+        request_counter.inc(endpoint=endpoint, status=status_code)
+        if request.url.path in PREDICT_ENDPOINTS:
+            inference_metrics.observe("total", (time.time() - start_time) * 1000)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Metrics format Prometheus: histogram latency per stage, counter request/error/deteksi"""
+    content = render_prometheus(
+        inference_metrics,
+        counters=[request_counter, error_counter, detection_counter, live_api.live_frame_counter],
+        gauges={
+            "dentalogic_model_loaded": ("1 jika model sudah di-load", 1 if is_model_loaded() else 0),
+            "dentalogic_model_warmed": ("1 jika warm-up model sudah selesai", 1 if model_warmed else 0),
+            "dentalogic_ready": ("1 jika server siap menerima request prediksi", 1 if is_ready() else 0),
+            "dentalogic_startup_ready_seconds": (
+                "Waktu dari mulai import sampai model siap",
+                startup_timings.get("ready_ms", 0.0) / 1000,
+            ),
+            "dentalogic_inference_pending": (
+                "Request yang sedang diproses atau antri di inference executor",
+                inference_executor.stats()["pending"] if inference_executor is not None else 0,
+            ),
+            "dentalogic_live_connections": ("Koneksi /ws/live yang terbuka", live_api.live_connections),
+            "dentalogic_job_items_pending": (
+                "Item job yang belum selesai (queued + running) di antrian",
+                job_store.pending_items() if job_store is not None else 0,
+            ),
+        },
+        histogram_name="dentalogic_stage_duration_seconds",
+        histogram_help="Latency per stage (upload_read, decode, predict, extract, annotate, encode, total, ...)",
+    )
+    return Response(content=content, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/images/{image_id}")
+async def get_annotated_image(image_id: str):
+    """Ambil JPEG annotasi hasil /predict dengan delivery=link"""
+    jpeg_bytes = annotated_image_store.get(image_id)
+    if jpeg_bytes is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Gambar tidak ditemukan atau sudah kedaluwarsa"
+        )
+    return Response(content=jpeg_bytes, media_type="image/jpeg")
+
+
+async def infer_live_frame(preprocessor: Optional[LetterboxPreprocessor], frame_data: bytes) -> Dict:
+    """
+    Inference satu frame /ws/live di inference executor dengan versi aktif model default
+
+    Raises:
+        QueueFullError: Executor penuh (frame dibuang oleh live_api)
+    """
+    with model_registry.acquire() as version:
+        result, timings = await inference_executor.run(
+            run_live_frame, preprocessor, frame_data, version.ref
+        )
+    inference_metrics.observe_many(timings)
+    return result
+
+
+def executor_has_capacity() -> bool:
+    """
+    True jika executor punya worker menganggur untuk item job
+
+    Item job hanya di-submit jika request interaktif (/predict) yang sedang
+    berjalan belum memakai semua worker, jadi backfill besar tidak membuat
+    scan interaktif antri atau ditolak 503.
+    """
+    if inference_executor is None or not is_ready():
+        return False
+    interactive = inference_executor.stats()["pending"] - jobs_inflight
+    return interactive < inference_executor.workers
+
+
+class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Redirect webhook tidak diikuti (target redirect tidak melewati check_webhook_url)"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+webhook_opener = urllib.request.build_opener(NoRedirectHandler)
+
+
+def post_webhook(url: str, payload: Dict) -> str:
+    """POST ringkasan job ke webhook client; return status untuk disimpan di job"""
+    try:
+        # Cek ulang saat kirim: DNS host bisa berubah sejak job dibuat
+        check_webhook_url(url, WEBHOOK_ALLOWED_HOSTS)
+    except WebhookRejected as e:
+        print(f"Warning: Webhook {url} rejected: {e}")
+        return f"rejected: {e}"
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with webhook_opener.open(request, timeout=JOB_WEBHOOK_TIMEOUT) as response:
+            return f"delivered ({response.status})"
+    except Exception as e:
+        print(f"Warning: Webhook {url} failed: {e}")
+        return f"failed: {e}"
+
+
+async def notify_job_finished(job_id: str):
+    """Kirim webhook (jika diminta) setelah semua item job selesai"""
+    job = await asyncio.to_thread(job_store.get, job_id, False)
+    if job is None:
+        return
+    webhook_url = await asyncio.to_thread(job_store.webhook_url, job_id)
+    if not webhook_url:
+        return
+    job.pop("items")
+    job["statusUrl"] = f"/jobs/{job_id}"
+    status = await asyncio.to_thread(post_webhook, webhook_url, job)
+    await asyncio.to_thread(job_store.set_webhook_status, job_id, status)
+
+
+async def run_job_item(item: JobItem) -> Dict:
+    """Hasil prediksi satu item job (dari cache atau inference executor)"""
+    global jobs_inflight
+
+    image_data = await asyncio.to_thread(item.image_path.read_bytes)
+    with model_registry.acquire() as version:
+        keys, cached = await cache_lookup([image_data], item.render, False, version.ref)
+        result = cached[0]
+        if result is None:
+            jobs_inflight += 1
+            try:
+                result, timings = await inference_executor.run(
+                    run_prediction_pipeline, image_data, item.render, False, version.ref
+                )
+            finally:
+                jobs_inflight -= 1
+            inference_metrics.observe_many(timings)
+            await cache_store(keys, [result])
+    result['cached'] = cached[0] is not None
+    return result
+
+
+async def process_job_item(item: JobItem):
+    """
+    Proses satu item yang sudah di-claim dan simpan hasilnya
+
+    Error apa pun setelah claim mengakhiri item (failed) atau mengembalikannya
+    ke antrian, jadi item tidak tertahan "running" sampai lease habis.
+    """
+    try:
+        result = await run_job_item(item)
+        jpeg_bytes = result.pop('annotatedImageBytes', None)
+        count_detections(result.get('detections', []))
+        finished = await asyncio.to_thread(job_store.complete, item, result, jpeg_bytes)
+    except QueueFullError:
+        # Request interaktif mengisi antrian: kembalikan item, coba lagi nanti
+        await asyncio.to_thread(job_store.release, item)
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+        return
+    except asyncio.CancelledError:
+        # Server shutdown: item langsung bisa diambil worker lain
+        job_store.release(item)
+        raise
+    except FileNotFoundError:
+        # Job dihapus saat item menunggu
+        finished = await asyncio.to_thread(job_store.fail, item, "File gambar job tidak ditemukan")
+    except Exception as e:
+        error_counter.inc(type=type(e).__name__)
+        print(f"Job {item.job_id} item {item.index} failed: {type(e).__name__}: {str(e)}")
+        finished = await asyncio.to_thread(job_store.fail, item, f"Gagal menjalankan prediksi: {str(e)}")
+    if finished:
+        await notify_job_finished(item.job_id)
+
+
+async def sweep_jobs():
+    """Hapus job yang melewati retensi / max_jobs (paling sering sekali per JOB_SWEEP_INTERVAL)"""
+    global last_job_sweep
+    if time.time() - last_job_sweep < JOB_SWEEP_INTERVAL:
+        return
+    last_job_sweep = time.time()
+    removed = await asyncio.to_thread(job_store.sweep)
+    if removed:
+        print(f"Job sweep: removed {removed} expired jobs")
+
+
+async def job_worker():
+    """Loop worker job: ambil item dari antrian persisten selama executor punya kapasitas"""
+    while True:
+        try:
+            await sweep_jobs()
+            if not executor_has_capacity():
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            item = await asyncio.to_thread(job_store.claim)
+            if item is None:
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            await process_job_item(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Warning: Job worker error: {type(e).__name__}: {e}")
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+def get_job_store() -> JobStore:
+    if job_store is None:
+        raise HTTPException(status_code=503, detail="Job API tidak aktif (DENTALOGIC_JOBS_ENABLED)")
+    return job_store
+
+
+# Endpoint per fitur (lihat *_api.py)
+app.include_router(registry_api.create_router(model_registry, error_counter))
+app.include_router(profiling_api.create_router(profile_store))
+app.include_router(live_api.create_router(infer_live_frame, is_ready, error_counter))
+app.include_router(jobs_api.create_router(get_job_store, read_image_upload, finalize_result, error_counter))
+
+
+# Durasi import modul server (tanpa library model, yang di-import saat load)
+startup_timings["import_ms"] = round((time.perf_counter() - _import_start) * 1000, 1)
 
 
 if __name__ == "__main__":
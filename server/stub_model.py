@@ -0,0 +1,82 @@
+"""
+Model stub untuk benchmark dan load test (pengganti best.pt)
+
+StubYOLO meniru API Ultralytics YOLO yang dipakai server (`names` dan
+`predict(source, conf, iou, verbose)`) tanpa torch. Latency dan jumlah box
+bisa diatur sehingga benchmark tidak bergantung pada file model.
+
+Dipakai dengan DENTALOGIC_MODEL_BACKEND=stub:
+- DENTALOGIC_STUB_LATENCY_MS: latency per batch (ms)
+- DENTALOGIC_STUB_PER_IMAGE_MS: latency tambahan per gambar di batch (ms)
+- DENTALOGIC_STUB_BOXES: jumlah box kandidat per gambar
+- DENTALOGIC_STUB_MODE: "cpu" (matmul NumPy, memakai CPU seperti model asli) atau "sleep"
+"""
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from onnx_backend import OnnxBoxes, OnnxResults
+
+STUB_MODES = ("cpu", "sleep")
+
+
+class StubYOLO:
+    """
+    Model palsu dengan latency dan output yang bisa diatur
+
+    Box dibuat deterministik dari ukuran gambar (seed tetap), confidence
+    tersebar merata di [0, 1) sehingga threshold conf tetap berpengaruh.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        latency_ms: float = 20.0,
+        per_image_ms: float = 5.0,
+        boxes: int = 10,
+        mode: str = "cpu",
+    ):
+        if mode not in STUB_MODES:
+            raise ValueError(f"Unknown stub mode '{mode}', expected one of {STUB_MODES}")
+        self.names: Dict[int, str] = {i: name for i, name in enumerate(names)}
+        self.latency_ms = latency_ms
+        self.per_image_ms = per_image_ms
+        self.boxes = boxes
+        self.mode = mode
+        self._work = np.ones((256, 256), dtype=np.float32)
+
+    def _spend(self, duration_ms: float):
+        deadline = time.perf_counter() + duration_ms / 1000
+        if self.mode == "sleep":
+            time.sleep(max(0.0, duration_ms / 1000))
+            return
+        # Matmul melepas GIL seperti operator torch, jadi perilaku thread mirip model asli
+        while time.perf_counter() < deadline:
+            self._work @ self._work
+
+    def _result(self, image, conf: float) -> OnnxResults:
+        # Array [3, S, S] yang sudah di-letterbox: box di koordinat input model
+        width, height = (image.shape[-1], image.shape[-2]) if isinstance(image, np.ndarray) else image.size
+        rng = np.random.default_rng(width * 31 + height)
+        centers = rng.random((self.boxes, 2)) * (width, height)
+        sizes = (rng.random((self.boxes, 2)) * 0.2 + 0.05) * (width, height)
+        xyxy = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1)
+        xyxy = np.clip(xyxy, 0, (width, height, width, height)).astype(np.float32)
+        scores = rng.random(self.boxes).astype(np.float32)
+        classes = rng.integers(0, len(self.names), self.boxes).astype(np.float32)
+
+        keep = scores >= conf
+        return OnnxResults(
+            OnnxBoxes(xyxy[keep], scores[keep], classes[keep]),
+            self.names,
+            (height, width),
+        )
+
+    def predict(self, source, conf: float = 0.25, iou: float = 0.5, verbose: bool = False, **kwargs) -> List[OnnxResults]:
+        images = source if isinstance(source, (list, tuple, np.ndarray)) else [source]
+        self._spend(self.latency_ms + self.per_image_ms * len(images))
+        return [self._result(image, conf) for image in images]
+
+    def fuse(self):
+        return self
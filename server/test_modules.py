@@ -0,0 +1,1401 @@
+"""
+Script untuk test perilaku modul server (tanpa server berjalan)
+
+Usage:
+    python test_modules.py                 # semua test
+    python test_modules.py inference jobs  # hanya grup tertentu
+    python -m pytest test_modules.py       # lewat pytest
+
+Test yang meng-import server.py memakai backend model stub, jadi tidak butuh
+torch/ultralytics maupun file model.
+"""
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Sebelum server/config di-import
+os.environ.setdefault("DENTALOGIC_MODEL_BACKEND", "stub")
+os.environ.setdefault("DENTALOGIC_BACKGROUND_LOAD", "0")
+os.environ.setdefault("DENTALOGIC_JOBS_ENABLED", "0")
+
+from cache import DiskCache, LRUCache, ResultCache, content_key
+from inference import InferenceExecutor, MicroBatcher, QueueFullError
+from jobs import JobStore, WebhookRejected, check_webhook_url
+from live import FrameRateLimiter, LatestFrameSlot
+from registry import (
+    ModelNotFoundError, ModelRef, ModelRegistry, ModelUnavailableError, ModelVersion, file_signature, file_version,
+)
+from responses import COLUMNAR_MEDIA_TYPE, is_available, negotiate_format, render_response, to_columnar
+from tiling import merge_tile_boxes, plan_tiles
+from uploads import BodySizeLimitMiddleware, UploadRejected, read_upload, sniff_image_type
+
+
+def check(description: str, ok: bool):
+    """
+    Print hasil satu pengecekan
+
+    Raises:
+        AssertionError: Jika pengecekan gagal (test berhenti, juga di pytest)
+    """
+    print(f"  {'✅' if ok else '❌'} {description}")
+    assert ok, description
+
+
+def test_executor_admission():
+    """Test admission queue InferenceExecutor"""
+    print("\nTesting InferenceExecutor admission...")
+    executor = InferenceExecutor("thread", workers=1, max_queue=1)
+    gate = threading.Event()
+    try:
+        running = executor.submit(gate.wait, 5)
+        queued = executor.submit(gate.wait, 5)
+        try:
+            executor.submit(gate.wait, 5)
+            rejected = False
+        except QueueFullError as e:
+            rejected = e.pending == 2 and e.capacity == 2
+        gate.set()
+        running.result(timeout=5)
+        queued.result(timeout=5)
+        stats = executor.stats()
+        check("submit ke-3 ditolak saat 1 worker + 1 antrian terisi", rejected)
+        check("rejected tercatat di stats", stats["rejected"] == 1)
+        check("pending kembali 0 setelah selesai", stats["pending"] == 0 and stats["completed"] == 2)
+        check("submit diterima lagi setelah kapasitas kosong", executor.submit(int, "7").result(timeout=5)[0] == 7)
+    finally:
+        gate.set()
+        executor.shutdown()
+
+
+def test_queue_full_503():
+    """Test QueueFullError dipetakan ke 503 + Retry-After oleh run_inference_job"""
+    print("\nTesting run_inference_job saat executor penuh...")
+    import server
+    from fastapi import HTTPException
+
+    executor = InferenceExecutor("thread", workers=1, max_queue=0)
+    gate = threading.Event()
+    previous = server.inference_executor
+    server.inference_executor = executor
+    try:
+        executor.submit(gate.wait, 5)
+        try:
+            asyncio.run(server.run_inference_job(int, "1"))
+            error = None
+        except HTTPException as e:
+            error = e
+        check("HTTPException 503", error is not None and error.status_code == 503)
+        check(
+            "header Retry-After = DENTALOGIC_INFERENCE_RETRY_AFTER",
+            error is not None and error.headers.get("Retry-After") == str(server.INFERENCE_RETRY_AFTER)
+        )
+    finally:
+        gate.set()
+        server.inference_executor = previous
+        executor.shutdown()
+
+
+def test_micro_batcher():
+    """Test deadline, batch penuh, cancel dan error MicroBatcher"""
+    print("\nTesting MicroBatcher...")
+    batches = []
+
+    def run_batch(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(run_batch, max_batch_size=8, max_wait_ms=100)
+    try:
+        started = time.monotonic()
+        futures = [batcher.submit_async(i) for i in range(3)]
+        values = [future.result(timeout=5) for future in futures]
+        elapsed = time.monotonic() - started
+        check("hasil per item sesuai urutan", values == [0, 10, 20])
+        check("batch belum penuh dijalankan setelah max_wait_ms", batches == [[0, 1, 2]] and elapsed >= 0.09)
+    finally:
+        batcher.stop()
+
+    batches.clear()
+    batcher = MicroBatcher(run_batch, max_batch_size=2, max_wait_ms=5000)
+    try:
+        started = time.monotonic()
+        futures = [batcher.submit_async(i) for i in range(2)]
+        for future in futures:
+            future.result(timeout=5)
+        check("batch penuh langsung dijalankan tanpa menunggu deadline", time.monotonic() - started < 1)
+    finally:
+        batcher.stop()
+
+    batches.clear()
+    gate = threading.Event()
+
+    def blocking_batch(items):
+        gate.wait(5)
+        return run_batch(items)
+
+    batcher = MicroBatcher(blocking_batch, max_batch_size=1, max_wait_ms=0)
+    try:
+        first = batcher.submit_async(1)
+        time.sleep(0.2)
+        cancelled = batcher.submit_async(2)
+        last = batcher.submit_async(3)
+        check("item yang masih antri bisa di-cancel", cancelled.cancel())
+        gate.set()
+        first.result(timeout=5)
+        last.result(timeout=5)
+        check("item yang di-cancel tidak ikut run_batch", batches == [[1], [3]])
+    finally:
+        gate.set()
+        batcher.stop()
+
+    def failing_batch(items):
+        raise ValueError("gagal")
+
+    def short_batch(items):
+        return items[:1]
+
+    batcher = MicroBatcher(failing_batch, max_batch_size=2, max_wait_ms=0)
+    try:
+        try:
+            batcher.submit(1)
+            raised = False
+        except ValueError:
+            raised = True
+        check("error run_batch diteruskan ke pemanggil", raised)
+    finally:
+        batcher.stop()
+
+    batcher = MicroBatcher(short_batch, max_batch_size=2, max_wait_ms=50)
+    try:
+        futures = [batcher.submit_async(i) for i in range(2)]
+        errors = [type(future.exception(timeout=5)).__name__ for future in futures]
+        check("jumlah hasil tidak sesuai = RuntimeError untuk semua item", errors == ["RuntimeError"] * 2)
+    finally:
+        batcher.stop()
+
+
+def test_lru_cache():
+    """Test eviction LRUCache (TTL, max_entries, max_bytes)"""
+    print("\nTesting LRUCache...")
+    cache = LRUCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+    check("max_entries membuang entry yang paling lama tidak dipakai", cache.get("b") is None and cache.get("a") == b"1")
+
+    cache = LRUCache(max_entries=0, max_bytes=10)
+    cache.put("a", b"x" * 4)
+    cache.put("b", b"x" * 4)
+    cache.put("c", b"x" * 4)
+    stats = cache.stats()
+    check("max_bytes membuang entry terlama", cache.get("a") is None and len(cache) == 2 and stats["bytes"] == 8)
+    check("eviction tercatat di stats", stats["evictions"] == 1)
+    check("value lebih besar dari max_bytes tidak disimpan", not cache.put("d", b"x" * 11) and cache.get("d") is None)
+    cache.put("b", b"x" * 6)
+    check("put ulang key yang sama menghitung ulang ukuran", cache.stats()["bytes"] == 10 and len(cache) == 2)
+
+    cache = LRUCache(ttl_seconds=0.1)
+    cache.put("a", b"1")
+    fresh = cache.get("a") == b"1"
+    time.sleep(0.15)
+    check("entry bisa dibaca sebelum TTL habis", fresh)
+    check("entry kedaluwarsa setelah TTL dan dihapus", cache.get("a") is None and len(cache) == 0)
+
+
+def test_disk_cache():
+    """Test TTL dan sweep DiskCache, serta promosi hit disk di ResultCache"""
+    print("\nTesting DiskCache dan ResultCache...")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(Path(directory) / "ttl", ttl_seconds=0.2)
+        cache.put("old", {"value": 1})
+        time.sleep(0.3)
+        cache.put("new", {"value": 2})
+        check("entry dalam TTL terbaca", cache.get("new") == {"value": 2})
+        check("entry lebih tua dari TTL diabaikan dan dihapus saat get",
+              cache.get("old") is None and cache.stats()["entries"] == 1)
+
+        cache.put("old", {"value": 1})
+        time.sleep(0.3)
+        cache.put("new", {"value": 2})
+        cache.sweep()
+        check("sweep menghapus entry kedaluwarsa", cache.stats()["entries"] == 1 and cache.get("new") == {"value": 2})
+
+        cache = DiskCache(Path(directory) / "sized")
+        cache.put("a", b"x" * 1000)
+        entry_bytes = cache.stats()["bytes"]
+        for key in "bcd":
+            # mtime berbeda supaya urutan umur entry pasti
+            time.sleep(0.02)
+            cache.put(key, b"x" * 1000)
+        cache.max_bytes = entry_bytes * 2
+        cache.sweep()
+        check("sweep max_bytes menghapus entry terlama dulu",
+              [cache.get(key) is not None for key in "abcd"] == [False, False, True, True]
+              and cache.stats()["bytes"] == entry_bytes * 2)
+
+        cache = DiskCache(Path(directory) / "auto", max_bytes=1)
+        for index in range(DiskCache.SWEEP_INTERVAL):
+            cache.put(f"k{index}", b"x" * 100)
+        check("sweep otomatis setiap SWEEP_INTERVAL put", cache.stats()["entries"] == 0)
+
+        disk = DiskCache(Path(directory) / "result")
+        key = content_key(b"gambar", "render=none", 0.25)
+        disk.put(key, {"detections": []})
+        result_cache = ResultCache(LRUCache(max_entries=4), disk)
+        first = result_cache.get(key)
+        second = result_cache.get(key)
+        missing = result_cache.get(content_key(b"gambar", "render=thumb", 0.25))
+        stats = result_cache.stats()
+        check("hit disk dipromosikan ke memori", first == second == {"detections": []} and stats["hits_disk"] == 1 and stats["hits_memory"] == 1)
+        check("parameter berbeda = key berbeda (miss)", missing is None and stats["misses"] == 1)
+
+
+def sample_image(size=(64, 48), image_format: str = "JPEG") -> bytes:
+    """Gambar kecil untuk test upload/decode"""
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 180, 160)).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def test_upload_sniffing():
+    """Test sniffing magic bytes dan batas ukuran read_upload"""
+    print("\nTesting sniff_image_type dan read_upload...")
+    from fastapi import UploadFile
+
+    headers = {
+        "jpeg": sample_image(image_format="JPEG")[:16],
+        "png": sample_image(image_format="PNG")[:16],
+        "webp": sample_image(image_format="WEBP")[:16],
+        "gif": sample_image(image_format="GIF")[:16],
+        "bmp": sample_image(image_format="BMP")[:16],
+        "tiff": sample_image(image_format="TIFF")[:16],
+    }
+    for image_type, header in headers.items():
+        check(f"{image_type} dikenali dari magic bytes", sniff_image_type(header) == image_type)
+    check("teks/HTML bukan gambar", sniff_image_type(b"<html><body>") is None)
+
+    jpeg = sample_image()
+
+    def upload(data: bytes, known_size: bool) -> UploadFile:
+        return UploadFile(io.BytesIO(data), size=len(data) if known_size else None, filename="foto.jpg")
+
+    def rejected_status(data: bytes, max_bytes: int, known_size: bool) -> int:
+        try:
+            asyncio.run(read_upload(upload(data, known_size), max_bytes))
+        except UploadRejected as e:
+            return e.status_code
+        return 200
+
+    for known_size in (True, False):
+        label = "size diketahui" if known_size else "size tidak diketahui (chunk)"
+        data, image_type = asyncio.run(read_upload(upload(jpeg, known_size), len(jpeg)))
+        check(f"{label}: isi file utuh + format", data == jpeg and image_type == "jpeg")
+        check(f"{label}: 413 jika melebihi max_bytes", rejected_status(jpeg, len(jpeg) - 1, known_size) == 413)
+        check(f"{label}: 400 jika bukan gambar", rejected_status(b"%PDF-1.4" + b"x" * 100, 0, known_size) == 400)
+
+
+def test_body_size_limit():
+    """Test BodySizeLimitMiddleware untuk body dengan dan tanpa Content-Length"""
+    print("\nTesting BodySizeLimitMiddleware...")
+    from fastapi import FastAPI, Request
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    received = []
+
+    @app.post("/limited")
+    @app.post("/free")
+    async def echo(request: Request):
+        body = await request.body()
+        received.append(len(body))
+        return {"bytes": len(body)}
+
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/limited": 100})
+
+    def chunks(count: int):
+        for _ in range(count):
+            yield b"x" * 40
+
+    # Aplikasi melihat ClientDisconnect setelah 413 terkirim: jangan di-raise ulang oleh TestClient
+    with TestClient(app, raise_server_exceptions=False) as client:
+        small = client.post("/limited", content=b"x" * 100)
+        large = client.post("/limited", content=b"x" * 101)
+        received.clear()
+        chunked_small = client.post("/limited", content=chunks(2))
+        chunked_large = client.post("/limited", content=chunks(5))
+        free = client.post("/free", content=b"x" * 1000)
+        check("body sampai batas diterima", small.status_code == 200 and small.json()["bytes"] == 100)
+        check("Content-Length di atas batas = 413", large.status_code == 413 and "detail" in large.json())
+        check("body chunked di bawah batas diterima", chunked_small.status_code == 200 and chunked_small.json()["bytes"] == 80)
+        check("body chunked melewati batas = 413, aplikasi tidak menerima body", chunked_large.status_code == 413 and received == [80, 1000])
+        check("path tanpa batas tidak dibatasi", free.status_code == 200)
+
+
+def create_job(store: JobStore, count: int = 1) -> str:
+    """Job dengan count gambar JPEG kecil"""
+    jpeg = sample_image()
+    return store.create([(f"foto_{i}.jpg", f"view_{i + 1}", jpeg) for i in range(count)], "none")
+
+
+def test_job_lease():
+    """Test claim ulang item setelah lease habis, release dan max_attempts"""
+    print("\nTesting JobStore lease dan max_attempts...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = JobStore(Path(directory), lease_seconds=0.1, max_attempts=2)
+        job_id = create_job(store)
+        item = store.claim()
+        check("item di-claim dan job menjadi running", item is not None and store.get(job_id)["status"] == "running")
+        check("item running tidak di-claim worker lain selama lease", store.claim() is None)
+
+        store.release(item)
+        released = store.claim()
+        check("release mengembalikan item ke antrian", released is not None and released.index == item.index)
+
+        # Worker "mati": lease habis, item diambil ulang (percobaan ke-2)
+        time.sleep(0.15)
+        reclaimed = store.claim()
+        check("item dengan lease habis di-claim ulang", reclaimed is not None and reclaimed.job_id == job_id)
+
+        time.sleep(0.15)
+        check("setelah max_attempts item tidak di-claim lagi", store.claim() is None)
+        job = store.get(job_id)
+        check("item gagal permanen setelah max_attempts", job["items"][0]["status"] == "failed" and "error" in job["items"][0])
+        check("job tanpa item berhasil = failed dan selesai", job["status"] == "failed" and job["finishedAt"] is not None)
+
+        # Worker lama (lease habis) tidak boleh menimpa item yang di-claim ulang
+        store = JobStore(Path(directory) / "stale", lease_seconds=0.1, max_attempts=3)
+        job_id = create_job(store)
+        stale = store.claim()
+        time.sleep(0.15)
+        current = store.claim()
+        store.release(stale)
+        stale_failed = store.fail(stale, "Gagal")
+        stale_completed = store.complete(stale, {"detections": ["lama"]}, b"jpeg-lama")
+        item = store.get(job_id)["items"][0]
+        check("claim ulang mendapat token claim baru", current is not None and current.claimed_at != stale.claimed_at)
+        check("release/fail/complete dari claim lama diabaikan",
+              not stale_failed and not stale_completed
+              and item["status"] == "running" and current.image_path.exists())
+        check("pemegang claim terbaru menyimpan hasil",
+              store.complete(current, {"detections": []}) and store.get(job_id)["items"][0]["result"] == {"detections": []}
+              and store.get_image(job_id, 0) is None)
+
+        job_id = create_job(store, 2)
+        first = store.claim()
+        second = store.claim()
+        finished_first = store.complete(first, {"detections": []}, b"jpeg")
+        finished_second = store.fail(second, "Gagal")
+        job = store.get(job_id)
+        check("hanya item terakhir yang menandai job selesai", not finished_first and finished_second)
+        check("job dengan minimal satu item berhasil = completed", job["status"] == "completed" and job["completed"] == 1 and job["failed"] == 1)
+        check("upload asli dihapus setelah item selesai", not first.image_path.exists() and not second.image_path.exists())
+        check("JPEG annotasi tersimpan", store.get_image(job_id, 0) == b"jpeg" and job["items"][0].get("hasImage"))
+
+
+def test_job_retention():
+    """Test retensi job selesai (saat dibaca dan saat sweep) dan batas max_jobs"""
+    print("\nTesting JobStore retensi...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = JobStore(Path(directory), retention_seconds=0.2, max_jobs=0)
+        job_id = create_job(store)
+        pending_id = create_job(store)
+        store.complete(store.claim(), {"detections": []}, b"jpeg")
+        check("job selesai bisa dibaca dalam retensi", store.get(job_id) is not None)
+
+        time.sleep(0.3)
+        check("job melewati retensi tidak bisa dibaca walau belum di-sweep", store.get(job_id) is None)
+        check("gambar job melewati retensi tidak bisa dibaca", store.get_image(job_id, 0) is None)
+        check("sweep menghapus job melewati retensi", store.sweep() == 1 and not (Path(directory) / job_id).exists())
+        check("job yang belum selesai tidak kena retensi", store.get(pending_id) is not None)
+
+        store = JobStore(Path(directory) / "max", retention_seconds=0, max_jobs=1)
+        oldest = create_job(store)
+        store.complete(store.claim(), {"detections": []})
+        newest = create_job(store)
+        store.complete(store.claim(), {"detections": []})
+        check("sweep max_jobs menghapus job selesai terlama", store.sweep() == 1 and store.get(oldest) is None and store.get(newest) is not None)
+
+        store = JobStore(Path(directory) / "reserve", retention_seconds=0, max_jobs=0, lease_seconds=0.2)
+        job_id = store.reserve()
+        store.write_image(job_id, 0, sample_image())
+        store.write_image(job_id, 1, sample_image())
+        check("job di-reserve belum terlihat sebelum submit", store.get(job_id) is None and store.pending_items() == 0)
+        store.submit(job_id, [("a.jpg", "view_1"), ("b.jpg", "view_2")], "none")
+        check("submit memasukkan semua item ke antrian", store.get(job_id)["total"] == 2 and store.pending_items() == 2)
+        discarded = store.reserve()
+        store.write_image(discarded, 0, sample_image())
+        store.discard(discarded)
+        check("discard menghapus direktori job yang tidak di-submit", not (store.directory / discarded).exists())
+        orphan = store.reserve()
+        time.sleep(0.3)
+        store.sweep()
+        check("sweep menghapus direktori reserve yatim setelah lease", not (store.directory / orphan).exists() and (store.directory / job_id).exists())
+
+        try:
+            store.delete("../../etc")
+            traversal_rejected = False
+        except ValueError:
+            traversal_rejected = True
+        check("ID job bukan hex uuid ditolak (tidak keluar dari direktori)", traversal_rejected and store.get_image("../../etc", 0) is None)
+        check("delete job yang tidak ada = False", store.delete("0" * 32) is False)
+
+
+def test_job_worker_errors():
+    """Test process_job_item: error di tahap mana pun mengakhiri atau mengembalikan item"""
+    print("\nTesting process_job_item saat error...")
+    import server
+
+    async def failing(item):
+        raise RuntimeError("cache rusak")
+
+    async def busy(item):
+        raise QueueFullError(1, 1)
+
+    previous = (server.job_store, server.run_job_item, server.JOB_POLL_INTERVAL)
+    with tempfile.TemporaryDirectory() as directory:
+        server.job_store = store = JobStore(Path(directory))
+        server.JOB_POLL_INTERVAL = 0
+        try:
+            job_id = create_job(store)
+            server.run_job_item = busy
+            asyncio.run(server.process_job_item(store.claim()))
+            item = store.claim()
+            check("executor penuh: item kembali ke antrian", item is not None and store.get(job_id)["items"][0]["status"] == "running")
+
+            server.run_job_item = failing
+            asyncio.run(server.process_job_item(item))
+            job = store.get(job_id)
+            check("error di luar inference (misal cache/registry): item failed, bukan tertahan running",
+                  job["items"][0]["status"] == "failed" and "cache rusak" in job["items"][0]["error"])
+            check("job selesai setelah item terakhir gagal", job["status"] == "failed" and store.pending_items() == 0)
+
+            server.run_job_item = previous[1]
+            job_id = create_job(store)
+            item = store.claim()
+            item.image_path.unlink()
+            asyncio.run(server.process_job_item(item))
+            check("file upload hilang: item failed", store.get(job_id)["items"][0]["error"] == "File gambar job tidak ditemukan")
+        finally:
+            server.job_store, server.run_job_item, server.JOB_POLL_INTERVAL = previous
+
+
+def test_job_capacity():
+    """Test executor_has_capacity memakai jumlah worker executor (bukan DENTALOGIC_INFERENCE_WORKERS)"""
+    print("\nTesting kapasitas executor untuk job...")
+    import server
+
+    class FakeExecutor:
+        # Dengan batching executor berukuran max(INFERENCE_WORKERS, BATCH_MAX_SIZE)
+        workers = server.INFERENCE_WORKERS + 3
+
+        def __init__(self, pending):
+            self.pending = pending
+
+        def stats(self):
+            return {"pending": self.pending}
+
+    previous = (server.inference_executor, server.is_ready, server.jobs_inflight)
+    server.is_ready = lambda: True
+    try:
+        server.jobs_inflight = 1
+        server.inference_executor = FakeExecutor(server.INFERENCE_WORKERS + 1)
+        check("worker executor di atas INFERENCE_WORKERS tetap dipakai job", server.executor_has_capacity())
+        server.inference_executor = FakeExecutor(FakeExecutor.workers + 1)
+        check("semua worker dipakai request interaktif = tidak ada kapasitas", not server.executor_has_capacity())
+        server.jobs_inflight = 2
+        check("item job yang berjalan tidak dihitung sebagai request interaktif", server.executor_has_capacity())
+    finally:
+        server.inference_executor, server.is_ready, server.jobs_inflight = previous
+
+
+def test_webhook_url():
+    """Test validasi URL webhook (SSRF)"""
+    print("\nTesting check_webhook_url...")
+
+    def rejected(url: str, allowed_hosts=()) -> bool:
+        try:
+            check_webhook_url(url, allowed_hosts)
+        except WebhookRejected:
+            return True
+        return False
+
+    check("skema selain http/https ditolak", rejected("ftp://93.184.216.34/hook") and rejected("file:///etc/passwd"))
+    check("loopback ditolak", rejected("http://127.0.0.1:8000/jobs") and rejected("http://[::1]/hook"))
+    check("jaringan privat ditolak", rejected("http://10.0.0.5/hook") and rejected("http://192.168.1.10/hook"))
+    check("metadata cloud (link-local) ditolak", rejected("http://169.254.169.254/latest/meta-data"))
+    check("alamat publik diterima", not rejected("https://93.184.216.34/hook"))
+    check("allowlist: subdomain diterima, host lain ditolak", not rejected("https://hooks.klinik.example/a", [".klinik.example"])
+          and rejected("https://evil.example/a", [".klinik.example"]))
+
+
+def test_live_frames():
+    """Test LatestFrameSlot (hanya frame terbaru) dan FrameRateLimiter"""
+    print("\nTesting LatestFrameSlot dan FrameRateLimiter...")
+
+    async def scenario():
+        slot = LatestFrameSlot()
+        for frame in (b"a", b"b", b"c"):
+            slot.put(frame)
+        check("take mengembalikan frame terbaru dengan nomor urutnya", await slot.take() == (3, b"c"))
+        check("frame yang ditimpa dihitung dropped", slot.stats() == {"received": 3, "dropped": 2})
+
+        waiter = asyncio.create_task(slot.take())
+        await asyncio.sleep(0.05)
+        waiting = not waiter.done()
+        slot.put(b"d")
+        check("take menunggu sampai frame berikutnya datang", waiting and await asyncio.wait_for(waiter, 1) == (4, b"d"))
+
+        slot.put(b"e")
+        slot.close()
+        check("frame terakhir tetap diambil setelah close, lalu None", await slot.take() == (5, b"e") and await slot.take() is None)
+
+        slot = LatestFrameSlot()
+        waiter = asyncio.create_task(slot.take())
+        await asyncio.sleep(0.01)
+        slot.close()
+        check("close membangunkan take yang menunggu", await asyncio.wait_for(waiter, 1) is None)
+
+    asyncio.run(scenario())
+
+    limiter = FrameRateLimiter(10)
+    first_wait = limiter.wait_time()
+    limiter.consume()
+    wait = limiter.wait_time()
+    unlimited = FrameRateLimiter(0)
+    unlimited.consume()
+    check("frame pertama tidak menunggu", first_wait == 0)
+    check("10 fps: frame berikutnya menunggu ~100 ms", 0.09 <= wait <= 0.1)
+    check("max_fps 0 = tanpa batas", unlimited.wait_time() == 0)
+
+
+def test_live_router():
+    """Test endpoint /ws/live (live_api) dengan inference palsu"""
+    print("\nTesting /ws/live...")
+    import live_api
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from metrics import Counter
+    from starlette.websockets import WebSocketDisconnect
+
+    ready = [True]
+    preprocessors = []
+
+    async def infer_frame(preprocessor, frame_data):
+        preprocessors.append(preprocessor)
+        if frame_data == b"sibuk":
+            raise QueueFullError(1, 1)
+        if frame_data == b"rusak":
+            raise ValueError("bukan gambar")
+        return {"detections": [], "frameSize": [len(frame_data), 1]}
+
+    app = FastAPI()
+    app.include_router(live_api.create_router(infer_frame, lambda: ready[0], Counter("test_errors_total", "Error", ("type",))))
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/live?fps=1000") as websocket:
+            websocket.send_bytes(b"frame")
+            first = websocket.receive_json()
+            websocket.send_bytes(b"sibuk")
+            websocket.send_bytes(b"rusak")
+            error = websocket.receive_json()
+            ready[0] = False
+            websocket.send_bytes(b"frame")
+            loading = websocket.receive_json()
+            ready[0] = True
+            websocket.send_bytes(b"x" * (live_api.LIVE_MAX_FRAME_KB * 1024 + 1))
+            try:
+                websocket.receive_json()
+                close_code = None
+            except WebSocketDisconnect as e:
+                close_code = e.code
+        check("hasil frame berisi seq dan dropped", first["seq"] == 1 and first["dropped"] == 0 and first["frameSize"] == [5, 1])
+        check("executor penuh: frame dibuang tanpa pesan, error inference dikirim per frame",
+              error["seq"] == 3 and "Gagal memproses frame" in error["error"])
+        check("model belum siap: pesan error per frame", loading["seq"] == 4 and "error" in loading)
+        check("frame melebihi DENTALOGIC_LIVE_MAX_FRAME_KB: close 1009", close_code == 1009)
+
+        previous = live_api.LIVE_MAX_CONNECTIONS
+        live_api.LIVE_MAX_CONNECTIONS = 0
+        try:
+            with client.websocket_connect("/ws/live") as websocket:
+                websocket.receive_json()
+            close_code = None
+        except WebSocketDisconnect as e:
+            close_code = e.code
+        finally:
+            live_api.LIVE_MAX_CONNECTIONS = previous
+        check("koneksi melebihi DENTALOGIC_LIVE_MAX_CONNECTIONS: close 1013", close_code == 1013)
+        check("executor thread: satu preprocessor dipakai ulang per koneksi",
+              preprocessors[0] is not None and all(p is preprocessors[0] for p in preprocessors))
+
+        previous = live_api.INFERENCE_EXECUTOR
+        live_api.INFERENCE_EXECUTOR = "process"
+        preprocessors.clear()
+        try:
+            with client.websocket_connect("/ws/live?fps=1000") as websocket:
+                websocket.send_bytes(b"frame")
+                websocket.receive_json()
+        finally:
+            live_api.INFERENCE_EXECUTOR = previous
+        check("executor process: preprocessor tidak dikirim (buffer milik worker process)", preprocessors == [None])
+    check("jumlah koneksi kembali 0", live_api.live_connections == 0)
+
+
+def test_letterbox():
+    """Test LetterboxPreprocessor: scale/padding, isi buffer, round-trip to_model/to_original dan clipping"""
+    print("\nTesting LetterboxPreprocessor...")
+    import numpy as np
+    from PIL import Image
+    from preprocessing import PAD_VALUE, LetterboxPreprocessor
+
+    preprocessor = LetterboxPreprocessor(640, max_batch=1)
+    pad = np.float32(PAD_VALUE / 255.0)
+    color = np.array([200, 100, 50], dtype=np.float32) / 255.0
+
+    # (width, height) -> (scale, pad_x, pad_y)
+    cases = {
+        "landscape 1280x960": ((1280, 960), (0.5, 0, 80)),
+        "portrait 960x1280": ((960, 1280), (0.5, 80, 0)),
+        "tidak habis dibagi 1001x333": ((1001, 333), (640 / 1001, 0, (640 - round(333 * 640 / 1001)) // 2)),
+        "lebih kecil dari input 300x200": ((300, 200), (640 / 300, 0, (640 - round(200 * 640 / 300)) // 2)),
+    }
+    for name, ((width, height), (scale, pad_x, pad_y)) in cases.items():
+        batch, (info,) = preprocessor([Image.new("RGB", (width, height), (200, 100, 50))])
+        check(f"{name}: scale dan padding", np.isclose(info.scale, scale) and (info.pad_x, info.pad_y) == (pad_x, pad_y)
+              and (info.orig_width, info.orig_height) == (width, height) and info == preprocessor.letterbox_info(width, height))
+
+        # Padding bernilai PAD_VALUE, area gambar berisi pixel gambar (center aman dari interpolasi tepi)
+        right, bottom = pad_x + min(640, round(width * scale)), pad_y + min(640, round(height * scale))
+        image_area = batch[0, :, pad_y:bottom, pad_x:right]
+        padding = np.concatenate([batch[0, :, :pad_y].ravel(), batch[0, :, bottom:].ravel(),
+                                  batch[0, :, :, :pad_x].ravel(), batch[0, :, :, right:].ravel()])
+        check(f"{name}: isi buffer (gambar + padding)", batch.shape == (1, 3, 640, 640)
+              and np.allclose(image_area[:, image_area.shape[1] // 2, image_area.shape[2] // 2], color)
+              and np.all(padding == pad))
+
+        boxes = np.array([[0, 0, width, height], [width * 0.25, height * 0.4, width * 0.6, height * 0.9]], dtype=np.float32)
+        model_boxes = info.to_model(boxes)
+        check(f"{name}: to_model menggeser padding", np.allclose(model_boxes[0], [pad_x, pad_y, right, bottom], atol=1))
+        restored = model_boxes.copy()
+        check(f"{name}: round-trip to_original(to_model(box))", info.to_original(restored) is restored
+              and np.allclose(restored, boxes, atol=1e-3))
+
+        # Box di area padding di-clip ke batas gambar asli
+        outside = np.array([[0, 0, 640, 640]], dtype=np.float32)
+        check(f"{name}: box di padding di-clip", np.allclose(info.to_original(outside), [[0, 0, width, height]], atol=1e-3))
+
+    first, _ = preprocessor([Image.new("RGB", (64, 48))])
+    second, _ = preprocessor([Image.new("L", (48, 64))])
+    grown, _ = preprocessor([Image.new("RGB", (64, 48))] * 3)
+    check("buffer dipakai ulang antar panggilan (gambar non-RGB dikonversi)", np.shares_memory(first, second))
+    check("buffer diperbesar untuk batch lebih besar", grown.shape == (3, 3, 640, 640))
+
+
+def test_decode_image():
+    """Test decode_image (JPEG draft, orientasi EXIF 6/8) dan map_result_to_original"""
+    print("\nTesting decode_image...")
+    from PIL import Image
+    from preprocessing import DRAFT_MIN_RATIO, decode_image
+    import server
+
+    def jpeg(size, orientation=1, split=False):
+        image = Image.new("RGB", size, (0, 0, 255))
+        if split:
+            # Setengah kiri merah, kanan biru: arah rotasi bisa dicek dari warna
+            image.paste((255, 0, 0), (0, 0, size[0] // 2, size[1]))
+        exif = Image.Exif()
+        if orientation != 1:
+            exif[0x0112] = orientation
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=90, exif=exif.tobytes())
+        return buffer.getvalue()
+
+    def is_red(pixel):
+        return pixel[0] > 200 and pixel[2] < 60
+
+    # 2560x1920, max_size 700: draft 1/4 (640x480) sudah >= 0.75 x 700, tanpa resize tambahan.
+    # Tanpa draft hasilnya thumbnail 700x525.
+    decoded = decode_image(jpeg((2560, 1920)), 700)
+    check("JPEG besar: draft DCT dipakai (640x480, bukan thumbnail 700x525)", decoded.image.size == (640, 480))
+    check("JPEG besar: original_size dan scale", decoded.original_size == (2560, 1920) and decoded.scale == 0.25)
+    check("sisi terpanjang di antara DRAFT_MIN_RATIO x max_size dan max_size", DRAFT_MIN_RATIO * 700 <= max(decoded.image.size) <= 700)
+    check("max_size 0 = ukuran penuh", decode_image(jpeg((320, 240))).image.size == (320, 240))
+
+    # Orientasi 6 = putar 90 derajat searah jarum jam (kiri jadi atas), 8 = berlawanan (kiri jadi bawah)
+    for orientation, red_on_top in ((6, True), (8, False)):
+        decoded = decode_image(jpeg((60, 40), orientation, split=True))
+        image = decoded.image
+        check(f"EXIF orientasi {orientation}: ukuran setelah rotasi", image.size == (40, 60) and decoded.original_size == (40, 60))
+        check(f"EXIF orientasi {orientation}: arah rotasi", is_red(image.getpixel((20, 5))) == red_on_top
+              and is_red(image.getpixel((20, 54))) != red_on_top)
+
+        decoded = decode_image(jpeg((2560, 1920), orientation), 700)
+        check(f"EXIF orientasi {orientation} + draft: ukuran asli ditukar", decoded.image.size == (480, 640)
+              and decoded.original_size == (1920, 2560) and decoded.scale == 0.25)
+
+    result = {
+        "imageSize": [640, 480],
+        "originalSize": [4000, 3000],
+        "detections": [{"bbox": [64, 48, 128, 96], "class": "D2", "confidence": 80.0}],
+        "boundingBoxes": [[64, 48, 128, 96]],
+    }
+    mapped = server.map_result_to_original(result)
+    check("map_result_to_original: box diskalakan ke ukuran asli (in-place)", mapped is result
+          and result["detections"][0]["bbox"] == [400, 300, 800, 600] and result["boundingBoxes"] == [[400, 300, 800, 600]])
+    same = {"imageSize": [640, 480], "originalSize": [640, 480], "detections": [{"bbox": [1, 2, 3, 4]}], "boundingBoxes": [[1, 2, 3, 4]]}
+    check("map_result_to_original: ukuran sama = tidak berubah", server.map_result_to_original(same)["boundingBoxes"] == [[1, 2, 3, 4]])
+
+
+def test_annotation_render():
+    """Test render annotasi: mode none/thumb/full (ukuran JPEG, box tergambar) dan AnnotationRenderer"""
+    print("\nTesting render annotasi...")
+    from PIL import Image
+    from annotate import CLASS_COLORS, AnnotationRenderer
+    import server
+
+    def is_red(pixel):
+        # Garis tipis di JPEG (chroma subsampling) tidak lagi merah murni
+        return pixel[0] - max(pixel[1], pixel[2]) > 60
+
+    detections = [{"bbox": [100, 300, 500, 700], "class": "D3", "confidence": 87.5}]
+    gray = (128, 128, 128)
+
+    timings = {}
+    image = Image.new("RGB", (1280, 960), gray)
+    check("render none: tanpa JPEG, tanpa menggambar", server.render_annotated_image(image, detections, timings, "none") is None
+          and timings == {} and image.getpixel((300, 699)) == gray)
+
+    image = Image.new("RGB", (1280, 960), gray)
+    thumb = Image.open(io.BytesIO(server.render_annotated_image(image, detections, timings, "thumb")))
+    scale = server.THUMB_MAX_SIZE / 1280
+    check("render thumb: JPEG sisi terpanjang THUMB_MAX_SIZE", thumb.format == "JPEG" and thumb.size == (server.THUMB_MAX_SIZE, round(960 * scale)))
+    check("render thumb: box diskalakan ke thumbnail", is_red(thumb.convert("RGB").getpixel((round(300 * scale), round(700 * scale)))))
+    check("render thumb: gambar resolusi penuh tidak diubah", image.getpixel((300, 699)) == gray)
+    check("timing annotate dan encode dicatat", "annotate" in timings and "encode" in timings)
+
+    small = Image.new("RGB", (320, 240), gray)
+    small_thumb = Image.open(io.BytesIO(server.render_annotated_image(small, [], {}, "thumb")))
+    check("render thumb: gambar kecil tidak diperbesar", small_thumb.size == (320, 240))
+
+    image = Image.new("RGB", (1280, 960), gray)
+    full = Image.open(io.BytesIO(server.render_annotated_image(image, detections, {}, "full")))
+    check("render full: JPEG ukuran gambar", full.format == "JPEG" and full.size == (1280, 960))
+    check("render full: box digambar di gambar (in-place) dan di JPEG", image.getpixel((300, 699)) == CLASS_COLORS["D3"]
+          and is_red(full.convert("RGB").getpixel((300, 699))))
+
+    renderer = AnnotationRenderer()
+    check("ukuran font/garis mengikuti resolusi", renderer.sizes_for((1280, 960)) == (40, 3) and renderer.sizes_for((4000, 3000)) == (125, 9))
+    blank = Image.new("RGB", (64, 64), gray)
+    check("tanpa deteksi: gambar tidak diubah", renderer.draw(blank, []) is blank and blank.getpixel((0, 0)) == gray)
+
+    # Box di tepi atas: label digambar di dalam box, bukan terpotong di luar gambar
+    image = Image.new("RGB", (640, 480), gray)
+    renderer.draw(image, [{"bbox": [50, 0, 300, 200], "class": "D6", "confidence": 50.0}])
+    font_size, _ = renderer.sizes_for(image.size)
+    check("label box di tepi atas masuk ke dalam box", image.getpixel((52, font_size // 2)) in (CLASS_COLORS["D6"], (0, 0, 0)))
+    misses = renderer.stats()["glyph_cache"]["misses"]
+    renderer.draw(Image.new("RGB", (640, 480), gray), [{"bbox": [10, 100, 60, 150], "class": "D6", "confidence": 50.0}])
+    check("glyph label di-cache (tanpa rasterisasi ulang)", renderer.stats()["glyph_cache"]["misses"] == misses)
+
+
+def test_profiling():
+    """Test ProfileSession (capture, sesi bersamaan dilewati), ProfileStore (simpan, listing, batas) dan /profiles"""
+    print("\nTesting profiling...")
+    import pstats
+    import api
+    import profiling
+    import profiling_api
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    def workload():
+        return sum(i * i for i in range(20000))
+
+    request = profiling.ProfileRequest("cprofile", "store", "predict")
+    with profiling.ProfileSession(request) as session:
+        active = profiling.current() is session and profiling.profiling_active()
+        with profiling.ProfileSession(request) as nested:
+            pass
+        workload()
+    check("sesi aktif terlihat di thread ini, hilang setelah selesai", active and profiling.current() is None)
+    check("sesi kedua saat sesi lain aktif dilewati (tanpa menunggu)", nested.skipped and nested.report()["skipped"])
+    report = session.report()
+    check("laporan inline berisi durasi dan fungsi yang di-profile", report["durationMs"] > 0 and "workload" in report["summary"])
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = profiling.ProfileStore(Path(directory) / "profiles", max_files=3)
+        check("store kosong sebelum direktori dibuat", store.files() == [])
+        saved = session.save(store)
+        check("save menulis .prof dan .txt", saved["files"] == [f"{session.id}.prof", f"{session.id}.txt"])
+        stats = pstats.Stats(str(store.path(f"{session.id}.prof")))
+        check("file .prof bisa dibaca pstats", any(function[2] == "workload" for function in stats.stats))
+
+        time.sleep(0.01)
+        store.write("b.txt", b"b")
+        time.sleep(0.01)
+        store.write("c.txt", b"c")
+        names = [entry["name"] for entry in store.files()]
+        check("max_files: file terlama dihapus, listing terbaru dulu", len(names) == 3 and names[:2] == ["c.txt", "b.txt"])
+        store.max_bytes = 1
+        store.write("d.txt", b"d")
+        check("max_bytes: file terlama dihapus sampai ukuran total muat", [entry["name"] for entry in store.files()] == ["d.txt"])
+        check("nama file dengan path atau file tersembunyi ditolak", store.path("../d.txt") is None and store.path(".d.txt.tmp") is None)
+
+        app = FastAPI()
+        app.include_router(profiling_api.create_router(store))
+        previous = api.ADMIN_TOKEN
+        api.ADMIN_TOKEN = "rahasia"
+        try:
+            with TestClient(app) as client:
+                unauthorized = client.get("/profiles")
+                listing = client.get("/profiles", headers={"X-Admin-Token": "rahasia"})
+                download = client.get("/profiles/d.txt", headers={"X-Admin-Token": "rahasia"})
+                missing = client.get("/profiles/b.txt", headers={"X-Admin-Token": "rahasia"})
+        finally:
+            api.ADMIN_TOKEN = previous
+        check("/profiles butuh X-Admin-Token", unauthorized.status_code == 401)
+        check("/profiles: listing file dan batas store", listing.status_code == 200 and listing.json()["files"] == 1
+              and listing.json()["profiles"][0]["name"] == "d.txt")
+        check("/profiles/{name}: download, 404 untuk file yang sudah dihapus", download.content == b"d" and missing.status_code == 404)
+
+    sampler = profiling.ProfileSampler(3)
+    check("sampler memilih 1 dari N request", [sampler.sample() for _ in range(6)] == [False, False, True] * 2 and sampler.sampled == 2)
+    check("sampler 0 = tidak pernah", not any(profiling.ProfileSampler(0).sample() for _ in range(5)))
+
+
+def test_tuned_config():
+    """Test apply_tuned_config: setdefault ke environment, env eksplisit menang, cpu_count berbeda ditolak"""
+    print("\nTesting tuned config...")
+    import subprocess
+    import tuning
+
+    def apply(path):
+        tuning.applied_config = None
+        os.environ["DENTALOGIC_TUNED_CONFIG"] = str(path)
+        return tuning.apply_tuned_config()
+
+    keys = ("DENTALOGIC_TUNED_CONFIG", "DENTALOGIC_TEST_TUNED_A", "DENTALOGIC_TEST_TUNED_B")
+    previous = ({key: os.environ.get(key) for key in keys}, tuning.applied_config)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "tuned.json"
+        env = {"DENTALOGIC_TEST_TUNED_A": "2", "DENTALOGIC_TEST_TUNED_B": "4"}
+        tuning.write_tuned_config(path, env, {"cpu_count": os.cpu_count()}, [])
+        try:
+            os.environ.pop("DENTALOGIC_TEST_TUNED_A", None)
+            os.environ["DENTALOGIC_TEST_TUNED_B"] = "1"
+            applied = apply(path)
+            check("env dari tuned.json dipakai sebagai default", os.environ["DENTALOGIC_TEST_TUNED_A"] == "2")
+            check("environment variable eksplisit menang", os.environ["DENTALOGIC_TEST_TUNED_B"] == "1"
+                  and applied == {"path": str(path), "env": {"DENTALOGIC_TEST_TUNED_A": "2"}})
+            check("diterapkan sekali per process", tuning.apply_tuned_config() is applied)
+
+            os.environ.pop("DENTALOGIC_TEST_TUNED_A")
+            tuning.write_tuned_config(path, env, {"cpu_count": os.cpu_count() + 1}, [])
+            check("cpu_count berbeda: file tidak dipakai", apply(path) is None and "DENTALOGIC_TEST_TUNED_A" not in os.environ)
+            path.write_text("{}")
+            check("file tanpa field env diabaikan", apply(path) is None)
+            check("file tidak ada / DENTALOGIC_TUNED_CONFIG kosong = nonaktif", apply(Path(directory) / "x.json") is None and apply("") is None)
+        finally:
+            for key, value in previous[0].items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            tuning.applied_config = previous[1]
+
+        # config.py menerapkan tuned.json sebelum membaca DENTALOGIC_* (process baru)
+        tuning.write_tuned_config(path, {"DENTALOGIC_INFERENCE_WORKERS": "3", "DENTALOGIC_BATCH_MAX_SIZE": "5"},
+                                  {"cpu_count": os.cpu_count()}, [])
+        child_env = {**os.environ, "DENTALOGIC_TUNED_CONFIG": str(path), "DENTALOGIC_BATCH_MAX_SIZE": "2"}
+        child_env.pop("DENTALOGIC_INFERENCE_WORKERS", None)
+        output = subprocess.run(
+            [sys.executable, "-c", "import config; print(config.INFERENCE_WORKERS, config.BATCH_MAX_SIZE)"],
+            cwd=Path(__file__).parent, env=child_env, capture_output=True, text=True, check=True,
+        ).stdout.split()[-2:]
+        check("config.py: nilai tuned.json dipakai, env eksplisit tetap menang", output == ["3", "2"])
+
+
+def test_predict_batch():
+    """Test POST /predict/batch dengan backend stub: hasil per view dan agregat pasien"""
+    print("\nTesting /predict/batch...")
+    import server
+    from fastapi.testclient import TestClient
+
+    views = ["Frontal_View", "Left_Lateral_View", "Right_Lateral_View"]
+    files = [("files", (f"pasien_{view}.jpg", sample_image((320 + 64 * i, 240)), "image/jpeg")) for i, view in enumerate(views)]
+    with TestClient(server.app) as client:
+        response = client.post("/predict/batch?render=none", files=files)
+        body = response.json()
+        too_many = client.post("/predict/batch", files=[("files", ("a.jpg", sample_image(), "image/jpeg"))] * (server.BATCH_MAX_FILES + 1))
+        not_image = client.post("/predict/batch", files=[("files", ("a.jpg", b"bukan gambar", "image/jpeg"))])
+        thumb = client.post("/predict/batch?render=thumb&coords=image", files=files[:1]).json()
+
+    check("200 dengan satu hasil per view, urut upload", response.status_code == 200
+          and [view["view"] for view in body["views"]] == views and body["views"][0]["filename"] == "pasien_Frontal_View.jpg")
+    check("setiap view punya ukuran asli dan tanpa annotatedImage (render=none)", all(
+        view["originalSize"] == [320 + 64 * i, 240] and "annotatedImage" not in view for i, view in enumerate(body["views"])
+    ))
+
+    detections = [det for view in body["views"] for det in view["detections"]]
+    aggregate = body["aggregate"]
+    check("agregat menghitung deteksi semua view", aggregate["detectionCount"] == len(detections) > 0)
+    best = max(detections, key=lambda det: det["confidence"])
+    check("agregat kelas = deteksi dengan confidence tertinggi", aggregate["class"] == best["class"]
+          and aggregate["confidence"] == best["confidence"])
+    expected = {probability["class"]: 0.0 for probability in aggregate["allProbabilities"]}
+    for det in detections:
+        expected[det["class"]] = max(expected[det["class"]], det["confidence"])
+    check("agregat allProbabilities = confidence maksimum per kelas semua view", all(
+        abs(probability["probability"] - expected[probability["class"]]) < 1e-6 for probability in aggregate["allProbabilities"]
+    ))
+    check("inferenceTime dan versi model", body["inferenceTime"] == max(view["inferenceTime"] for view in body["views"])
+          and body["model"] == server.DEFAULT_MODEL_NAME and body["modelVersion"])
+    check("render=thumb: annotatedImage per view", bool(thumb["views"][0].get("annotatedImage")))
+    check("melebihi DENTALOGIC_BATCH_MAX_FILES = 400, bukan gambar = 400", too_many.status_code == 400 and not_image.status_code == 400)
+
+
+def test_metrics_format():
+    """Test GET /metrics: format teks Prometheus (HELP/TYPE, histogram kumulatif, counter dan gauge)"""
+    print("\nTesting /metrics...")
+    import re
+    import server
+    from fastapi.testclient import TestClient
+    from metrics import Counter, StageMetrics, render_prometheus
+
+    # nama{label="nilai",...} nilai
+    sample = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+    with TestClient(server.app) as client:
+        client.post("/predict?render=none", files={"file": ("foto.jpg", sample_image(), "image/jpeg")})
+        response = client.get("/metrics")
+
+    check("content-type text/plain version=0.0.4", response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+    types = {}
+    samples = []
+    malformed = []
+    for line in response.text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ", 3)
+            types[name] = kind
+        elif line and not line.startswith("# HELP "):
+            match = sample.match(line)
+            if match is None:
+                malformed.append(line)
+            else:
+                samples.append((match.group(1), match.group(2) or "", match.group(3)))
+    check("setiap baris sample valid", not malformed and samples)
+
+    def family(name):
+        for kind_name in (name, re.sub(r"_(bucket|sum|count)$", "", name)):
+            if kind_name in types:
+                return kind_name
+        return None
+
+    check("setiap sample punya # TYPE", all(family(name) for name, _, _ in samples))
+    check("tipe metric utama", types.get("dentalogic_stage_duration_seconds") == "histogram"
+          and types.get("dentalogic_requests_total") == "counter" and types.get("dentalogic_ready") == "gauge")
+
+    buckets = [(labels, float(value)) for name, labels, value in samples
+               if name == "dentalogic_stage_duration_seconds_bucket" and 'stage="total"' in labels]
+    count = next(float(value) for name, labels, value in samples
+                 if name == "dentalogic_stage_duration_seconds_count" and labels == '{stage="total"}')
+    check("histogram: bucket kumulatif naik, +Inf = _count", buckets and all(a[1] <= b[1] for a, b in zip(buckets, buckets[1:]))
+          and buckets[-1] == ('{stage="total",le="+Inf"}', count) and count >= 1)
+    check("counter request /predict status 200", ("dentalogic_requests_total", '{endpoint="/predict",status="200"}') in
+          {(name, labels) for name, labels, value in samples if float(value) >= 1})
+    check("gauge dentalogic_ready = 1", ("dentalogic_ready", "", "1") in samples)
+
+    # Escape nilai label dan histogram dalam detik (disimpan dalam ms)
+    stages = StageMetrics()
+    stages.observe("decode", 250)
+    counter = Counter("test_total", "Test", ("path",))
+    counter.inc(path='a"b\\c\nd')
+    text = render_prometheus(stages, counters=[counter], gauges={"test_gauge": ("Gauge", 0.5)}, histogram_name="test_seconds")
+    check("nilai label di-escape", 'test_total{path="a\\"b\\\\c\\nd"} 1' in text.splitlines())
+    check("histogram diekspor dalam detik", 'test_seconds_sum{stage="decode"} 0.25' in text and "test_gauge 0.5" in text)
+
+
+def test_ready():
+    """Test GET /ready: 503 selama model di-load di background, 200 setelah siap, status error jika load gagal"""
+    print("\nTesting /ready...")
+    import server
+    from fastapi.testclient import TestClient
+
+    def failing_version(name, path, **options):
+        raise RuntimeError("checkpoint rusak")
+
+    gate = threading.Event()
+    prepare_model = server.prepare_model
+
+    def gated_prepare_model():
+        gate.wait(10)
+        prepare_model()
+
+    previous = (server.model_registry, server.prepare_model, server.BACKGROUND_LOAD, server.model_load_error)
+    server.model_registry = server.create_model_registry()
+    server.prepare_model = gated_prepare_model
+    server.BACKGROUND_LOAD = True
+    server.model_load_error = None
+    try:
+        with TestClient(server.app) as client:
+            loading = client.get("/ready")
+            health = client.get("/health")
+            metrics_loading = client.get("/metrics").text.splitlines()
+            gate.set()
+            server.model_loader.join(10)
+            ready = client.get("/ready")
+            metrics_ready = client.get("/metrics").text.splitlines()
+
+        server.model_registry = ModelRegistry(failing_version, default=server.MODEL_DEFAULT)
+        server.model_registry.register(server.DEFAULT_MODEL_NAME, Path("best.pt"))
+        with TestClient(server.app) as client:
+            server.model_loader.join(10)
+            failed = client.get("/ready")
+    finally:
+        server.model_registry, server.prepare_model, server.BACKGROUND_LOAD, server.model_load_error = previous
+
+    check("model belum di-load: 503 loading dengan Retry-After", loading.status_code == 503
+          and loading.json()["status"] == "loading" and loading.headers.get("Retry-After") == str(server.INFERENCE_RETRY_AFTER))
+    check("/health tetap 200 selama loading", health.status_code == 200)
+    check("gauge dentalogic_ready 0 lalu 1", "dentalogic_ready 0" in metrics_loading and "dentalogic_ready 1" in metrics_ready)
+    check("setelah load: 200 ready dengan timing startup", ready.status_code == 200 and ready.json()["status"] == "ready"
+          and "model_load_ms" in ready.json()["startup"])
+    check("load gagal: 503 status error dengan pesan", failed.status_code == 503 and failed.json()["status"] == "error"
+          and "checkpoint rusak" in failed.json()["error"])
+
+
+def test_nms():
+    """Test nms.py: ekuivalen dengan reference.non_max_suppression() + kasus class-aware/Soft-NMS"""
+    print("\nTesting NMS...")
+    import numpy as np
+    import nms
+    import reference
+
+    failures = reference.check_nms_equivalence([100, 1000])
+    for failure in failures:
+        print(f"  NMS tidak ekuivalen: {failure}")
+    check("nms/batched_nms ekuivalen dengan non_max_suppression() (box acak)", not failures)
+
+    boxes = np.array([[0, 0, 100, 100], [5, 5, 105, 105], [200, 200, 300, 300]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+    keep, _ = nms.nms(boxes, scores, 0.5)
+    check("box overlap kelas sama di-suppress", keep.tolist() == [0, 2])
+
+    keep, _ = nms.nms(boxes, scores, 0.5, classes=np.array([0, 1, 0]))
+    check("box overlap beda kelas dipertahankan", keep.tolist() == [0, 1, 2])
+
+    keep, kept_scores = nms.nms(boxes, scores, 0.5, method="linear")
+    check("Soft-NMS menurunkan skor box overlap, bukan membuang", keep.tolist() == [0, 2, 1] and kept_scores[2] < scores[1])
+
+    keep, _ = nms.nms(boxes, scores, 0.5, score_threshold=0.75, max_det=1)
+    empty, empty_scores = nms.nms(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32))
+    check("score_threshold dan max_det", keep.tolist() == [0])
+    check("input kosong", len(empty) == 0 and len(empty_scores) == 0)
+
+
+def test_onnx_decode():
+    """Test OnnxYOLO._decode (kedua layout output) dan _postprocess terhadap output buatan tangan"""
+    print("\nTesting decode output ONNX...")
+    import numpy as np
+    from nms import batched_nms
+    from onnx_backend import OnnxYOLO
+    from preprocessing import LetterboxInfo
+
+    # Layout [B, anchors, 4 + nc]: cx, cy, w, h, skor D0, skor D1 (8 anchor, 2 kelas)
+    anchors = np.zeros((1, 8, 6), dtype=np.float32)
+    anchors[0, 0] = [100, 200, 40, 20, 0.9, 0.1]  # D0, dipertahankan
+    anchors[0, 1] = [102, 201, 40, 20, 0.8, 0.1]  # D0 overlap box 0, di-suppress
+    anchors[0, 2] = [101, 200, 40, 20, 0.2, 0.7]  # D1 overlap box 0, beda kelas
+    anchors[0, 3] = [400, 300, 10, 10, 0.1, 0.05]  # di bawah confidence
+
+    boxes, scores, class_ids = OnnxYOLO._decode(anchors)
+    check("decode cxcywh -> xyxy", np.allclose(boxes[0, 0], [80, 190, 120, 210]))
+    check("decode skor dan class id = argmax kelas", np.allclose(scores[0, :3], [0.9, 0.8, 0.7]) and class_ids[0, :3].tolist() == [0, 0, 1])
+
+    # Layout Ultralytics [B, 4 + nc, anchors] (shape[1] < shape[2]) di-transpose dulu
+    transposed = OnnxYOLO._decode(np.ascontiguousarray(anchors.transpose(0, 2, 1)))
+    check("layout [B, 4 + nc, anchors] sama dengan [B, anchors, 4 + nc]", all(
+        np.array_equal(a, b) for a, b in zip(transposed, (boxes, scores, class_ids))
+    ))
+
+    # Gambar asli 1280x960 -> input 640: scale 0.5, padding vertikal 80
+    model = OnnxYOLO.__new__(OnnxYOLO)
+    model.nms = batched_nms
+    model.names = {0: "D0", 1: "D1"}
+    info = LetterboxInfo(0.5, 0, 80, 1280, 960)
+    result, = model._postprocess(np.ascontiguousarray(anchors.transpose(0, 2, 1)), [info], 0.25, 0.5)
+    xyxy = result.boxes.xyxy.cpu().numpy()
+    check("postprocess: NMS per kelas + filter confidence", len(result.boxes) == 2 and result.boxes.cls.cpu().numpy().tolist() == [0, 1])
+    check("postprocess: skor box yang dipertahankan", np.allclose(result.boxes.conf.cpu().numpy(), [0.9, 0.7]))
+    check("postprocess: box di koordinat gambar asli", np.allclose(xyxy[0], [160, 220, 240, 260]) and np.allclose(xyxy[1], [162, 220, 242, 260]))
+    check("postprocess: orig_shape (height, width)", result.orig_shape == (960, 1280) and result.names == model.names)
+
+
+def test_tiling():
+    """Test plan_tiles dan merge_tile_boxes"""
+    print("\nTesting tiling...")
+    import numpy as np
+
+    plan = plan_tiles((4000, 3000), 640, 0.2, 64)
+    xs = sorted({tile.x for tile in plan.tiles})
+    ys = sorted({tile.y for tile in plan.tiles})
+    limited = plan_tiles((4000, 3000), 640, 0.2, 4)
+    small = plan_tiles((500, 400), 640, 0.2, 16)
+    check("grid menutup seluruh gambar tanpa downscale", plan.scale == 1.0 and xs[0] == 0 and ys[0] == 0
+          and xs[-1] + 640 == 4000 and ys[-1] + 640 == 3000)
+    check("tile bersebelahan overlap minimal 20%", all(b - a <= 512 for a, b in zip(xs, xs[1:])))
+    check("max_tiles: gambar diperkecil sampai grid muat", len(limited.tiles) <= 4 and limited.scale < 1
+          and max(tile.x + tile.width for tile in limited.tiles) == limited.size[0])
+    check("gambar lebih kecil dari tile = satu tile", small.scale == 1.0 and small.tiles == [(0, 0, 500, 400)])
+
+    def part(boxes, conf, cls, offset, scale=1.0):
+        return (np.array(boxes, dtype=np.float32), np.array(conf, dtype=np.float32),
+                np.array(cls, dtype=np.float32), offset, scale)
+
+    # Lesi yang sama di area overlap dua tile (x 512-640 di tile kiri = 0-128 di tile kanan)
+    boxes, scores, classes = merge_tile_boxes([
+        part([[560, 100, 620, 160]], [0.9], [2], (0, 0)),
+        part([[48, 100, 108, 160], [300, 300, 340, 340]], [0.8, 0.6], [2, 1], (512, 0)),
+    ], (1152, 640), 0.5)
+    check("duplikat antar tile digabung (confidence tertinggi dipertahankan)", len(boxes) == 2 and np.allclose(scores, [0.9, 0.6]))
+    check("box digeser ke koordinat gambar", boxes[1].tolist() == [812, 300, 852, 340] and classes.tolist() == [2, 1])
+
+    boxes, _, classes = merge_tile_boxes([
+        part([[560, 100, 620, 160]], [0.9], [2], (0, 0)),
+        part([[48, 100, 108, 160]], [0.8], [3], (512, 0)),
+    ], (1152, 640), 0.5)
+    check("box overlap beda kelas tidak digabung", len(boxes) == 2)
+
+    boxes, _, _ = merge_tile_boxes([part([[100, 50, 700, 200]], [0.9], [0], (400, 0), 0.5)], (2000, 1000), 0.5)
+    check("scale gambar kerja dibalik dan box di-clip ke ukuran gambar", boxes[0].tolist() == [1000, 100, 2000, 400])
+
+    boxes, scores, _ = merge_tile_boxes([
+        part([[0, 0, 10, 10], [20, 20, 30, 30], [40, 40, 50, 50]], [0.5, 0.9, 0.7], [0, 0, 0], (0, 0)),
+    ], (100, 100), 0.5, max_det=2)
+    empty = merge_tile_boxes([part(np.zeros((0, 4)), [], [], (0, 0))], (100, 100), 0.5)
+    check("max_det dan urutan confidence turun", np.allclose(scores, [0.9, 0.7]))
+    check("tanpa deteksi = array kosong", all(len(array) == 0 for array in empty) and empty[0].shape == (0, 4))
+
+
+def test_prediction_result():
+    """Test build_prediction_result (lookup kelas + np.maximum.at) sama dengan loop per box lama"""
+    print("\nTesting build_prediction_result...")
+    import numpy as np
+    import server
+    from onnx_backend import OnnxBoxes, OnnxResults
+    from reference import legacy_build_prediction_result
+
+    def results(names, rows):
+        array = np.array(rows, dtype=np.float32).reshape(-1, 6)
+        return OnnxResults(OnnxBoxes(array[:, :4], array[:, 4], array[:, 5]), names, (960, 1280))
+
+    def same(result):
+        return server.build_prediction_result(result, 12.345) == legacy_build_prediction_result(result, 12.345)
+
+    dx_names = {i: f"D{i}" for i in range(7)}
+    check("nama kelas di luar format Dx dipetakan lewat index", same(results(
+        {0: "caries", 1: "lesion_d1", 2: "D2", 3: "D9"},
+        [[0, 0, 10, 10, 0.5, 0], [5, 5, 20, 20, 0.7, 1], [1, 2, 3, 4, 0.3, 2], [7, 7, 9, 9, 0.9, 3]],
+    )))
+    check("class id di luar names dan di luar CARIES_CLASSES", same(results(
+        {0: "D0", 1: "D1"},
+        [[0, 0, 10, 10, 0.4, 1], [0, 0, 10, 10, 0.6, 5], [0, 0, 10, 10, 0.8, 12]],
+    )))
+    duplicates = results(dx_names, [
+        [0, 0, 10, 10, 0.3, 2], [10, 10, 30, 30, 0.95, 2], [40, 40, 50, 50, 0.6, 2], [60, 60, 70, 70, 0.5, 4],
+    ])
+    check("kelas duplikat: probabilitas = confidence maksimum", same(duplicates))
+    probabilities = {p["class"]: p["probability"] for p in server.build_prediction_result(duplicates, 1.0)["allProbabilities"]}
+    check("confidence maksimum per kelas", abs(probabilities["D2"] - 95) < 1e-3 and abs(probabilities["D4"] - 50) < 1e-3)
+    check("tanpa box", same(results(dx_names, [])))
+
+
+def test_response_format():
+    """Test negotiate_format, to_columnar dan render_response"""
+    print("\nTesting format response...")
+    import json
+
+    msgpack_format = "msgpack" if is_available("msgpack") else "json"
+    check("tanpa Accept = json", negotiate_format(None) == "json" and negotiate_format("") == "json")
+    check("Accept browser/umum = json", negotiate_format("text/html,application/xhtml+xml,*/*;q=0.8") == "json")
+    check("application/msgpack (case-insensitive)", negotiate_format("Application/MsgPack") == msgpack_format)
+    check("media type kolumnar", negotiate_format(f"{COLUMNAR_MEDIA_TYPE}, application/json") == "columnar")
+    check("media type pertama yang dikenali menang", negotiate_format(f"application/x-msgpack, {COLUMNAR_MEDIA_TYPE}") == msgpack_format)
+    check("q=0 dilewati", negotiate_format(f"application/msgpack;q=0, {COLUMNAR_MEDIA_TYPE}") == "columnar"
+          and negotiate_format("application/msgpack; q=0.0") == "json")
+
+    result = {
+        "class": "D2",
+        "detections": [
+            {"bbox": [1.5, 2.0, 30.0, 40.0], "class": "D2", "confidence": 80.1},
+            {"bbox": [5.0, 6.0, 7.0, 8.0], "class": "D1", "confidence": 45.3},
+        ],
+        "boundingBoxes": [{"x": 1.5, "y": 2.0, "width": 28.5, "height": 38.0}],
+    }
+    columnar = to_columnar(result)
+    check("to_columnar: kolom datar, boundingBoxes dihapus", columnar["detections"] == {
+        "count": 2,
+        "boxes": [1.5, 2.0, 30.0, 40.0, 5.0, 6.0, 7.0, 8.0],
+        "classes": ["D2", "D1"],
+        "confidences": [80.1, 45.3],
+    } and "boundingBoxes" not in columnar)
+    check("to_columnar tanpa deteksi", to_columnar({"detections": None})["detections"]["count"] == 0)
+
+    response = render_response(columnar, "columnar")
+    check("columnar: media type kolumnar + Vary: Accept",
+          response.media_type == COLUMNAR_MEDIA_TYPE and response.headers["vary"] == "Accept"
+          and json.loads(response.body) == columnar)
+    if is_available("msgpack"):
+        import msgpack
+        content = {"annotatedImage": b"\xff\xd8\xff", **columnar}
+        decoded = msgpack.unpackb(render_response(content, "msgpack").body)
+        check("msgpack: bytes JPEG tanpa base64, koordinat sama (float 32-bit)",
+              decoded["annotatedImage"] == b"\xff\xd8\xff"
+              and all(abs(a - b) < 1e-4 for a, b in zip(decoded["detections"]["boxes"], columnar["detections"]["boxes"])))
+    else:
+        print("  (msgpack tidak ter-install, test serialisasi msgpack dilewati)")
+
+
+class FakeModel:
+    """Pengganti instance model untuk test registry"""
+    names = {0: "D0", 1: "D1"}
+
+
+def test_registry_hot_swap():
+    """Test lease/drain saat hot-swap dan ModelRegistry.find"""
+    print("\nTesting ModelRegistry hot-swap...")
+    loads = []
+
+    def factory(name, path, fail=False):
+        if fail:
+            raise RuntimeError("checkpoint rusak")
+        loads.append(name)
+        return ModelVersion(name, f"v{len(loads)}", path, [FakeModel(), FakeModel()])
+
+    registry = ModelRegistry(factory)
+    registry.register("default", Path("best.pt"))
+
+    def raises(error_type, fn) -> bool:
+        try:
+            fn()
+        except error_type:
+            return True
+        return False
+
+    check("nama tidak terdaftar = ModelNotFoundError", raises(ModelNotFoundError, lambda: registry.acquire("lain")))
+    check("belum di-load = ModelUnavailableError", raises(ModelUnavailableError, registry.acquire))
+
+    first = registry.load()
+    lease = registry.acquire()
+    second = registry.load()
+    with registry.acquire() as current:
+        after_swap = current
+    check("request baru memakai versi baru setelah swap", after_swap is second and registry.get() is second)
+    check("versi lama tetap utuh selama masih di-lease", lease.version is first and len(first.instances) == 2
+          and registry.stats()["draining"][0]["version"] == "v1")
+    check("find menemukan versi lama yang masih di-lease", registry.find(first.ref) is first)
+    with first.instance() as model:
+        check("instance versi lama masih bisa dipinjam", isinstance(model, FakeModel))
+
+    lease.release()
+    lease.release()
+    check("versi lama dilepas setelah lease terakhir selesai", first.instances == [] and registry.stats()["draining"] == [])
+    check("find versi yang sudah dilepas = None (tanpa fallback ke versi aktif)", registry.find(first.ref) is None)
+    check("find versi yang tidak pernah ada = None", registry.find(ModelRef("default", "v99")) is None)
+    check("release ganda tidak mengurangi lease versi lain", second.leases == 0)
+    check("instance versi yang dilepas = ModelUnavailableError", raises(ModelUnavailableError, first.instance().__enter__))
+
+    third = registry.load()
+    check("versi tanpa lease langsung dilepas saat swap", second.instances == [] and registry.get() is third)
+
+    check("load gagal: error dicatat, versi aktif tidak berubah",
+          raises(RuntimeError, lambda: registry.load(fail=True)) and registry.get() is third
+          and registry.error() == "checkpoint rusak")
+    check("load berhasil berikutnya menghapus error", registry.load() is registry.get() and registry.error() is None)
+
+    import server
+    check(
+"server.resolve_model_version: versi yang tidak ada di process ini = ModelUnavailableError",
+raises(ModelUnavailableError, lambda: server.resolve_model_version(ModelRef(server.DEFAULT_MODEL_NAME, "v99")))
+)
+
+
+def test_registry_watch():
+    """Test check_changes: reload saat isi file model berubah"""
+    print("\nTesting ModelRegistry check_changes...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "best.onnx"
+        path.write_bytes(b"model-1")
+
+        def factory(name, path):
+            return ModelVersion(name, file_version(path), path, [FakeModel()], file_signature(path))
+
+        registry = ModelRegistry(factory)
+        registry.register("default", path)
+        first = registry.load()
+
+        registry.check_changes()
+        unchanged = registry.get() is first and not registry.loading()
+
+        # Isi sama, mtime berubah: signature diperbarui tanpa reload
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        registry.check_changes()
+        touched = registry.get() is first and not registry.loading() and first.signature == file_signature(path)
+
+        path.write_bytes(b"model-2")
+        os.utime(path, (time.time() + 20, time.time() + 20))
+        registry.check_changes()
+        deadline = time.monotonic() + 5
+        while registry.loading() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        check("file tidak berubah = tidak reload", unchanged)
+        check("hanya mtime berubah = tidak reload", touched)
+        check("isi file berubah = versi baru di-load", registry.get().version == file_version(path) != first.version)
+
+
+TESTS = {
+    "inference": [test_executor_admission, test_queue_full_503, test_micro_batcher],
+    "cache": [test_lru_cache, test_disk_cache],
+    "uploads": [test_upload_sniffing, test_body_size_limit],
+    "jobs": [test_job_lease, test_job_retention, test_job_worker_errors, test_job_capacity, test_webhook_url],
+    "live": [test_live_frames, test_live_router],
+    "preprocessing": [test_letterbox, test_decode_image],
+    "annotate": [test_annotation_render],
+    "profiling": [test_profiling],
+    "tuning": [test_tuned_config],
+    "api": [test_predict_batch, test_metrics_format, test_ready],
+    "nms": [test_nms, test_onnx_decode],
+    "tiling": [test_tiling],
+    "responses": [test_prediction_result, test_response_format],
+    "registry": [test_registry_hot_swap, test_registry_watch],
+}
+
+if __name__ == "__main__":
+    print("🧪 Testing modul server Dentalogic8")
+
+    groups = sys.argv[1:] or list(TESTS)
+    unknown = [group for group in groups if group not in TESTS]
+    if unknown:
+        print(f"\n❌ Grup test tidak dikenal: {', '.join(unknown)} (pilihan: {', '.join(TESTS)})")
+        sys.exit(2)
+
+    failed = []
+    for group in groups:
+        for test in TESTS[group]:
+            try:
+                test()
+            except AssertionError:
+                failed.append(f"{group}.{test.__name__}")
+            except Exception as e:
+                print(f"Error: {type(e).__name__}: {e}")
+                failed.append(f"{group}.{test.__name__}")
+
+    if failed:
+        print(f"\n❌ Test gagal: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ Semua test berhasil!")
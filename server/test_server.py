@@ -50,6 +50,45 @@ def test_predict(image_path: str):
         print(f"Error: {e}")
         return False
 
+def test_predict_batch(image_paths: list):
+    """Test predict batch endpoint dengan beberapa view"""
+    print(f"\nTesting /predict/batch endpoint dengan {len(image_paths)} gambar...")
+    
+    for image_path in image_paths:
+        if not Path(image_path).exists():
+            print(f"Error: File {image_path} tidak ditemukan")
+            return False
+    
+    try:
+        handles = [open(image_path, 'rb') for image_path in image_paths]
+        try:
+            files = [
+                ('files', (Path(image_path).name, f, 'image/jpeg'))
+                for image_path, f in zip(image_paths, handles)
+            ]
+            response = requests.post(f"{SERVER_URL}/predict/batch", files=files)
+        finally:
+            for f in handles:
+                f.close()
+        
+        print(f"Status: {response.status_code}")
+        if response.status_code == 200:
+            result = response.json()
+            print(f"\nHasil Prediksi per View:")
+            for view in result['views']:
+                print(f"  {view['view']}: {view['class']} ({view['confidence']:.2f}%), "
+                      f"{len(view['detections'])} deteksi")
+            aggregate = result['aggregate']
+            print(f"\n  Agregat Pasien: {aggregate['class']} ({aggregate['confidence']:.2f}%)")
+            print(f"  Inference Time: {result['inferenceTime']} ms")
+            return True
+        else:
+            print(f"Error: {response.text}")
+            return False
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
 if __name__ == "__main__":
     print("🧪 Testing Dentalogic8 Server API\n")
     
@@ -59,7 +98,13 @@ if __name__ == "__main__":
         sys.exit(1)
     
     # Test predict jika image path diberikan
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 2:
+        if test_predict_batch(sys.argv[1:]):
+            print("\n✅ Test berhasil!")
+        else:
+            print("\n❌ Test gagal!")
+            sys.exit(1)
+    elif len(sys.argv) > 1:
         image_path = sys.argv[1]
         if test_predict(image_path):
             print("\n✅ Test berhasil!")
@@ -69,5 +114,6 @@ if __name__ == "__main__":
     else:
         print("\n💡 Untuk test predict, jalankan:")
         print(f"   python test_server.py <path_to_image>")
+        print(f"   python test_server.py <frontal> <left_lateral> <right_lateral>  # multi-view")
         print("\n✅ Health check berhasil!")
 
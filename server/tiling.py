@@ -0,0 +1,135 @@
+"""
+Tiled (sliced) inference untuk foto intraoral resolusi tinggi
+
+Lesi kecil (D1/D2) di foto 4000x3000 tinggal beberapa pixel setelah gambar
+di-resize ke input model 640x640. Mode tiled memotong gambar menjadi tile
+yang saling overlap dengan ukuran input model, sehingga setiap tile di-infer
+tanpa downscale, lalu box dari semua tile digeser ke koordinat gambar dan
+duplikat antar tile digabung dengan NMS per kelas.
+
+- plan_tiles: grid tile yang menutup seluruh gambar; jika jumlah tile melebihi
+  max_tiles, gambar diperkecil sampai grid muat (latency tetap terbatas)
+- merge_tile_boxes: gabungkan box tile ke koordinat gambar + NMS per kelas
+"""
+import math
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from nms import nms
+
+
+class Tile(NamedTuple):
+    """Posisi tile di gambar kerja (gambar setelah diskala TilePlan.scale)"""
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def box(self) -> Tuple[int, int, int, int]:
+        """Box (left, upper, right, lower) untuk Image.crop"""
+        return self.x, self.y, self.x + self.width, self.y + self.height
+
+
+class TilePlan(NamedTuple):
+    """Grid tile untuk satu gambar"""
+    scale: float  # ukuran gambar kerja / ukuran gambar
+    size: Tuple[int, int]  # ukuran gambar kerja (width, height)
+    tiles: List[Tile]
+
+
+def tile_starts(length: int, tile_size: int, stride: int) -> List[int]:
+    """
+    Posisi awal tile di satu sumbu; tile terakhir tepat di tepi gambar dan
+    jarak antar tile dibagi rata (overlap minimal 1 - stride / tile_size)
+    """
+    if length <= tile_size:
+        return [0]
+    count = math.ceil((length - tile_size) / stride) + 1
+    return [round(i * (length - tile_size) / (count - 1)) for i in range(count)]
+
+
+def plan_tiles(image_size: Tuple[int, int], tile_size: int, overlap: float, max_tiles: int) -> TilePlan:
+    """
+    Susun grid tile untuk gambar berukuran image_size
+
+    Args:
+        image_size: (width, height) gambar
+        tile_size: Sisi tile dalam pixel gambar kerja (biasanya ukuran input model)
+        overlap: Fraksi overlap antar tile bersebelahan (0 - 0.9)
+        max_tiles: Jumlah tile maksimum; gambar diperkecil jika grid melebihi
+
+    Returns:
+        TilePlan (scale 1.0 jika gambar tidak perlu diperkecil)
+    """
+    width, height = image_size
+    stride = max(1, round(tile_size * (1 - overlap)))
+    max_tiles = max(1, max_tiles)
+
+    def covered(count: int) -> int:
+        # Panjang maksimum yang tertutup count tile di satu sumbu
+        return tile_size + (count - 1) * stride
+
+    scale = 1.0
+    if len(tile_starts(width, tile_size, stride)) * len(tile_starts(height, tile_size, stride)) > max_tiles:
+        # Skala terbesar yang membuat grid columns x rows <= max_tiles
+        scale = max(
+            min(covered(columns) / width, covered(max_tiles // columns) / height)
+            for columns in range(1, max_tiles + 1)
+        )
+    size = (max(1, min(width, math.floor(width * scale))), max(1, min(height, math.floor(height * scale))))
+    xs = tile_starts(size[0], tile_size, stride)
+    ys = tile_starts(size[1], tile_size, stride)
+
+    tiles = [
+        Tile(x, y, min(tile_size, size[0]), min(tile_size, size[1]))
+        for y in ys
+        for x in xs
+    ]
+    return TilePlan(scale, size, tiles)
+
+
+def merge_tile_boxes(
+    parts: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[int, int], float]],
+    image_size: Tuple[int, int],
+    iou_threshold: float,
+    max_det: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Gabungkan deteksi beberapa tile menjadi deteksi satu gambar
+
+    Args:
+        parts: List (xyxy [N, 4] koordinat tile, conf [N], cls [N], offset (x, y)
+            tile di gambar kerja, scale gambar kerja); pass gambar utuh memakai
+            offset (0, 0) dan scale 1
+        image_size: (width, height) gambar, untuk clip box
+        iou_threshold: Box kelas sama dengan IoU > threshold dianggap duplikat
+        max_det: Jumlah deteksi maksimum (0 = tanpa batas)
+
+    Returns:
+        Tuple (xyxy [M, 4] koordinat gambar, conf [M], cls [M]) urut confidence turun
+    """
+    boxes, scores, classes = [], [], []
+    for xyxy, conf, cls, (offset_x, offset_y), scale in parts:
+        if len(xyxy) == 0:
+            continue
+        shifted = xyxy.astype(np.float32)  # copy
+        shifted[:, 0::2] += offset_x
+        shifted[:, 1::2] += offset_y
+        shifted /= scale
+        boxes.append(shifted)
+        scores.append(conf.astype(np.float32))
+        classes.append(cls.astype(np.float32))
+
+    if not boxes:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+    boxes = np.concatenate(boxes)
+    scores = np.concatenate(scores)
+    classes = np.concatenate(classes)
+    np.clip(boxes[:, 0::2], 0, image_size[0], out=boxes[:, 0::2])
+    np.clip(boxes[:, 1::2], 0, image_size[1], out=boxes[:, 1::2])
+
+    keep, _ = nms(boxes, scores, iou_threshold, classes=classes, max_det=max_det)
+    return boxes[keep], scores[keep], classes[keep]
@@ -0,0 +1,96 @@
+"""
+Config hasil autotune (python benchmark.py autotune)
+
+File JSON berisi environment variable yang direkomendasikan untuk mesin ini:
+
+    {
+        "meta": {"cpu_count": 8, "backend": "ultralytics", ...},
+        "env": {"DENTALOGIC_WORKERS": "2", "DENTALOGIC_TORCH_THREADS": "4", ...},
+        "results": [...]
+    }
+
+apply_tuned_config() dipanggil di awal config.py (di-import server.py) dan
+launcher.py, sebelum numpy/torch di-import, supaya jumlah thread BLAS/OpenMP ikut terkunci per
+worker. Environment variable yang sudah diset tetap diutamakan. File yang
+dibuat di mesin dengan jumlah CPU berbeda tidak dipakai.
+
+Tidak boleh meng-import numpy/torch (dipakai sebelum library itu di-import).
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+# DENTALOGIC_TUNED_CONFIG: path file config autotune (kosong = nonaktif)
+DEFAULT_TUNED_CONFIG = Path(__file__).parent / "tuned.json"
+
+# Thread pool native yang dikunci bersama thread intra-op torch/onnxruntime
+NATIVE_THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Path dan env yang sudah diterapkan di process ini (None = belum/tidak ada)
+applied_config: Optional[Dict] = None
+
+
+def tuned_config_path() -> Optional[Path]:
+    value = os.getenv("DENTALOGIC_TUNED_CONFIG", str(DEFAULT_TUNED_CONFIG))
+    return Path(value) if value else None
+
+
+def thread_env(threads: int) -> Dict[str, str]:
+    """Environment yang mengunci thread intra-op satu worker (torch, onnxruntime, BLAS/OpenMP)"""
+    env = {
+        "DENTALOGIC_TORCH_THREADS": str(threads),
+        "DENTALOGIC_ORT_INTRA_OP_THREADS": str(threads),
+    }
+    env.update({name: str(threads) for name in NATIVE_THREAD_ENV})
+    return env
+
+
+def load_tuned_config(path: Path) -> Dict:
+    """Baca file config autotune"""
+    config = json.loads(path.read_text())
+    if not isinstance(config.get("env"), dict):
+        raise ValueError(f"{path}: field 'env' tidak ada")
+    return config
+
+
+def write_tuned_config(path: Path, env: Dict[str, str], meta: Dict, results: list):
+    """Tulis file config autotune (atomik, supaya server yang start bersamaan tidak membaca file setengah jadi)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(json.dumps({"meta": meta, "env": env, "results": results}, indent=2))
+    tmp_path.replace(path)
+
+
+def apply_tuned_config() -> Optional[Dict]:
+    """
+    Terapkan env dari file config autotune (os.environ.setdefault)
+
+    Returns:
+        {"path", "env"} (env yang belum diset sebelumnya), atau None jika tidak ada file / tidak cocok
+    """
+    global applied_config
+    if applied_config is not None:
+        return applied_config
+    path = tuned_config_path()
+    if path is None or not path.is_file():
+        return None
+    try:
+        config = load_tuned_config(path)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Failed to read tuned config {path}: {e}")
+        return None
+
+    cpu_count = config.get("meta", {}).get("cpu_count")
+    if cpu_count is not None and cpu_count != os.cpu_count():
+        print(
+            f"Warning: Tuned config {path} was generated for {cpu_count} CPUs, this machine has "
+            f"{os.cpu_count()}; rerun python benchmark.py autotune"
+        )
+        return None
+
+    env = {key: str(value) for key, value in config["env"].items() if key not in os.environ}
+    os.environ.update(env)
+    applied_config = {"path": str(path), "env": env}
+    print(f"Tuned config: {path} ({', '.join(f'{key}={value}' for key, value in env.items()) or 'all overridden by environment'})")
+    return applied_config
@@ -0,0 +1,157 @@
+"""
+Penerimaan upload gambar
+
+- BodySizeLimitMiddleware: tolak body request yang terlalu besar sejak awal
+  (dari header Content-Length, atau saat jumlah byte body melewati batas),
+  sebelum multipart parser selesai menulis file ke spool
+- sniff_image_type: deteksi format dari magic bytes (tidak percaya content_type dari client)
+- read_upload: baca UploadFile ke memori dengan batas ukuran per file
+"""
+from typing import Dict, Optional, Tuple
+
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+# Jumlah byte awal yang dibutuhkan untuk sniffing
+SNIFF_BYTES = 16
+
+# Ukuran chunk saat membaca upload yang ukurannya tidak diketahui
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+class UploadRejected(Exception):
+    """Upload ditolak (status_code HTTP dan pesan untuk client)"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Format gambar dari magic bytes (None jika bukan format yang didukung)"""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if header.startswith(b"BM"):
+        return "bmp"
+    if header.startswith((b"II*\x00", b"MM\x00*")):
+        return "tiff"
+    return None
+
+
+def _too_large_message(max_bytes: int) -> str:
+    return f"Ukuran upload melebihi batas {max_bytes / (1024 * 1024):.0f} MB"
+
+
+async def read_upload(file: UploadFile, max_bytes: int = 0) -> Tuple[bytes, str]:
+    """
+    Baca satu file upload dengan validasi magic bytes dan batas ukuran
+
+    File di-sniff dari beberapa byte pertama sebelum sisanya dibaca, sehingga
+    payload bukan gambar ditolak tanpa membaca seluruh isi. File yang lolos
+    dibaca utuh ke memori (dibutuhkan untuk decode); spool milik UploadFile
+    ditutup setelahnya supaya tidak ada dua salinan.
+
+    Args:
+        file: UploadFile dari FastAPI
+        max_bytes: Ukuran maksimum file (0 = tanpa batas)
+
+    Returns:
+        Tuple (bytes file, format hasil sniffing)
+
+    Raises:
+        UploadRejected: 400 jika bukan gambar, 413 jika terlalu besar
+    """
+    try:
+        if max_bytes and file.size is not None and file.size > max_bytes:
+            raise UploadRejected(413, _too_large_message(max_bytes))
+
+        header = await file.read(SNIFF_BYTES)
+        image_type = sniff_image_type(header)
+        if image_type is None:
+            raise UploadRejected(400, "File harus berupa gambar (JPEG, PNG, WEBP, BMP, GIF, TIFF)")
+
+        if file.size is not None:
+            # Ukuran sudah diketahui dan sudah dicek: baca sekali tanpa gabung chunk
+            await file.seek(0)
+            return await file.read(), image_type
+
+        chunks = [header]
+        total = len(header)
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if max_bytes and total > max_bytes:
+                raise UploadRejected(413, _too_large_message(max_bytes))
+            chunks.append(chunk)
+        return b"".join(chunks), image_type
+    finally:
+        await file.close()
+
+
+class BodySizeLimitMiddleware:
+    """
+    Middleware ASGI yang membatasi ukuran body request per path
+
+    Request dengan Content-Length di atas batas langsung dijawab 413 tanpa
+    membaca body. Untuk body chunked (tanpa Content-Length), byte dihitung
+    saat di-stream; begitu melewati batas, 413 dikirim dan aplikasi melihat
+    client disconnect sehingga parsing dihentikan.
+
+    Args:
+        app: Aplikasi ASGI
+        limits: Mapping path -> ukuran body maksimum dalam byte (0 = tanpa batas)
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if not max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse({"detail": _too_large_message(max_bytes)}, status_code=413)
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            await response(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request" and not rejected:
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    rejected = True
+                    if not response_started:
+                        await response(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Setelah 413 terkirim, response dari aplikasi dibuang
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
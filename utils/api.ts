@@ -22,6 +22,51 @@ export interface PredictionResponse {
   detections?: Detection[];
   boundingBoxes?: number[][];
   annotatedImage?: string; // Base64 encoded image with bounding boxes
+  annotatedImageUrl?: string; // Path GET /images/{id} jika delivery=link
+  imageSize?: [number, number]; // Ukuran annotatedImage (acuan bbox jika coords=image)
+  originalSize?: [number, number]; // Ukuran foto asli (acuan bbox default, coords=original)
+  coords?: 'image' | 'original';
+  cached?: boolean; // true jika hasil diambil dari cache server
+}
+
+export interface ViewPredictionResponse extends PredictionResponse {
+  view: string;
+  filename?: string;
+}
+
+export interface BatchPredictionResponse {
+  views: ViewPredictionResponse[];
+  aggregate: {
+    class: string;
+    confidence: number;
+    allProbabilities: Array<{
+      class: string;
+      probability: number;
+    }>;
+    detectionCount: number;
+  };
+  inferenceTime: number;
+}
+
+export interface JobItem {
+  index: number;
+  filename?: string;
+  view: string;
+  status: 'queued' | 'running' | 'done' | 'failed';
+  error?: string;
+  result?: PredictionResponse;
+  annotatedImageUrl?: string; // Path GET /jobs/{id}/items/{index}/image
+}
+
+export interface JobResponse {
+  id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  total: number;
+  completed: number;
+  failed: number;
+  pending: number;
+  expiresAt?: number | null;
+  items: JobItem[];
 }
 
 /**
@@ -122,6 +167,125 @@ export async function predictCariesFromServer(
   }
 }
 
+/**
+ * Predict caries untuk beberapa view satu pasien (frontal, left/right lateral)
+ * dalam satu request dan satu batch inference di server
+ */
+export async function predictCariesBatchFromServer(
+  images: Array<{ uri: string; name?: string }>
+): Promise<BatchPredictionResponse> {
+  const formData = new FormData();
+  images.forEach(({ uri, name }, index) => {
+    const extension = uri.split('.').pop()?.toLowerCase() || 'jpg';
+    const mimeType = extension === 'png' ? 'image/png' : 'image/jpeg';
+    // @ts-ignore - React Native FormData format khusus
+    formData.append('files', {
+      uri: uri,
+      type: mimeType,
+      name: name || `dental-image-${index + 1}.${extension}`,
+    } as any);
+  });
+
+  const response = await fetch(`${API_BASE_URL}/predict/batch`, {
+    method: 'POST',
+    body: formData,
+  });
+
+  if (!response.ok) {
+    let errorMessage = `Server error: ${response.status}`;
+    try {
+      const errorData = await response.json();
+      errorMessage = errorData.detail || errorMessage;
+    } catch {
+      errorMessage = response.statusText || errorMessage;
+    }
+    throw new Error(errorMessage);
+  }
+
+  return (await response.json()) as BatchPredictionResponse;
+}
+
+async function parseErrorResponse(response: Response): Promise<string> {
+  let errorMessage = `Server error: ${response.status}`;
+  try {
+    const errorData = await response.json();
+    errorMessage = errorData.detail || errorMessage;
+  } catch {
+    errorMessage = response.statusText || errorMessage;
+  }
+  return errorMessage;
+}
+
+/**
+ * Submit banyak gambar (misal full-mouth series) sebagai job asynchronous.
+ * Server langsung mengembalikan ID job; hasil diambil dengan getPredictionJob.
+ */
+export async function submitPredictionJob(
+  images: Array<{ uri: string; name?: string }>
+): Promise<{ id: string; total: number }> {
+  const formData = new FormData();
+  images.forEach(({ uri, name }, index) => {
+    const extension = uri.split('.').pop()?.toLowerCase() || 'jpg';
+    const mimeType = extension === 'png' ? 'image/png' : 'image/jpeg';
+    // @ts-ignore - React Native FormData format khusus
+    formData.append('files', {
+      uri: uri,
+      type: mimeType,
+      name: name || `dental-image-${index + 1}.${extension}`,
+    } as any);
+  });
+
+  const response = await fetch(`${API_BASE_URL}/jobs`, {
+    method: 'POST',
+    body: formData,
+  });
+  if (!response.ok) {
+    throw new Error(await parseErrorResponse(response));
+  }
+  return await response.json();
+}
+
+/**
+ * Ambil status dan hasil job (polling sampai status 'completed' atau 'failed')
+ */
+export async function getPredictionJob(id: string): Promise<JobResponse> {
+  const response = await fetch(`${API_BASE_URL}/jobs/${id}`);
+  if (!response.ok) {
+    throw new Error(await parseErrorResponse(response));
+  }
+  return (await response.json()) as JobResponse;
+}
+
+export interface LiveDetectionResult {
+  seq: number;
+  frameSize?: [number, number];
+  detections?: Detection[];
+  inferenceTime?: number;
+  dropped?: number;
+  error?: string;
+}
+
+/**
+ * Buka WebSocket deteksi live. Kirim frame kamera (JPEG) dengan socket.send(arrayBuffer);
+ * server hanya memproses frame terbaru dan membalas deteksi per frame.
+ */
+export function openLiveDetection(
+  onResult: (result: LiveDetectionResult) => void,
+  fps: number = 5
+): WebSocket {
+  const wsUrl = API_BASE_URL.replace(/^http/, 'ws');
+  const socket = new WebSocket(`${wsUrl}/ws/live?fps=${fps}`);
+  socket.binaryType = 'arraybuffer';
+  socket.onmessage = (event) => {
+    try {
+      onResult(JSON.parse(event.data) as LiveDetectionResult);
+    } catch (error) {
+      console.warn('Invalid live detection message', error);
+    }
+  };
+  return socket;
+}
+
 /**
  * Get server URL (untuk debugging)
  */